@@ -1,2 +1 @@
-python src/main.py
-cd public && python -m http.server 8888
+python src/main.py serve --watch
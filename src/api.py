@@ -0,0 +1,37 @@
+from fs import ignore_rules
+from template import load_fs_template
+from utils import URL_MARK, render_content, serialize
+from walk import STATIC_IGNORE
+
+
+def render_markdown(markdown, template, basepath="/", cache=None):
+    title, parts = render_content(markdown.replace(URL_MARK, "\ufffd"), cache)
+    return serialize(template, Title=title, Content=basepath.join(parts))
+
+
+def build_site(
+    content,
+    template_fs,
+    template_path="template.html",
+    basepath="/",
+    static=None,
+    ignore=(),
+    cache=None,
+):
+    template = load_fs_template(template_fs, template_path, basepath)
+    outputs = {}
+    if static is not None:
+        for rel_path in static.walk(ignore_rules(static, ignore, STATIC_IGNORE)):
+            outputs[rel_path] = static.read_bytes(rel_path)
+    for rel_path in content.walk(ignore_rules(content, ignore)):
+        if not rel_path.endswith(".md"):
+            outputs[rel_path] = content.read_bytes(rel_path)
+            continue
+        try:
+            markdown = content.read_text(rel_path)
+            outputs[rel_path[:-3] + ".html"] = render_markdown(
+                markdown, template, basepath, cache
+            )
+        except Exception as e:
+            raise Exception(f"failed to generate page {rel_path}: {e}") from e
+    return outputs
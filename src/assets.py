@@ -0,0 +1,93 @@
+import json
+import os
+import posixpath
+import re
+
+from manifest import hash_file, hash_text
+from sync import sync_file, write_if_changed
+from walk import STATIC_IGNORE, load_ignore_rules, walk_files
+
+ASSET_MANIFEST = "asset-manifest.json"
+FINGERPRINT_LENGTH = 8
+ASSET_PATH_PATTERN = re.compile(r'[^"?#]*')
+
+
+class AssetMap(dict):
+    def __init__(self, names=()):
+        super().__init__(names)
+        self.digest = hash_text(json.dumps(sorted(self.items())))
+
+
+def fingerprint_name(rel_path, file_hash):
+    directory, name = posixpath.split(rel_path)
+    stem, extension = posixpath.splitext(name)
+    if not stem:
+        stem, extension = extension, ""
+    fingerprinted = f"{stem}.{file_hash[:FINGERPRINT_LENGTH]}{extension}"
+    return posixpath.join(directory, fingerprinted)
+
+
+def fingerprint_parts(parts, assets):
+    if not assets:
+        return parts
+    rewritten = [parts[0]]
+    for part in parts[1:]:
+        path = ASSET_PATH_PATTERN.match(part).group()
+        if path in assets:
+            part = assets[path] + part[len(path) :]
+        rewritten.append(part)
+    return rewritten
+
+
+def fingerprint_assets(
+    static_dir, directories, previous=None, method="copy", rules=None, changes=None
+):
+    previous = previous or {}
+    old_files = previous.get("files", {})
+    if rules is None:
+        rules = load_ignore_rules(static_dir, (), STATIC_IGNORE)
+    files = {}
+    names = {}
+    for src_path, rel_path in walk_files(static_dir, rules):
+        stat = os.stat(src_path)
+        stamp = f"{stat.st_mtime_ns}:{stat.st_size}"
+        entry = old_files.get(rel_path)
+        if entry is None or entry["stamp"] != stamp:
+            entry = {"stamp": stamp, "hash": hash_file(src_path)}
+        url_path = rel_path.replace(os.sep, "/")
+        names[url_path] = fingerprint_name(url_path, entry["hash"])
+        files[rel_path] = entry
+
+    assets = AssetMap(names)
+    data = (json.dumps(assets, indent=2, sort_keys=True) + "\n").encode("utf-8")
+    outputs = []
+    copied = 0
+    for directory in directories:
+        for url_path, name in assets.items():
+            src_path = os.path.join(static_dir, *url_path.split("/"))
+            dest_path = os.path.join(directory, *name.split("/"))
+            if sync_file(src_path, dest_path, method, changes=changes):
+                copied += 1
+            outputs.append(dest_path)
+        manifest_path = os.path.join(directory, ASSET_MANIFEST)
+        write_if_changed(manifest_path, data, changes)
+        outputs.append(manifest_path)
+    removed = remove_fingerprinted(previous, outputs, changes)
+    print(
+        f"fingerprint: {len(assets)} assets, {copied} copied, "
+        f"{removed} stale copies removed"
+    )
+    return assets, {"files": files, "outputs": outputs}
+
+
+def remove_fingerprinted(previous, outputs=(), changes=None):
+    live = set(outputs)
+    removed = 0
+    for path in previous.get("outputs", ()):
+        if path in live or not os.path.isfile(path):
+            continue
+        os.remove(path)
+        if changes is not None:
+            changes.record_removal(path)
+        removed += 1
+    return removed
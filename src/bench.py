@@ -0,0 +1,181 @@
+import argparse
+import contextlib
+import json
+import os
+import resource
+import tempfile
+import time
+import tracemalloc
+
+from api import build_site
+from blocks import (
+    extract_title,
+    iter_blocks,
+    markdown_to_blocks,
+    markdown_to_html_node,
+)
+from corpus import DEFAULT_MIX, generate_corpus, parse_mix
+from fs import DirectoryFS, MemoryFS
+from markdown import text_to_textnodes
+from template import load_template
+from utils import clean_copy, discover_pages, generate_pages_recursive
+
+INLINE_BLOCKS = ("paragraph", "heading", "unordered_list", "ordered_list", "quote")
+
+
+def each(func, items):
+    return lambda: [func(item) for item in items]
+
+
+def run_stage(name, func, pages, input_bytes, memory=False):
+    if memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    peak = None
+    if memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return {
+        "stage": name,
+        "seconds": elapsed,
+        "pages_per_second": pages / elapsed if elapsed else float("inf"),
+        "mb_per_second": input_bytes / 1e6 / elapsed if elapsed else float("inf"),
+        "peak_bytes": peak,
+    }
+
+
+def bench_site(root, pages, args):
+    content_dir, static_dir, template_path = generate_corpus(
+        root,
+        pages=pages,
+        page_size=args.page_size,
+        density=args.density,
+        mix=args.mix,
+        images=args.images,
+        static_files=args.static_files,
+        static_size=args.static_size,
+        seed=args.seed,
+    )
+    sources = [src for src, _ in discover_pages(content_dir, root)[0]]
+    texts = []
+    for src in sources:
+        with open(src) as file:
+            texts.append(file.read())
+    input_bytes = sum(len(text.encode("utf-8")) for text in texts)
+    static_bytes = args.static_files * args.static_size
+    inline = [
+        block
+        for text in texts
+        for block, block_type in iter_blocks(text)
+        if block_type.value in INLINE_BLOCKS
+    ]
+    trees = [markdown_to_html_node(text) for text in texts]
+    contents = [tree.to_html() for tree in trees]
+    titles = [extract_title(text) for text in texts]
+    template = load_template(template_path, "/blog/")
+    docs_dir = os.path.join(root, "docs")
+    disk = DirectoryFS(content_dir)
+    content_fs = MemoryFS({path: disk.read_bytes(path) for path in disk.walk()})
+
+    def build():
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            clean_copy(static_dir, docs_dir)
+            generate_pages_recursive(content_dir, template_path, docs_dir, "/blog/")
+
+    def copy_static():
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            clean_copy(static_dir, docs_dir)
+
+    def render_templates():
+        for title, content in zip(titles, contents):
+            template.render(Title=title, Content=content)
+
+    stages = [
+        ("markdown_to_blocks", each(markdown_to_blocks, texts), input_bytes),
+        ("text_to_textnodes", each(text_to_textnodes, inline), input_bytes),
+        ("markdown_to_html_node", each(markdown_to_html_node, texts), input_bytes),
+        ("to_html", each(lambda tree: tree.to_html(), trees), input_bytes),
+        ("templating", render_templates, input_bytes),
+        ("clean_copy", copy_static, static_bytes),
+        ("generate_pages_recursive", build, input_bytes),
+        (
+            "build_site (memory)",
+            lambda: build_site(content_fs, DirectoryFS(root), basepath="/blog/"),
+            input_bytes,
+        ),
+    ]
+    results = []
+    for name, func, stage_bytes in stages:
+        if args.stages and name not in args.stages:
+            continue
+        results.append(run_stage(name, func, pages, stage_bytes, args.memory))
+    return input_bytes, results
+
+
+def format_bytes(size):
+    if size is None:
+        return "-"
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.1f}{unit}"
+        size /= 1024
+
+
+def print_report(pages, input_bytes, results):
+    print(f"\n{pages} pages, {input_bytes / 1e6:.2f} MB of markdown")
+    print(f"{'stage':<26}{'seconds':>10}{'pages/s':>12}{'MB/s':>10}{'peak':>10}")
+    for result in results:
+        print(
+            f"{result['stage']:<26}{result['seconds']:>10.3f}"
+            f"{result['pages_per_second']:>12.0f}{result['mb_per_second']:>10.1f}"
+            f"{format_bytes(result['peak_bytes']):>10}"
+        )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the site generator")
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 1000])
+    parser.add_argument("--page-size", type=int, default=4000, help="bytes per page")
+    parser.add_argument(
+        "--density", type=float, default=0.2, help="share of words with inline markup"
+    )
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=DEFAULT_MIX,
+        help="block weights, e.g. paragraph=6,list=2,code=1,quote=1",
+    )
+    parser.add_argument("--images", type=int, default=1, help="images per page")
+    parser.add_argument("--static-files", type=int, default=8)
+    parser.add_argument("--static-size", type=int, default=64 * 1024)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stages", nargs="+", help="only run these stages")
+    parser.add_argument(
+        "--memory",
+        action="store_true",
+        help="trace peak Python allocations per stage (slows every stage down)",
+    )
+    parser.add_argument("--json", help="also write the results to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = []
+    for pages in args.pages:
+        with tempfile.TemporaryDirectory(prefix="ssg-bench-") as root:
+            input_bytes, results = bench_site(root, pages, args)
+        print_report(pages, input_bytes, results)
+        report.append({"pages": pages, "input_bytes": input_bytes, "stages": results})
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    print(f"\nprocess peak RSS: {format_bytes(max_rss)}")
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({"max_rss_bytes": max_rss, "runs": report}, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import sys
+import tracemalloc
+
+from htmlnode import LeafNode, ParentNode
+from textnode import TextNode, TextType
+
+
+class DictLeafNode(LeafNode):
+    pass
+
+
+class DictParentNode(ParentNode):
+    pass
+
+
+class DictTextNode(TextNode):
+    pass
+
+
+def measure(factory, count):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    nodes = [factory(i) for i in range(count)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    total = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    list_overhead = sys.getsizeof(nodes)
+    return (total - list_overhead) / count
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    text = "shared text"
+    children = [LeafNode(None, text)]
+    cases = [
+        (
+            "LeafNode",
+            lambda i: DictLeafNode("b", text),
+            lambda i: LeafNode("b", text),
+        ),
+        (
+            "ParentNode",
+            lambda i: DictParentNode("p", children),
+            lambda i: ParentNode("p", children),
+        ),
+        (
+            "TextNode",
+            lambda i: DictTextNode(text, TextType.BOLD),
+            lambda i: TextNode(text, TextType.BOLD),
+        ),
+    ]
+
+    print(f"bytes per node over {count} nodes (tag/text strings shared)")
+    print(f"{'node':<12}{'__dict__':>10}{'__slots__':>11}{'saved':>8}")
+    for name, dict_factory, slot_factory in cases:
+        with_dict = measure(dict_factory, count)
+        with_slots = measure(slot_factory, count)
+        saved = 100 * (1 - with_slots / with_dict)
+        print(f"{name:<12}{with_dict:>10.1f}{with_slots:>11.1f}{saved:>7.0f}%")
+
+
+if __name__ == "__main__":
+    main()
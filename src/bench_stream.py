@@ -0,0 +1,117 @@
+import argparse
+import multiprocessing
+import os
+import random
+import resource
+import tempfile
+import time
+
+from blocks import markdown_to_html_node
+from corpus import DEFAULT_MIX, TEMPLATE, generate_block, inline_text
+from sync import write_if_changed
+from template import load_template
+from utils import read_if_valid, serialize, split_page, stream_page
+
+
+def write_huge_markdown(path, size, seed=0):
+    rng = random.Random(seed)
+    kinds = list(DEFAULT_MIX)
+    weights = [DEFAULT_MIX[kind] for kind in kinds]
+    written = 0
+    with open(path, "w") as file:
+        written += file.write(f"# {inline_text(rng, 6, 0)}\n\n")
+        while written < size:
+            block = generate_block(rng, rng.choices(kinds, weights)[0], 0.2)
+            written += file.write(block + "\n\n")
+    return os.path.getsize(path)
+
+
+def build_in_memory(src_path, template_path, dest_path):
+    title, body = split_page(read_if_valid(src_path))
+    template = load_template(template_path, "/blog/")
+    content = markdown_to_html_node(body, "/blog/")
+    write_if_changed(dest_path, serialize(template, Title=title, Content=content))
+
+
+def build_streaming(src_path, template_path, dest_path):
+    stream_page(src_path, template_path, [(dest_path, "/blog/")])
+
+
+MODES = {"stream": build_streaming, "memory": build_in_memory}
+
+
+def run_mode(mode, src_path, template_path, dest_path, results):
+    start = time.perf_counter()
+    MODES[mode](src_path, template_path, dest_path)
+    elapsed = time.perf_counter() - start
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    results.put((elapsed, max_rss, os.path.getsize(dest_path)))
+
+
+def measure(mode, src_path, template_path, dest_path):
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    process = context.Process(
+        target=run_mode, args=(mode, src_path, template_path, dest_path, results)
+    )
+    process.start()
+    result = results.get()
+    process.join()
+    if os.path.exists(dest_path):
+        os.remove(dest_path)
+    return result
+
+
+def format_bytes(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.1f}{unit}"
+        size /= 1024
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare peak memory of streaming and in-memory page builds"
+    )
+    parser.add_argument(
+        "--size", type=int, nargs="+", default=[500], help="input sizes in MB"
+    )
+    parser.add_argument(
+        "--modes",
+        nargs="+",
+        choices=MODES,
+        default=["stream"],
+        help="add 'memory' to compare with the in-memory build, which needs "
+        "roughly 20 times the input size in RAM",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    print(
+        f"{'input':>10}{'mode':>8}{'seconds':>10}{'MB/s':>8}"
+        f"{'output':>10}{'peak RSS':>10}"
+    )
+    with tempfile.TemporaryDirectory(prefix="ssg-stream-") as root:
+        template_path = os.path.join(root, "template.html")
+        with open(template_path, "w") as file:
+            file.write(TEMPLATE)
+        for size in args.size:
+            src_path = os.path.join(root, "huge.md")
+            input_bytes = write_huge_markdown(src_path, size * 1024 * 1024, args.seed)
+            dest_path = os.path.join(root, "docs", "huge.html")
+            for mode in args.modes:
+                elapsed, max_rss, output_bytes = measure(
+                    mode, src_path, template_path, dest_path
+                )
+                print(
+                    f"{format_bytes(input_bytes):>10}{mode:>8}{elapsed:>10.2f}"
+                    f"{input_bytes / 1e6 / elapsed:>8.1f}"
+                    f"{format_bytes(output_bytes):>10}{format_bytes(max_rss):>10}"
+                )
+
+
+if __name__ == "__main__":
+    main()
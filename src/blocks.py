@@ -1,8 +1,9 @@
+import io
 import re
 from enum import Enum
 
 from htmlnode import ParentNode
-from markdown import text_to_textnodes
+from markdown import has_inline_markup, scan_inline, text_to_textnodes
 from textnode import text_node_to_html_node, TextType, TextNode
 
 
@@ -15,18 +16,99 @@ class BlockType(Enum):
     ORDERED_LIST = "ordered_list"
 
 
+HEADING_TAGS = {level: f"h{level}" for level in range(1, 7)}
+
+
+HEADING_PATTERN = re.compile(r"^#{1,6} [^\s]")
+
+
+class BlockBuilder:
+    def __init__(self, first_line):
+        self.lines = [first_line]
+        self.heading = HEADING_PATTERN.match(first_line) is not None
+        self.quote = True
+        self.unordered = True
+        self.ordered = True
+        self.classify(first_line)
+
+    def add(self, line):
+        self.lines.append(line)
+        self.classify(line)
+
+    def classify(self, line):
+        if self.quote and not line.startswith(">"):
+            self.quote = False
+        if self.unordered and not line.startswith("- "):
+            self.unordered = False
+        if self.ordered and not line.startswith(f"{len(self.lines)}. "):
+            self.ordered = False
+
+    def finish(self):
+        block = "\n".join(self.lines).rstrip()
+        if self.heading:
+            return block, BlockType.HEADING
+        if block.startswith("```") and block.endswith("```"):
+            return block, BlockType.CODE
+        if self.quote:
+            return block, BlockType.QUOTE
+        if self.unordered:
+            return block, BlockType.UNORDERED_LIST
+        if self.ordered:
+            return block, BlockType.ORDERED_LIST
+        return block, BlockType.PARAGRAPH
+
+
+def iter_blocks(source):
+    if isinstance(source, str):
+        source = io.StringIO(source)
+
+    builder = None
+    fence = None
+    for line in source:
+        line = line.rstrip("\r\n")
+        if fence is not None:
+            fence.append(line)
+            if line.rstrip().endswith("```"):
+                yield "\n".join(fence).rstrip(), BlockType.CODE
+                fence = None
+            continue
+
+        if not line.strip():
+            if builder is not None:
+                yield builder.finish()
+                builder = None
+            continue
+
+        if builder is not None:
+            builder.add(line)
+            continue
+
+        line = line.lstrip()
+        if line.startswith("```"):
+            if len(line.rstrip()) >= 6 and line.rstrip().endswith("```"):
+                yield line.rstrip(), BlockType.CODE
+            else:
+                fence = [line]
+            continue
+        builder = BlockBuilder(line)
+
+    if fence is not None:
+        yield "\n".join(fence).rstrip() + "\n```", BlockType.CODE
+    if builder is not None:
+        yield builder.finish()
+
+
 def markdown_to_blocks(md):
     if not md:
         return []
-    blocks = md.strip().split("\n\n")
-    return [block.strip() for block in blocks if block.strip()]
+    return [block for block, _ in iter_blocks(md)]
 
 
 def block_to_block_type(block):
     if not block:
         return
 
-    if re.match(r"^#{1,6} [^\s]", block):
+    if HEADING_PATTERN.match(block):
         return BlockType.HEADING
     elif block.startswith("```") and block.endswith("```"):
         return BlockType.CODE
@@ -45,46 +127,84 @@ def block_to_block_type(block):
 def extract_title(markdown):
     if not markdown:
         raise ValueError("empty markdown")
-    blocks = [block.strip() for block in markdown.strip().splitlines() if block.strip()]
-    for block in blocks:
-        if block.startswith("# "):
-            return block[2:]
+    return first_heading(markdown.strip().splitlines())
+
+
+def first_heading(lines):
+    for line in lines:
+        line = line.strip()
+        if line.startswith("# "):
+            return line[2:]
     raise Exception("no heading title")
 
 
-def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
-    return ParentNode("div", [block_to_html_node(block) for block in blocks], None)
+def markdown_to_html_node(markdown, basepath="/"):
+    children = [
+        block_to_html_node(block, block_type, basepath)
+        for block, block_type in iter_blocks(markdown or "")
+    ]
+    return ParentNode("div", children, None)
+
+
+class MarkdownStream:
+    def __init__(self, lines, basepath="/"):
+        self.lines = lines
+        self.basepath = basepath
 
+    def write_html(self, write):
+        blocks = iter_blocks(self.lines)
+        first = next(blocks, None)
+        if first is None:
+            raise ValueError("empty children list")
+        write("<div>")
+        block_to_html_node(*first, self.basepath).write_html(write)
+        for block, block_type in blocks:
+            block_to_html_node(block, block_type, self.basepath).write_html(write)
+        write("</div>")
 
-def text_to_children(text):
+
+def text_to_children(text, basepath="/"):
     if not text:
         return []
 
     textnodes = text_to_textnodes(text)
-    return [text_node_to_html_node(node) for node in textnodes]
+    return [textnode_to_child(node, basepath) for node in textnodes]
+
+
+def textnode_to_child(node, basepath="/"):
+    html_node = text_node_to_html_node(node, basepath)
+    if node.text_type in (TextType.BOLD, TextType.ITALIC) and has_inline_markup(
+        node.text
+    ):
+        nested = [
+            textnode_to_child(n, basepath)
+            for n in scan_inline(node.text, strict=False)
+        ]
+        return ParentNode(html_node.tag, nested)
+    return html_node
 
 
-def block_to_html_node(block):
-    block_type = block_to_block_type(block)
+def block_to_html_node(block, block_type=None, basepath="/"):
+    if block_type is None:
+        block_type = block_to_block_type(block)
     match block_type:
         case BlockType.HEADING:
-            return heading_to_html_node(block)
+            return heading_to_html_node(block, basepath)
         case BlockType.CODE:
             return code_to_html_node(block)
         case BlockType.QUOTE:
-            return quote_to_html_node(block)
+            return quote_to_html_node(block, basepath)
         case BlockType.UNORDERED_LIST:
-            return unordered_list_to_html_node(block)
+            return unordered_list_to_html_node(block, basepath)
         case BlockType.ORDERED_LIST:
-            return ordered_list_to_html_node(block)
+            return ordered_list_to_html_node(block, basepath)
         case BlockType.PARAGRAPH:
-            return paragraph_to_html_node(block)
+            return paragraph_to_html_node(block, basepath)
         case _:
             raise ValueError("invalid block type")
 
 
-def heading_to_html_node(block):
+def heading_to_html_node(block, basepath="/"):
     level = 0
     for char in block:
         if char == "#":
@@ -95,7 +215,9 @@ def heading_to_html_node(block):
         if level + 1 >= len(block):
             raise ValueError(f"invalid heading level: {level}")
     text = block[level + 1 :]
-    return ParentNode(f"h{level}", text_to_children(text))
+    return ParentNode(
+        HEADING_TAGS.get(level) or f"h{level}", text_to_children(text, basepath)
+    )
 
 
 def code_to_html_node(block):
@@ -107,28 +229,28 @@ def code_to_html_node(block):
     return ParentNode("pre", [code])
 
 
-def quote_to_html_node(block):
+def quote_to_html_node(block, basepath="/"):
     lines = block.split("\n")
     if not all(line.startswith(">") for line in lines):
         raise ValueError("invalid quote block")
 
     content = " ".join([line.lstrip(">").strip() for line in lines])
-    return ParentNode("blockquote", text_to_children(content))
+    return ParentNode("blockquote", text_to_children(content, basepath))
 
 
-def unordered_list_to_html_node(block):
+def unordered_list_to_html_node(block, basepath="/"):
     return ParentNode(
         "ul",
-        [ParentNode("li", text_to_children(item[2:])) for item in block.split("\n")],
+        [ParentNode("li", text_to_children(item[2:], basepath)) for item in block.split("\n")],
     )
 
 
-def ordered_list_to_html_node(block):
+def ordered_list_to_html_node(block, basepath="/"):
     return ParentNode(
         "ol",
-        [ParentNode("li", text_to_children(item[3:])) for item in block.split("\n")],
+        [ParentNode("li", text_to_children(item[3:], basepath)) for item in block.split("\n")],
     )
 
 
-def paragraph_to_html_node(block):
-    return ParentNode("p", text_to_children(" ".join(block.split("\n"))))
+def paragraph_to_html_node(block, basepath="/"):
+    return ParentNode("p", text_to_children(" ".join(block.split("\n")), basepath))
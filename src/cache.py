@@ -0,0 +1,202 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from blocks import block_to_html_node, iter_blocks, markdown_to_html_node
+from manifest import GENERATOR_VERSION, hash_text
+from textnode import URL_MARK
+
+CACHE_DIR = ".cache/fragments"
+BLOCK_CACHE_PATH = ".cache/blocks.sqlite"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_MAX_BLOCKS = 1_000_000
+MEMORY_BLOCKS = 10_000
+
+_block_caches = {}
+
+
+class FragmentCache:
+    def __init__(self, directory=CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, blocks=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.blocks = blocks
+
+    def key(self, markdown):
+        return hash_text(f"{GENERATOR_VERSION}\0{markdown}")
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.html")
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                fragment = file.read()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return fragment
+
+    def put(self, key, fragment):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            file.write(fragment)
+        os.replace(tmp_path, path)
+
+    def entries(self):
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for bucket in os.scandir(self.directory):
+            if not bucket.is_dir():
+                continue
+            for entry in os.scandir(bucket.path):
+                if entry.name.endswith(".html"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        return entries
+
+    def render(self, markdown):
+        key = self.key(markdown)
+        content = self.get(key)
+        if content is not None:
+            return content
+        if self.blocks is None:
+            content = markdown_to_html_node(markdown, URL_MARK).to_html()
+        else:
+            content = self.blocks.render_markdown(markdown)
+        self.put(key, content)
+        return content
+
+    def evict(self):
+        if self.blocks is not None:
+            self.blocks.evict()
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return 0
+
+        target = self.max_bytes * 9 // 10
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+
+def get_block_cache(path=BLOCK_CACHE_PATH, max_entries=DEFAULT_MAX_BLOCKS):
+    block_cache = _block_caches.get(path)
+    if block_cache is None:
+        block_cache = BlockCache(path, max_entries)
+        _block_caches[path] = block_cache
+    block_cache.max_entries = max_entries
+    return block_cache
+
+
+class BlockCache:
+    def __init__(self, path=BLOCK_CACHE_PATH, max_entries=DEFAULT_MAX_BLOCKS):
+        self.path = path
+        self.max_entries = max_entries
+        self.memory = OrderedDict()
+        self.pending = {}
+        self.touched = set()
+        self.connection = None
+        self.lock = threading.RLock()
+
+    def __reduce__(self):
+        return get_block_cache, (self.path, self.max_entries)
+
+    def db(self):
+        if self.connection is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self.connection = sqlite3.connect(
+                self.path, timeout=30, check_same_thread=False
+            )
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS blocks "
+                "(key TEXT PRIMARY KEY, html TEXT NOT NULL, used INTEGER NOT NULL)"
+            )
+        return self.connection
+
+    def key(self, block, block_type):
+        text = f"{GENERATOR_VERSION}\0{block_type.value}\0{block}"
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+    def render(self, block, block_type):
+        key = self.key(block, block_type)
+        html = self.memory.get(key)
+        if html is not None:
+            self.memory.move_to_end(key)
+            return html
+
+        row = self.db().execute("SELECT html FROM blocks WHERE key = ?", (key,))
+        row = row.fetchone()
+        if row is not None:
+            html = row[0]
+            self.touched.add(key)
+        else:
+            html = block_to_html_node(block, block_type, URL_MARK).to_html()
+            self.pending[key] = html
+
+        self.memory[key] = html
+        if len(self.memory) > MEMORY_BLOCKS:
+            self.memory.popitem(last=False)
+        return html
+
+    def render_markdown(self, markdown):
+        parts = ["<div>"]
+        with self.lock:
+            for block, block_type in iter_blocks(markdown):
+                parts.append(self.render(block, block_type))
+            if len(parts) == 1:
+                raise ValueError("empty children list")
+            parts.append("</div>")
+            self.flush()
+        return "".join(parts)
+
+    def flush(self):
+        if not self.pending and not self.touched:
+            return
+        now = time.time_ns()
+        with self.db() as db:
+            db.executemany(
+                "INSERT OR REPLACE INTO blocks (key, html, used) VALUES (?, ?, ?)",
+                [(key, html, now) for key, html in self.pending.items()],
+            )
+            db.executemany(
+                "UPDATE blocks SET used = ? WHERE key = ?",
+                [(now, key) for key in self.touched],
+            )
+        self.pending.clear()
+        self.touched.clear()
+
+    def evict(self):
+        with self.lock:
+            self.flush()
+            with self.db() as db:
+                removed = db.execute(
+                    "DELETE FROM blocks WHERE key NOT IN "
+                    "(SELECT key FROM blocks ORDER BY used DESC LIMIT ?)",
+                    (self.max_entries,),
+                ).rowcount
+        return removed
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
@@ -0,0 +1,60 @@
+import json
+import os
+
+CHANGES_PATH = ".cache/changes.json"
+
+
+class ChangeSet:
+    def __init__(self):
+        self.added = set()
+        self.changed = set()
+        self.removed = set()
+
+    def record_write(self, path, existed):
+        path = os.path.normpath(path)
+        if path in self.removed:
+            self.removed.discard(path)
+            self.changed.add(path)
+        elif existed and path not in self.added:
+            self.changed.add(path)
+        else:
+            self.added.add(path)
+
+    def record_removal(self, path):
+        path = os.path.normpath(path)
+        if path in self.added:
+            self.added.discard(path)
+            return
+        self.changed.discard(path)
+        self.removed.add(path)
+
+    def update(self, other):
+        for path in other.removed:
+            self.record_removal(path)
+        for path in other.added:
+            self.record_write(path, False)
+        for path in other.changed:
+            self.record_write(path, True)
+
+    def __len__(self):
+        return len(self.added) + len(self.changed) + len(self.removed)
+
+    def to_dict(self):
+        return {
+            "added": sorted(self.added),
+            "changed": sorted(self.changed),
+            "removed": sorted(self.removed),
+        }
+
+    def save(self, path=CHANGES_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(self.to_dict(), file, indent=2)
+        os.replace(tmp_path, path)
+
+    def summary(self):
+        return (
+            f"{len(self.added)} added, {len(self.changed)} changed, "
+            f"{len(self.removed)} removed"
+        )
@@ -0,0 +1,127 @@
+import gzip
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from manifest import hash_bytes
+from sync import write_if_changed
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESS_EXTENSIONS = (".html", ".css", ".js", ".svg", ".xml")
+SIDECAR_SUFFIXES = (".gz", ".br")
+DEFAULT_MIN_SIZE = 1024
+
+
+def available_formats():
+    return [".gz", ".br"] if brotli is not None else [".gz"]
+
+
+def compress_data(data, suffix):
+    if suffix == ".gz":
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    if suffix == ".br":
+        return brotli.compress(data, quality=11)
+    raise ValueError(f"unknown compression format: {suffix}")
+
+
+def compress_outputs(
+    directory, previous=None, min_size=DEFAULT_MIN_SIZE, threads=None, changes=None
+):
+    previous = previous or {}
+    formats = available_formats()
+    sources = []
+    found = []
+    for dirpath, _, filenames in os.walk(directory):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            if name.endswith(SIDECAR_SUFFIXES):
+                found.append(path)
+            elif name.endswith(COMPRESS_EXTENSIONS):
+                sources.append(path)
+    outputs = set(sources)
+    sidecars = {path for path in found if is_own_sidecar(path, previous, outputs)}
+
+    def compress(path):
+        return compress_file(path, previous.get(path), formats, min_size, changes)
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(compress, sorted(sources)))
+
+    record = {}
+    compressed = reused = 0
+    for path, (entry, was_reused) in zip(sorted(sources), results):
+        if entry is None:
+            continue
+        record[path] = entry
+        sidecars.difference_update(path + suffix for suffix in entry["sidecars"])
+        if was_reused:
+            reused += 1
+        else:
+            compressed += 1
+    for path in sorted(sidecars):
+        os.remove(path)
+        if changes is not None:
+            changes.record_removal(path)
+    print(
+        f"compress {directory} ({', '.join(formats)}): {compressed} compressed, "
+        f"{reused} reused, {len(sidecars)} stale sidecars removed"
+    )
+    return record
+
+
+def is_own_sidecar(path, previous, sources):
+    base, suffix = os.path.splitext(path)
+    entry = previous.get(base)
+    return base in sources or (entry is not None and suffix in entry["sidecars"])
+
+
+def remove_compressed(previous, changes=None):
+    removed = 0
+    for path, entry in sorted(previous.items()):
+        for suffix in entry["sidecars"]:
+            sidecar = path + suffix
+            if not os.path.isfile(sidecar):
+                continue
+            os.remove(sidecar)
+            if changes is not None:
+                changes.record_removal(sidecar)
+            removed += 1
+    print(f"compress: disabled, {removed} sidecars removed")
+    return removed
+
+
+def compress_file(path, entry, formats, min_size, changes=None):
+    stat = os.stat(path)
+    if stat.st_size < min_size:
+        return None, False
+    stamp = f"{stat.st_mtime_ns}:{stat.st_size}"
+    reusable = (
+        entry is not None
+        and entry["formats"] == formats
+        and all(os.path.isfile(path + suffix) for suffix in entry["sidecars"])
+    )
+    if reusable and entry["stamp"] == stamp:
+        return entry, True
+
+    with open(path, "rb") as file:
+        data = file.read()
+    output_hash = hash_bytes(data)
+    if reusable and entry["hash"] == output_hash:
+        return dict(entry, stamp=stamp), True
+
+    sidecars = []
+    for suffix in formats:
+        compressed = compress_data(data, suffix)
+        if len(compressed) < len(data):
+            write_if_changed(path + suffix, compressed, changes)
+            sidecars.append(suffix)
+    entry = {
+        "stamp": stamp,
+        "hash": output_hash,
+        "formats": formats,
+        "sidecars": sidecars,
+    }
+    return entry, False
@@ -0,0 +1,138 @@
+import os
+import random
+
+WORDS = (
+    "the ring of power was forged in secret by the dark lord in the fires of "
+    "mount doom elves dwarves and men each received rings but one ring to rule "
+    "them all was made to bind them hobbits rarely leave the shire yet frodo "
+    "carried the burden across middle earth with loyal samwise at his side"
+).split()
+
+DEFAULT_MIX = {
+    "paragraph": 6,
+    "heading": 2,
+    "list": 2,
+    "ordered": 1,
+    "code": 1,
+    "quote": 1,
+}
+
+TEMPLATE = """<!doctype html>
+<html>
+  <head>
+    <meta charset="utf-8" />
+    <title>{{ Title }}</title>
+    <link href="/index.css" rel="stylesheet" />
+  </head>
+  <body>
+    <article>{{ Content }}</article>
+  </body>
+</html>
+"""
+
+
+def parse_mix(text):
+    mix = {}
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        if name not in DEFAULT_MIX:
+            raise ValueError(f"unknown block kind: {name}")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+def inline_text(rng, words, density, images=0):
+    parts = []
+    for _ in range(words):
+        word = rng.choice(WORDS)
+        roll = rng.random()
+        if roll >= density:
+            parts.append(word)
+            continue
+        kind = rng.randrange(5)
+        if kind == 0:
+            parts.append(f"**{word}**")
+        elif kind == 1:
+            parts.append(f"_{word}_")
+        elif kind == 2:
+            parts.append(f"`{word}`")
+        elif kind == 3:
+            parts.append(f"[{word}](/blog/{word})")
+        else:
+            parts.append(f"**{word} _{rng.choice(WORDS)}_**")
+    for i in range(images):
+        position = rng.randrange(len(parts) + 1)
+        parts.insert(position, f"![image {i}](/images/image{i % 8}.png)")
+    return " ".join(parts)
+
+
+def generate_block(rng, kind, density):
+    if kind == "heading":
+        return "#" * rng.randint(2, 4) + " " + inline_text(rng, 5, density)
+    if kind == "list":
+        lines = rng.randint(2, 6)
+        return "\n".join(f"- {inline_text(rng, 8, density)}" for _ in range(lines))
+    if kind == "ordered":
+        lines = rng.randint(2, 6)
+        return "\n".join(
+            f"{i}. {inline_text(rng, 8, density)}" for i in range(1, lines + 1)
+        )
+    if kind == "code":
+        lines = [
+            "    " + " ".join(rng.choices(WORDS, k=6))
+            for _ in range(rng.randint(2, 8))
+        ]
+        return "```\n" + "\n".join(lines) + "\n```"
+    if kind == "quote":
+        lines = rng.randint(1, 4)
+        return "\n".join(f"> {inline_text(rng, 10, density)}" for _ in range(lines))
+    return "\n".join(inline_text(rng, 12, density) for _ in range(rng.randint(1, 5)))
+
+
+def generate_markdown(rng, size=4000, density=0.2, mix=None, images=1):
+    mix = mix or DEFAULT_MIX
+    kinds = list(mix)
+    weights = [mix[kind] for kind in kinds]
+    blocks = [f"# {inline_text(rng, 6, 0)}"]
+    if images:
+        blocks.append(inline_text(rng, 20, density, images))
+    length = sum(len(block) + 2 for block in blocks)
+    while length < size:
+        block = generate_block(rng, rng.choices(kinds, weights)[0], density)
+        blocks.append(block)
+        length += len(block) + 2
+    return "\n\n".join(blocks) + "\n"
+
+
+def generate_corpus(
+    root,
+    pages=10,
+    page_size=4000,
+    density=0.2,
+    mix=None,
+    images=1,
+    static_files=8,
+    static_size=64 * 1024,
+    seed=0,
+):
+    rng = random.Random(seed)
+    content_dir = os.path.join(root, "content")
+    static_dir = os.path.join(root, "static")
+    for i in range(pages):
+        section = f"section{i // 100:04d}"
+        page_dir = os.path.join(content_dir, section, f"page{i:06d}")
+        os.makedirs(page_dir, exist_ok=True)
+        with open(os.path.join(page_dir, "index.md"), "w") as file:
+            file.write(generate_markdown(rng, page_size, density, mix, images))
+
+    os.makedirs(os.path.join(static_dir, "images"), exist_ok=True)
+    with open(os.path.join(static_dir, "index.css"), "w") as file:
+        file.write("body { font-family: serif; }\n")
+    for i in range(static_files):
+        with open(os.path.join(static_dir, "images", f"image{i}.png"), "wb") as file:
+            file.write(rng.randbytes(static_size))
+
+    template_path = os.path.join(root, "template.html")
+    with open(template_path, "w") as file:
+        file.write(TEMPLATE)
+    return content_dir, static_dir, template_path
@@ -0,0 +1,71 @@
+import datetime
+import itertools
+
+FRONT_MATTER_DELIMITER = "---"
+
+
+def split_front_matter(markdown):
+    if not markdown.startswith(FRONT_MATTER_DELIMITER + "\n"):
+        return {}, markdown
+    end = markdown.find(f"\n{FRONT_MATTER_DELIMITER}\n", len(FRONT_MATTER_DELIMITER))
+    if end == -1:
+        if not markdown.endswith(f"\n{FRONT_MATTER_DELIMITER}"):
+            raise ValueError("unclosed front matter")
+        end = len(markdown) - len(FRONT_MATTER_DELIMITER) - 1
+    header = markdown[len(FRONT_MATTER_DELIMITER) + 1 : end]
+    body = markdown[end + len(FRONT_MATTER_DELIMITER) + 2 :]
+    return parse_front_matter(header), body.lstrip("\n")
+
+
+def read_front_matter(lines):
+    lines = iter(lines)
+    first = next(lines, "")
+    if first.rstrip("\n") != FRONT_MATTER_DELIMITER or not first.endswith("\n"):
+        return {}, itertools.chain([first], lines)
+    header = []
+    for line in lines:
+        line = line.rstrip("\n")
+        if line == FRONT_MATTER_DELIMITER:
+            return parse_front_matter("\n".join(header)), lines
+        header.append(line)
+    raise ValueError("unclosed front matter")
+
+
+def parse_front_matter(header):
+    meta = {}
+    for line in header.split("\n"):
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        key, separator, value = line.partition(":")
+        if not separator:
+            raise ValueError(f"invalid front matter line: {line}")
+        meta[key.strip().lower()] = parse_value(value.strip())
+
+    if "date" in meta:
+        meta["date"] = parse_date(meta["date"])
+    if "tags" in meta:
+        tags = meta["tags"]
+        if isinstance(tags, str):
+            tags = tags.split(",")
+        meta["tags"] = [str(tag).strip() for tag in tags if str(tag).strip()]
+    return meta
+
+
+def parse_value(value):
+    if value.startswith("[") and value.endswith("]"):
+        items = value[1:-1].split(",")
+        return [parse_value(item.strip()) for item in items if item.strip()]
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    if value.lower() in ("true", "yes"):
+        return True
+    if value.lower() in ("false", "no"):
+        return False
+    return value
+
+
+def parse_date(value):
+    try:
+        return datetime.date.fromisoformat(str(value)[:10]).isoformat()
+    except ValueError:
+        raise ValueError(f"invalid front matter date: {value}") from None
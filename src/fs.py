@@ -0,0 +1,106 @@
+import os
+import posixpath
+import zipfile
+
+from walk import DEFAULT_IGNORE, IGNORE_FILE, IgnoreRules, walk_files
+
+
+class DirectoryFS:
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, rel_path):
+        return os.path.join(self.root, *rel_path.split("/"))
+
+    def isfile(self, rel_path):
+        return os.path.isfile(self.path(rel_path))
+
+    def read_bytes(self, rel_path):
+        with open(self.path(rel_path), "rb") as file:
+            return file.read()
+
+    def read_text(self, rel_path):
+        return self.read_bytes(rel_path).decode("utf-8")
+
+    def walk(self, rules=None):
+        for _, rel_path in walk_files(self.root, rules or ignore_rules(self)):
+            yield rel_path.replace(os.sep, "/")
+
+
+class MemoryFS:
+    def __init__(self, files=None):
+        self.files = {}
+        for rel_path, data in (files or {}).items():
+            self.write(rel_path, data)
+
+    def write(self, rel_path, data):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self.files[posixpath.normpath(rel_path)] = data
+
+    def isfile(self, rel_path):
+        return posixpath.normpath(rel_path) in self.files
+
+    def read_bytes(self, rel_path):
+        try:
+            return self.files[posixpath.normpath(rel_path)]
+        except KeyError:
+            raise FileNotFoundError(rel_path) from None
+
+    def read_text(self, rel_path):
+        return self.read_bytes(rel_path).decode("utf-8")
+
+    def walk(self, rules=None):
+        return walk_paths(self.files, rules or ignore_rules(self))
+
+
+class ZipFS:
+    def __init__(self, file, root=""):
+        self.archive = zipfile.ZipFile(file)
+        self.root = root.strip("/")
+        prefix = f"{self.root}/" if self.root else ""
+        self.names = {
+            name[len(prefix) :]: name
+            for name in self.archive.namelist()
+            if name.startswith(prefix) and not name.endswith("/")
+        }
+
+    def isfile(self, rel_path):
+        return posixpath.normpath(rel_path) in self.names
+
+    def read_bytes(self, rel_path):
+        try:
+            name = self.names[posixpath.normpath(rel_path)]
+        except KeyError:
+            raise FileNotFoundError(rel_path) from None
+        return self.archive.read(name)
+
+    def read_text(self, rel_path):
+        return self.read_bytes(rel_path).decode("utf-8")
+
+    def walk(self, rules=None):
+        return walk_paths(self.names, rules or ignore_rules(self))
+
+    def close(self):
+        self.archive.close()
+
+
+def ignore_rules(fs, extra=(), defaults=DEFAULT_IGNORE):
+    rules = IgnoreRules(defaults)
+    if fs.isfile(IGNORE_FILE):
+        for line in fs.read_text(IGNORE_FILE).splitlines():
+            rules.add(line)
+    for pattern in extra:
+        rules.add(pattern)
+    return rules
+
+
+def walk_paths(rel_paths, rules):
+    for rel_path in sorted(rel_paths, key=_walk_order):
+        if not rules.excludes(rel_path):
+            yield rel_path
+
+
+def _walk_order(rel_path):
+    parts = rel_path.split("/")
+    return [(1, part) for part in parts[:-1]] + [(0, parts[-1])]
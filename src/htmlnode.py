@@ -1,4 +1,6 @@
 class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
@@ -6,6 +8,11 @@ class HTMLNode:
         self.props = props
 
     def to_html(self):
+        parts = []
+        self.write_html(parts.append)
+        return "".join(parts)
+
+    def write_html(self, write):
         raise NotImplementedError
 
     def props_to_html(self):
@@ -23,11 +30,10 @@ class HTMLNode:
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         super().__init__(tag, value, None, props=props)
-        self.tag = tag
-        self.value = value
-        self.props = props
 
     def to_html(self):
         if self.value is None:
@@ -36,18 +42,20 @@ class LeafNode(HTMLNode):
             return f'{self.value}'
         return f'<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>'
 
+    def write_html(self, write):
+        write(self.to_html())
+
     def __repr__(self):
         return f"LeafNode({self.tag}, {self.value}, {self.props})"
 
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag, None, children, props=props)
-        self.tag = tag
-        self.children = children
-        self.props = props
 
-    def to_html(self):
+    def write_html(self, write):
         if not self.tag:
             raise ValueError("no given tag")
         if self.children is None:
@@ -55,9 +63,7 @@ class ParentNode(HTMLNode):
         if len(self.children) == 0:
             raise ValueError("empty children list")
 
-        final_html = f'<{self.tag}>'
+        write(f'<{self.tag}>')
         for child in self.children:
-            final_html += child.to_html()
-        final_html += f'</{self.tag}>'
-
-        return final_html
+            child.write_html(write)
+        write(f'</{self.tag}>')
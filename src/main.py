@@ -1,11 +1,439 @@
-from utils import clean_copy, generate_pages_recursive
+import argparse
+import glob
 import sys
 
+from assets import fingerprint_assets, remove_fingerprinted
+from cache import (
+    BLOCK_CACHE_PATH,
+    CACHE_DIR,
+    DEFAULT_MAX_BLOCKS,
+    DEFAULT_MAX_BYTES,
+    FragmentCache,
+    get_block_cache,
+)
+from changes import CHANGES_PATH, ChangeSet
+from compress import DEFAULT_MIN_SIZE, compress_outputs, remove_compressed
+from manifest import MANIFEST_PATH, load_manifest, new_manifest, save_manifest
+from metadata import DEFAULT_PER_PAGE, INDEX_PATH, MetadataIndex
+from profiler import NULL_TIMER, Profiler
+from server import serve
+from shard import SHARD_STRATEGIES, merge_manifests, parse_shard, shard_manifest_path
+from sync import SYNC_METHODS, sync_tree
+from utils import clean_copy, generate_pages_recursive
+from walk import IGNORE_FILE, STATIC_IGNORE, load_ignore_rules
+
+
+def parse_target(text):
+    basepath, separator, directory = text.partition("=")
+    if not separator or not basepath.startswith("/") or not directory:
+        raise argparse.ArgumentTypeError(f"expected BASEPATH=DIR, got {text!r}")
+    return directory, basepath
+
+
+def shard_arg(text):
+    try:
+        return parse_shard(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build the static site into docs/")
+    parser.add_argument("basepath", nargs="?", default="/")
+    parser.add_argument(
+        "--target",
+        type=parse_target,
+        action="append",
+        default=[],
+        metavar="BASEPATH=DIR",
+        help="also emit the site for another basepath into DIR, "
+        "reusing each page's parsed content",
+    )
+    parser.add_argument(
+        "--ignore",
+        action="append",
+        default=[],
+        metavar="PATTERN",
+        help=f"skip content and static files matching this {IGNORE_FILE} pattern, "
+        "e.g. 'drafts/' or '*.draft.md'",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="ignore the build manifest and rebuild everything from scratch",
+    )
+    parser.add_argument(
+        "--link",
+        choices=SYNC_METHODS,
+        default="copy",
+        help="how static files are placed in docs/ (hardlink/reflink fall back to copy)",
+    )
+    parser.add_argument(
+        "--checksum",
+        action="store_true",
+        help="compare static files by content hash when their mtimes differ",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="render pages with N worker processes (0 uses every CPU core)",
+    )
+    parser.add_argument(
+        "--shard",
+        type=shard_arg,
+        metavar="I/N",
+        help="build only the I-th of N page shards and write a partial manifest",
+    )
+    parser.add_argument(
+        "--shard-strategy",
+        choices=SHARD_STRATEGIES,
+        default="hash",
+        help="split pages by a stable hash of their path or balance them by size",
+    )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="overlap reading, rendering and writing pages in separate stages",
+    )
+    parser.add_argument(
+        "--io-threads",
+        type=int,
+        default=4,
+        help="threads reading and writing files in --pipeline mode",
+    )
+    parser.add_argument(
+        "--fail-fast",
+        action="store_true",
+        help="abort the build on the first page that fails to generate",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=CACHE_DIR,
+        help="directory of rendered content fragments reused across builds",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_MAX_BYTES // (1024 * 1024),
+        help="evict least recently used fragments beyond this many MB",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="always parse every page"
+    )
+    parser.add_argument(
+        "--block-cache",
+        default=BLOCK_CACHE_PATH,
+        help="database of rendered blocks, so an edited page re-renders only "
+        "the blocks that changed",
+    )
+    parser.add_argument(
+        "--block-cache-entries",
+        type=int,
+        default=DEFAULT_MAX_BLOCKS,
+        help="evict least recently used blocks beyond this many",
+    )
+    parser.add_argument(
+        "--no-block-cache",
+        action="store_true",
+        help="re-render every block of a changed page",
+    )
+    parser.add_argument(
+        "--fingerprint",
+        action="store_true",
+        help="also copy static files under content-hashed names (index.3f2a9c1b.css) "
+        "and point the template and pages at them",
+    )
+    parser.add_argument(
+        "--compress",
+        action="store_true",
+        help="write precompressed .gz (and .br with the brotli module) sidecars "
+        "next to HTML, CSS, JS, SVG and XML outputs",
+    )
+    parser.add_argument(
+        "--compress-min-size",
+        type=int,
+        default=DEFAULT_MIN_SIZE,
+        help="leave outputs smaller than this many bytes uncompressed",
+    )
+    parser.add_argument(
+        "--listings",
+        action="store_true",
+        help="generate paginated post lists and tag pages from page front matter",
+    )
+    parser.add_argument(
+        "--site-url",
+        help="absolute site URL; also writes feed.xml and sitemap.xml "
+        "(implies --listings)",
+    )
+    parser.add_argument(
+        "--per-page",
+        type=int,
+        default=DEFAULT_PER_PAGE,
+        help="posts per generated list page",
+    )
+    parser.add_argument(
+        "--index-path",
+        default=INDEX_PATH,
+        help="database of page front matter, updated only for changed pages",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="record per-page and per-stage timings and write a JSON build report",
+    )
+    parser.add_argument(
+        "--changes-out",
+        default=CHANGES_PATH,
+        help="where to write the added, changed and removed output paths",
+    )
+    parser.add_argument("--profile-out", default=".cache/build-report.json")
+    parser.add_argument(
+        "--top", type=int, default=10, help="number of slowest pages to list"
+    )
+    return parser.parse_args(argv)
+
+
+def parse_serve_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="main.py serve", description="Build docs/ and serve it locally"
+    )
+    parser.add_argument("basepath", nargs="?", default="/")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="rebuild changed pages and assets and live-reload open browsers",
+    )
+    parser.add_argument(
+        "--poll",
+        action="store_true",
+        help="poll for changes instead of using inotify",
+    )
+    parser.add_argument(
+        "--on-demand",
+        action="store_true",
+        help="skip the initial build and render each page from content/ when "
+        "it is first requested, keeping rendered pages in memory",
+    )
+    return parser.parse_args(argv)
+
+
+def parse_merge_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="main.py merge",
+        description="Combine the partial manifests of a sharded build",
+    )
+    parser.add_argument(
+        "manifests",
+        nargs="*",
+        help="partial manifests (default: every shard manifest in .cache/)",
+    )
+    parser.add_argument("--out", default=MANIFEST_PATH)
+    parser.add_argument(
+        "--verify-outputs",
+        action="store_true",
+        help="also check every page output exists in docs/ with the recorded hash",
+    )
+    parser.add_argument(
+        "--compress",
+        action="store_true",
+        help="write precompressed sidecars for the merged outputs, which sharded "
+        "builds skip",
+    )
+    parser.add_argument(
+        "--compress-min-size",
+        type=int,
+        default=DEFAULT_MIN_SIZE,
+        help="leave outputs smaller than this many bytes uncompressed",
+    )
+    parser.add_argument(
+        "--target",
+        type=parse_target,
+        action="append",
+        default=[],
+        metavar="BASEPATH=DIR",
+        help="also compress DIR, as given to the shard builds",
+    )
+    parser.add_argument(
+        "--changes-out",
+        default=".cache/changes-merge.json",
+        help="where to write the sidecars the merge added, changed and removed",
+    )
+    return parser.parse_args(argv)
+
+
+def merge(args):
+    paths = args.manifests
+    if not paths:
+        paths = sorted(glob.glob(shard_manifest_path("*", "*")))
+    if not paths:
+        raise Exception("no shard manifests to merge")
+    manifest = merge_manifests(paths, args.verify_outputs)
+    changes = ChangeSet()
+    previous = load_manifest(args.out).get("compressed")
+    if args.compress:
+        manifest["compressed"] = compress_directories(
+            ["docs/"] + [target[0] for target in args.target],
+            previous or {},
+            args.compress_min_size,
+            changes,
+        )
+    elif previous:
+        remove_compressed(previous, changes)
+    save_manifest(args.out, manifest)
+    changes.save(args.changes_out)
+    print(
+        f"merged {len(paths)} shards, {len(manifest['pages'])} pages, "
+        f"into {args.out}"
+    )
+    print(f"output: {changes.summary()}, listed in {args.changes_out}")
+
+
+def compress_directories(directories, previous, min_size, changes=None):
+    compressed = {}
+    for directory in directories:
+        compressed.update(
+            compress_outputs(directory, previous, min_size, changes=changes)
+        )
+    return compressed
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["serve"]:
+        args = parse_serve_args(argv[1:])
+        serve(
+            "content/",
+            "static/",
+            "template.html",
+            "docs/",
+            args.basepath,
+            host=args.host,
+            port=args.port,
+            watch=args.watch,
+            poll=args.poll,
+            on_demand=args.on_demand,
+        )
+        return
+    if argv[:1] == ["merge"]:
+        merge(parse_merge_args(argv[1:]))
+        return
 
-def main():
-    basepath = sys.argv[1] if len(sys.argv) > 1 else "/"
-    clean_copy("static/", "docs/")
-    generate_pages_recursive("content/", "template.html", "docs/", basepath)
+    args = parse_args(argv)
+    profiler = Profiler() if args.profile else None
+    cache = None
+    if not args.no_cache:
+        blocks = None
+        if not args.no_block_cache:
+            blocks = get_block_cache(args.block_cache, args.block_cache_entries)
+        cache = FragmentCache(
+            args.cache_dir, args.cache_size * 1024 * 1024, blocks=blocks
+        )
+    index = None
+    if args.listings or args.site_url:
+        if args.per_page < 1:
+            raise ValueError("--per-page must be at least 1")
+        index = MetadataIndex(args.index_path)
+    content_rules = load_ignore_rules("content/", args.ignore)
+    static_rules = load_ignore_rules("static/", args.ignore, STATIC_IGNORE)
+    changes = ChangeSet()
+    timer = profiler or NULL_TIMER
+    manifest_path = MANIFEST_PATH
+    if args.shard is not None:
+        manifest_path = shard_manifest_path(*args.shard)
+    with timer.stage("static"):
+        manifest = new_manifest() if args.force else load_manifest(manifest_path)
+        if args.shard is not None and args.shard[0] != 1:
+            manifest["static"] = []
+        elif args.force:
+            for directory in ["docs/"] + [target[0] for target in args.target]:
+                manifest["static"] = clean_copy(
+                    "static/",
+                    directory,
+                    method=args.link,
+                    rules=static_rules,
+                    changes=changes,
+                )
+        else:
+            previous = manifest.get("static", ())
+            for directory in ["docs/"] + [target[0] for target in args.target]:
+                manifest["static"] = sync_tree(
+                    "static/",
+                    directory,
+                    previous,
+                    method=args.link,
+                    checksum=args.checksum,
+                    rules=static_rules,
+                    changes=changes,
+                )
+    assets = None
+    with timer.stage("assets"):
+        if args.fingerprint:
+            directories = ["docs/"] + [target[0] for target in args.target]
+            if args.shard is not None and args.shard[0] != 1:
+                directories = []
+            assets, manifest["assets"] = fingerprint_assets(
+                "static/",
+                directories,
+                manifest.get("assets"),
+                method=args.link,
+                rules=static_rules,
+                changes=changes,
+            )
+        elif "assets" in manifest:
+            remove_fingerprinted(manifest.pop("assets"), changes=changes)
+    try:
+        generate_pages_recursive(
+            "content/",
+            "template.html",
+            "docs/",
+            args.basepath,
+            manifest,
+            jobs=args.jobs,
+            fail_fast=args.fail_fast,
+            profiler=profiler,
+            cache=cache,
+            targets=args.target,
+            pipeline=args.pipeline,
+            io_threads=args.io_threads,
+            rules=content_rules,
+            changes=changes,
+            shard=args.shard,
+            shard_strategy=args.shard_strategy,
+            index=index,
+            site_url=args.site_url,
+            per_page=args.per_page,
+            assets=assets,
+        )
+        if args.compress and args.shard is None:
+            with timer.stage("compress"):
+                manifest["compressed"] = compress_directories(
+                    ["docs/"] + [target[0] for target in args.target],
+                    manifest.get("compressed", {}),
+                    args.compress_min_size,
+                    changes,
+                )
+        elif args.compress:
+            print(
+                "skipping --compress for a single shard; "
+                "run 'main.py merge --compress' after the last shard"
+            )
+        elif "compressed" in manifest:
+            remove_compressed(manifest.pop("compressed"), changes)
+    finally:
+        if index is not None:
+            index.close()
+        with timer.stage("manifest"):
+            save_manifest(manifest_path, manifest)
+            changes.save(args.changes_out)
+        print(f"output: {changes.summary()}, listed in {args.changes_out}")
+        if profiler is not None:
+            profiler.write_report(args.profile_out)
+            profiler.print_summary(args.top)
+            print(f"build report written to {args.profile_out}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,53 @@
+import hashlib
+import json
+import os
+
+GENERATOR_VERSION = "5"
+MANIFEST_PATH = ".cache/manifest.json"
+HASH_CHUNK = 1024 * 1024
+
+
+def hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_text(text):
+    return hash_bytes(text.encode("utf-8"))
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        while chunk := file.read(HASH_CHUNK):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def page_key(md_hash, template_hash, basepath):
+    return hash_text(f"{GENERATOR_VERSION}\0{md_hash}\0{template_hash}\0{basepath}")
+
+
+def new_manifest():
+    return {"version": GENERATOR_VERSION, "pages": {}}
+
+
+def load_manifest(path):
+    if not os.path.isfile(path):
+        return new_manifest()
+    try:
+        with open(path, "r") as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return new_manifest()
+    if not isinstance(manifest, dict) or manifest.get("version") != GENERATOR_VERSION:
+        return new_manifest()
+    manifest.setdefault("pages", {})
+    return manifest
+
+
+def save_manifest(path, manifest):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
@@ -1,113 +1,140 @@
 import re
+from functools import lru_cache
 
 from textnode import TextNode, TextType
 
+IMAGE_PATTERN = r"!\[([^\[\]]*)\]\(([^\(\)]*)\)"
+LINK_PATTERN = r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)"
 
-def split_nodes_delimiter(old_nodes, delimiter, text_type):
-    new_nodes = []
-    if delimiter not in ["**", "_", "`"]:
-        raise ValueError("wrong delimiter")
+DELIMITER_TYPES = {
+    "**": TextType.BOLD,
+    "_": TextType.ITALIC,
+    "`": TextType.CODE,
+}
 
-    delimiter_to_type = {
-        "**": TextType.BOLD,
-        "_": TextType.ITALIC,
-        "`": TextType.CODE,
-    }
+ALL_INLINE = ("image", "link", "**", "_", "`")
 
-    if text_type != delimiter_to_type.get(delimiter):
-        raise ValueError(
-            f"Delimiter '{delimiter}' does not match text type '{text_type.value}'. "
-            f"Expected '{delimiter}' for '{delimiter_to_type[delimiter]}'."
-        )
+_image_re = re.compile(IMAGE_PATTERN)
+_link_re = re.compile(LINK_PATTERN)
 
-    for node in old_nodes:
-        if node.text_type != TextType.TEXT:
-            new_nodes.append(node)
-            continue
 
-        parts = node.text.split(delimiter)
-        if len(parts) % 2 == 0:
-            raise Exception("unmatching delimiter")
+@lru_cache(maxsize=None)
+def _inline_pattern(kinds):
+    alternatives = []
+    if "image" in kinds:
+        alternatives.append(r"(?P<image>!\[(?P<alt>[^\[\]]*)\]\((?P<src>[^\(\)]*)\))")
+    if "link" in kinds:
+        alternatives.append(
+            r"(?P<link>(?<!!)\[(?P<anchor>[^\[\]]*)\]\((?P<href>[^\(\)]*)\))"
+        )
+    delimiters = [re.escape(d) for d in DELIMITER_TYPES if d in kinds]
+    if delimiters:
+        alternatives.append(f"(?P<delimiter>{'|'.join(delimiters)})")
+    return re.compile("|".join(alternatives))
+
 
-        for i, part in enumerate(parts):
-            if not part:
+def scan_inline(text, kinds=ALL_INLINE, strict=True):
+    nodes = []
+    if not text:
+        return nodes
+
+    pattern = _inline_pattern(kinds)
+    position = 0
+    while True:
+        match = pattern.search(text, position)
+        if match is None:
+            break
+        if match.start() > position:
+            nodes.append(TextNode(text[position : match.start()], TextType.TEXT))
+
+        kind = match.lastgroup
+        if kind == "delimiter":
+            delimiter = match.group(kind)
+            end = _find_closer(text, delimiter, match.end(), pattern)
+            if end == -1:
+                if strict:
+                    raise Exception("unmatching delimiter")
+                nodes.append(TextNode(delimiter, TextType.TEXT))
+                position = match.end()
                 continue
-            if i % 2 == 0:
-                new_nodes.extend([TextNode(part, TextType.TEXT)])
-            else:
-                new_nodes.extend([TextNode(part, text_type)])
+            if end > match.end():
+                nodes.append(
+                    TextNode(text[match.end() : end], DELIMITER_TYPES[delimiter])
+                )
+            position = end + len(delimiter)
+            continue
 
-    return new_nodes
+        if kind == "image":
+            nodes.append(TextNode(match["alt"], TextType.IMAGE, match["src"]))
+        else:
+            nodes.append(TextNode(match["anchor"], TextType.LINK, match["href"]))
+        position = match.end()
 
+    if position < len(text):
+        nodes.append(TextNode(text[position:], TextType.TEXT))
+    return nodes
 
-def extract_markdown_images(text):
-    return re.findall(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
 
+def _find_closer(text, delimiter, position, pattern):
+    if delimiter == "`":
+        return text.find(delimiter, position)
+    while True:
+        match = pattern.search(text, position)
+        if match is None:
+            return -1
+        found = match.group(match.lastgroup)
+        if found == delimiter:
+            return match.start()
+        if found == "`":
+            end = text.find(found, match.end())
+            if end != -1:
+                position = end + 1
+                continue
+        position = match.end()
 
-def extract_markdown_links(text):
-    return re.findall(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
 
+def has_inline_markup(text):
+    return _inline_pattern(ALL_INLINE).search(text) is not None
 
-def split_nodes_image(old_nodes):
+
+def _split_text_nodes(old_nodes, kinds):
     new_nodes = []
     for node in old_nodes:
         if node.text_type != TextType.TEXT:
             new_nodes.append(node)
             continue
-        if len(node.text) == 0:
-            continue
+        new_nodes.extend(scan_inline(node.text, kinds))
+    return new_nodes
 
-        parts = re.split(r"(!\[.*?\]\(.*?\))", node.text)
 
-        for i, part in enumerate(parts):
-            if not part:
-                continue
-            if i % 2 == 0:
-                new_nodes.extend([TextNode(part, TextType.TEXT)])
-            else:
-                image_text, image_url = extract_markdown_images(part)[0]
-                new_nodes.extend(
-                    [TextNode(image_text or "", TextType.IMAGE, image_url or "")]
-                )
+def split_nodes_delimiter(old_nodes, delimiter, text_type):
+    if delimiter not in DELIMITER_TYPES:
+        raise ValueError("wrong delimiter")
 
-    return new_nodes
+    if text_type != DELIMITER_TYPES.get(delimiter):
+        raise ValueError(
+            f"Delimiter '{delimiter}' does not match text type '{text_type.value}'. "
+            f"Expected '{delimiter}' for '{DELIMITER_TYPES[delimiter]}'."
+        )
 
+    return _split_text_nodes(old_nodes, (delimiter,))
 
-def split_nodes_link(old_nodes):
-    new_nodes = []
-    for node in old_nodes:
-        if node.text_type != TextType.TEXT:
-            new_nodes.append(node)
-            continue
-        if len(node.text) == 0:
-            continue
 
-        parts = re.split(r"(\[.*?\]\(.*?\))", node.text)
+def extract_markdown_images(text):
+    return _image_re.findall(text)
 
-        for i, part in enumerate(parts):
-            if not part:
-                continue
-            if i % 2 == 0:
-                new_nodes.extend([TextNode(part, TextType.TEXT)])
-            else:
-                link_text, link_url = extract_markdown_links(part)[0]
-                new_nodes.extend(
-                    [TextNode(link_text or "", TextType.LINK, link_url or "")]
-                )
 
-    return new_nodes
+def extract_markdown_links(text):
+    return _link_re.findall(text)
 
 
-def text_to_textnodes(text):
-    if not text:
-        return []
+def split_nodes_image(old_nodes):
+    return _split_text_nodes(old_nodes, ("image",))
+
 
-    nodes = [TextNode(text, TextType.TEXT)]
+def split_nodes_link(old_nodes):
+    return _split_text_nodes(old_nodes, ("link",))
 
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
 
-    return nodes
+def text_to_textnodes(text):
+    return scan_inline(text)
@@ -0,0 +1,298 @@
+import datetime
+import email.utils
+import os
+import re
+import sqlite3
+from xml.sax.saxutils import escape
+
+from blocks import first_heading
+from frontmatter import read_front_matter
+from htmlnode import LeafNode, ParentNode
+from textnode import resolve_url
+
+INDEX_PATH = ".cache/index.sqlite"
+DEFAULT_PER_PAGE = 10
+FEED_SIZE = 20
+POSTS_URL = "/posts/"
+TAGS_URL = "/tags/"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    src TEXT PRIMARY KEY,
+    stamp TEXT NOT NULL,
+    url TEXT NOT NULL,
+    title TEXT NOT NULL,
+    date TEXT,
+    summary TEXT NOT NULL,
+    draft INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tags (
+    src TEXT NOT NULL,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (src, tag)
+);
+CREATE INDEX IF NOT EXISTS tags_by_tag ON tags (tag);
+CREATE INDEX IF NOT EXISTS pages_by_date ON pages (date);
+"""
+
+
+class MetadataIndex:
+    def __init__(self, path=INDEX_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+
+    def update(self, pages, destination_dir):
+        stamps = dict(self.connection.execute("SELECT src, stamp FROM pages"))
+        updated = 0
+        with self.connection as db:
+            for src_path, dest_path in pages:
+                stat = os.stat(src_path)
+                stamp = f"{stat.st_mtime_ns}:{stat.st_size}"
+                if stamps.pop(src_path, None) == stamp:
+                    continue
+                url = page_url(dest_path, destination_dir)
+                self.put(db, src_path, stamp, url, read_metadata(src_path, url))
+                updated += 1
+            for src_path in stamps:
+                db.execute("DELETE FROM pages WHERE src = ?", (src_path,))
+                db.execute("DELETE FROM tags WHERE src = ?", (src_path,))
+        return updated, len(stamps)
+
+    def put(self, db, src_path, stamp, url, meta):
+        db.execute(
+            "INSERT OR REPLACE INTO pages "
+            "(src, stamp, url, title, date, summary, draft) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                src_path,
+                stamp,
+                url,
+                meta["title"],
+                meta.get("date"),
+                meta.get("summary", ""),
+                int(bool(meta.get("draft", False))),
+            ),
+        )
+        db.execute("DELETE FROM tags WHERE src = ?", (src_path,))
+        db.executemany(
+            "INSERT OR IGNORE INTO tags (src, tag) VALUES (?, ?)",
+            [(src_path, tag) for tag in meta.get("tags", ())],
+        )
+
+    def posts(self, tag=None):
+        query = (
+            "SELECT url, title, date, summary FROM pages "
+            "WHERE date IS NOT NULL AND draft = 0"
+        )
+        params = ()
+        if tag is not None:
+            query += " AND src IN (SELECT src FROM tags WHERE tag = ?)"
+            params = (tag,)
+        query += " ORDER BY date DESC, title"
+        return self.connection.execute(query, params).fetchall()
+
+    def tags(self):
+        return self.connection.execute(
+            "SELECT tag, COUNT(*) FROM tags JOIN pages USING (src) "
+            "WHERE date IS NOT NULL AND draft = 0 GROUP BY tag ORDER BY tag"
+        ).fetchall()
+
+    def pages(self):
+        return self.connection.execute(
+            "SELECT url, title, date FROM pages WHERE draft = 0 ORDER BY url"
+        ).fetchall()
+
+    def site_title(self):
+        row = self.connection.execute(
+            "SELECT title FROM pages WHERE url = '/'"
+        ).fetchone()
+        return row[0] if row else None
+
+    def close(self):
+        self.connection.close()
+
+
+def read_metadata(src_path, url):
+    with open(src_path, "r") as file:
+        meta, lines = read_front_matter(file)
+        if "title" not in meta:
+            try:
+                meta["title"] = first_heading(lines)
+            except Exception:
+                meta["title"] = url
+    meta["title"] = str(meta["title"])
+    return meta
+
+
+def page_url(dest_path, destination_dir):
+    rel_path = os.path.relpath(dest_path, destination_dir).replace(os.sep, "/")
+    if rel_path == "index.html":
+        return "/"
+    if rel_path.endswith("/index.html"):
+        return "/" + rel_path[: -len("index.html")]
+    return "/" + rel_path
+
+
+def url_output(url):
+    return url.lstrip("/") + "index.html"
+
+
+def tag_slug(tag):
+    return re.sub(r"[^a-z0-9]+", "-", tag.lower()).strip("-") or "tag"
+
+
+def tag_slugs(tags):
+    natural = {tag_slug(tag) for tag in tags}
+    slugs = {}
+    used = set()
+    for tag in tags:
+        base = tag_slug(tag)
+        slug = base
+        number = 2
+        while slug in used or (slug != base and slug in natural):
+            slug = f"{base}-{number}"
+            number += 1
+        if slug != base:
+            print(f"tag {tag!r} shares the slug {base!r}; listed at {TAGS_URL}{slug}/")
+        used.add(slug)
+        slugs[tag] = slug
+    return slugs
+
+
+def build_listings(
+    index, render, basepath="/", site_url=None, per_page=DEFAULT_PER_PAGE
+):
+    outputs = {}
+    listed = []
+    posts = index.posts()
+    for url, title, node in paginate("Posts", POSTS_URL, posts, basepath, per_page):
+        outputs[url_output(url)] = render(title, node)
+        listed.append(url)
+
+    tags = index.tags()
+    slugs = tag_slugs([tag for tag, _ in tags])
+    items = []
+    for tag, count in tags:
+        href = resolve_url(f"{TAGS_URL}{slugs[tag]}/", basepath)
+        items.append(
+            ParentNode(
+                "li",
+                [LeafNode("a", tag, {"href": href}), LeafNode(None, f" ({count})")],
+            )
+        )
+    tag_list = ParentNode("ul", items) if items else LeafNode("p", "No tags yet.")
+    outputs[url_output(TAGS_URL)] = render(
+        "Tags", ParentNode("div", [LeafNode("h1", "Tags"), tag_list])
+    )
+    listed.append(TAGS_URL)
+    for tag, _ in tags:
+        base_url = f"{TAGS_URL}{slugs[tag]}/"
+        title = f"Posts tagged {tag}"
+        for url, page_title, node in paginate(
+            title, base_url, index.posts(tag), basepath, per_page
+        ):
+            outputs[url_output(url)] = render(page_title, node)
+            listed.append(url)
+
+    if site_url:
+        outputs["feed.xml"] = rss_feed(index, posts[:FEED_SIZE], site_url, basepath)
+        outputs["sitemap.xml"] = sitemap(index, listed, site_url, basepath)
+    return outputs
+
+
+def paginate(title, base_url, posts, basepath, per_page):
+    chunks = [posts[i : i + per_page] for i in range(0, len(posts), per_page)] or [[]]
+    urls = [base_url] + [f"{base_url}page/{n}/" for n in range(2, len(chunks) + 1)]
+    for number, (url, chunk) in enumerate(zip(urls, chunks), start=1):
+        page_title = title if number == 1 else f"{title} (page {number})"
+        children = [LeafNode("h1", page_title), post_list(chunk, basepath)]
+        links = []
+        if number > 1:
+            links.append(("Newer posts", urls[number - 2]))
+        if number < len(urls):
+            links.append(("Older posts", urls[number]))
+        if links:
+            anchors = [
+                LeafNode("a", text, {"href": resolve_url(link, basepath)})
+                for text, link in links
+            ]
+            if len(anchors) == 2:
+                anchors.insert(1, LeafNode(None, " | "))
+            children.append(ParentNode("p", anchors))
+        yield url, page_title, ParentNode("div", children)
+
+
+def post_list(posts, basepath):
+    if not posts:
+        return LeafNode("p", "No posts yet.")
+    items = []
+    for url, title, date, summary in posts:
+        children = [
+            LeafNode("a", title, {"href": resolve_url(url, basepath)}),
+            LeafNode(None, f" ({date})"),
+        ]
+        if summary:
+            children.append(LeafNode(None, f" - {summary}"))
+        items.append(ParentNode("li", children))
+    return ParentNode("ul", items)
+
+
+def absolute_url(site_url, url, basepath):
+    return site_url.rstrip("/") + resolve_url(url, basepath)
+
+
+def rss_date(date):
+    day = datetime.date.fromisoformat(date)
+    moment = datetime.datetime(
+        day.year, day.month, day.day, tzinfo=datetime.timezone.utc
+    )
+    return email.utils.format_datetime(moment)
+
+
+def rss_feed(index, posts, site_url, basepath):
+    home = absolute_url(site_url, "/", basepath)
+    title = index.site_title() or home
+    lines = [
+        '<?xml version="1.0" encoding="utf-8"?>',
+        '<rss version="2.0">',
+        "<channel>",
+        f"<title>{escape(title)}</title>",
+        f"<link>{escape(home)}</link>",
+        f"<description>{escape(title)}</description>",
+    ]
+    for url, post_title, date, summary in posts:
+        link = escape(absolute_url(site_url, url, basepath))
+        lines.extend(
+            [
+                "<item>",
+                f"<title>{escape(post_title)}</title>",
+                f"<link>{link}</link>",
+                f"<guid>{link}</guid>",
+                f"<pubDate>{rss_date(date)}</pubDate>",
+            ]
+        )
+        if summary:
+            lines.append(f"<description>{escape(summary)}</description>")
+        lines.append("</item>")
+    lines.extend(["</channel>", "</rss>", ""])
+    return "\n".join(lines).encode("utf-8")
+
+
+def sitemap(index, listed, site_url, basepath):
+    entries = {url: date for url, _, date in index.pages()}
+    for url in listed:
+        entries.setdefault(url, None)
+    lines = [
+        '<?xml version="1.0" encoding="utf-8"?>',
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">',
+    ]
+    for url, date in sorted(entries.items(), key=lambda entry: entry[0]):
+        lines.append("<url>")
+        lines.append(f"<loc>{escape(absolute_url(site_url, url, basepath))}</loc>")
+        if date:
+            lines.append(f"<lastmod>{date}</lastmod>")
+        lines.append("</url>")
+    lines.extend(["</urlset>", ""])
+    return "\n".join(lines).encode("utf-8")
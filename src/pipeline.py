@@ -0,0 +1,73 @@
+import queue
+import threading
+
+DONE = object()
+
+
+class Stage:
+    def __init__(self, name, func, workers=1):
+        self.name = name
+        self.func = func
+        self.workers = workers
+
+
+def run_pipeline(items, stages, queue_size=16):
+    queues = [queue.Queue(queue_size) for _ in stages]
+    results = queue.Queue(queue_size)
+    outboxes = queues[1:] + [results]
+    stop = threading.Event()
+    threads = []
+
+    def feed():
+        for index, item in enumerate(items):
+            if stop.is_set():
+                break
+            queues[0].put((index, item, None))
+        queues[0].put(DONE)
+
+    def work(stage, inbox, outbox, remaining, lock):
+        while True:
+            entry = inbox.get()
+            if entry is DONE:
+                inbox.put(DONE)
+                break
+            index, item, error = entry
+            if error is None and not stop.is_set():
+                try:
+                    item = stage.func(item)
+                except Exception as e:
+                    error = e
+            outbox.put((index, item, error))
+        with lock:
+            remaining[0] -= 1
+            if remaining[0] == 0:
+                outbox.put(DONE)
+
+    threads.append(threading.Thread(target=feed, daemon=True))
+    for stage, inbox, outbox in zip(stages, queues, outboxes):
+        remaining = [stage.workers]
+        lock = threading.Lock()
+        for _ in range(stage.workers):
+            threads.append(
+                threading.Thread(
+                    target=work,
+                    args=(stage, inbox, outbox, remaining, lock),
+                    name=f"pipeline-{stage.name}",
+                    daemon=True,
+                )
+            )
+    for thread in threads:
+        thread.start()
+
+    try:
+        while True:
+            entry = results.get()
+            if entry is DONE:
+                break
+            yield entry
+    finally:
+        stop.set()
+        while entry is not DONE:
+            entry = results.get()
+        for thread in threads:
+            thread.join()
@@ -0,0 +1,118 @@
+import contextlib
+import json
+import os
+import time
+
+NULL_CONTEXT = contextlib.nullcontext()
+
+
+class StageTimer:
+    def __init__(self, record):
+        self.record = record
+        record.setdefault("stages", {})
+        record.setdefault("bytes_in", 0)
+        record.setdefault("bytes_out", 0)
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - wall, time.process_time() - cpu)
+
+    def add(self, name, wall, cpu):
+        stage = self.record["stages"].setdefault(name, {"wall": 0.0, "cpu": 0.0})
+        stage["wall"] += wall
+        stage["cpu"] += cpu
+
+    def add_bytes(self, size):
+        self.record["bytes_out"] += size
+
+
+class NullTimer:
+    record = None
+
+    def stage(self, name):
+        return NULL_CONTEXT
+
+    def add(self, name, wall, cpu):
+        pass
+
+    def add_bytes(self, size):
+        pass
+
+
+NULL_TIMER = NullTimer()
+
+
+def page_timer(record):
+    if record is None:
+        return NULL_TIMER
+    return StageTimer(record)
+
+
+class Profiler:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.build = StageTimer({})
+        self.pages = []
+
+    def stage(self, name):
+        return self.build.stage(name)
+
+    def add_page(self, record):
+        stages = record.get("stages", {})
+        record["wall"] = sum(stage["wall"] for stage in stages.values())
+        record["cpu"] = sum(stage["cpu"] for stage in stages.values())
+        self.pages.append(record)
+
+    def report(self):
+        totals = {}
+        for record in self.pages:
+            for name, stage in record["stages"].items():
+                total = totals.setdefault(name, {"wall": 0.0, "cpu": 0.0})
+                total["wall"] += stage["wall"]
+                total["cpu"] += stage["cpu"]
+        return {
+            "wall": time.perf_counter() - self.started,
+            "build_stages": self.build.record["stages"],
+            "page_stages": totals,
+            "pages_rendered": len(self.pages),
+            "bytes_in": sum(record["bytes_in"] for record in self.pages),
+            "bytes_out": sum(record["bytes_out"] for record in self.pages),
+            "pages": sorted(self.pages, key=lambda record: record["page"]),
+        }
+
+    def write_report(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as file:
+            json.dump(self.report(), file, indent=2)
+
+    def print_summary(self, top=10):
+        report = self.report()
+        print(
+            f"build took {report['wall'] * 1000:.1f} ms, "
+            f"{report['pages_rendered']} pages rendered, "
+            f"{report['bytes_in']} bytes in, {report['bytes_out']} bytes out"
+        )
+        for title, stages in (
+            ("build stages", report["build_stages"]),
+            ("page stages (summed over pages)", report["page_stages"]),
+        ):
+            print(f"{title}:")
+            for name, stage in stages.items():
+                print(
+                    f"  {name:<12}{stage['wall'] * 1000:>10.1f} ms wall"
+                    f"{stage['cpu'] * 1000:>10.1f} ms cpu"
+                )
+        slowest = sorted(self.pages, key=lambda record: record["wall"], reverse=True)
+        if slowest:
+            print(f"slowest {min(top, len(slowest))} pages:")
+        for record in slowest[:top]:
+            stages = ", ".join(
+                f"{name} {stage['wall'] * 1000:.1f}"
+                for name, stage in record["stages"].items()
+            )
+            print(f"  {record['wall'] * 1000:>8.1f} ms  {record['page']}  ({stages})")
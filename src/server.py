@@ -0,0 +1,502 @@
+import os
+import posixpath
+import queue
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from api import render_markdown
+from cache import FragmentCache, get_block_cache
+from manifest import (
+    MANIFEST_PATH,
+    hash_file,
+    hash_text,
+    load_manifest,
+    page_key,
+    save_manifest,
+)
+from sync import prune_empty_dirs, sync_file, sync_tree
+from template import load_template
+from utils import discover_pages, generate_page, generate_pages_recursive
+from walk import IGNORE_FILE, STATIC_IGNORE, load_ignore_rules
+from watch import create_watcher
+
+LIVE_RELOAD_PATH = "/__livereload"
+MAX_PAGES = 1000
+LIVE_RELOAD_SCRIPT = b"""<script>
+(function () {
+  var url = "/__livereload?path=" + encodeURIComponent(location.pathname);
+  var source = new EventSource(url);
+  source.onmessage = function () { location.reload(); };
+})();
+</script>
+"""
+
+
+def page_path(url_path):
+    path = unquote(url_path)
+    if path.endswith("index.html"):
+        path = path[: -len("index.html")]
+    return "/" + path.strip("/")
+
+
+def output_page_path(output_path, destination_dir):
+    return page_path(os.path.relpath(output_path, destination_dir).replace(os.sep, "/"))
+
+
+def inject_live_reload(html):
+    index = html.rfind(b"</body>")
+    if index == -1:
+        return html + LIVE_RELOAD_SCRIPT
+    return html[:index] + LIVE_RELOAD_SCRIPT + html[index:]
+
+
+class LiveReload:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clients = {}
+        self.next_id = 0
+
+    def connect(self, url_path):
+        with self.lock:
+            self.next_id += 1
+            events = queue.Queue()
+            self.clients[self.next_id] = (page_path(url_path), events)
+            return self.next_id, events
+
+    def disconnect(self, client_id):
+        with self.lock:
+            self.clients.pop(client_id, None)
+
+    def open_pages(self):
+        with self.lock:
+            return {page for page, _ in self.clients.values()}
+
+    def notify(self, page=None):
+        with self.lock:
+            clients = list(self.clients.values())
+        for client_page, events in clients:
+            if page is None or client_page == page:
+                events.put("reload")
+
+
+class DevBuilder:
+    def __init__(
+        self,
+        content_dir,
+        static_dir,
+        template_path,
+        destination_dir,
+        basepath="/",
+        manifest_path=MANIFEST_PATH,
+        live=None,
+    ):
+        self.content_dir = os.path.normpath(content_dir)
+        self.static_dir = os.path.normpath(static_dir)
+        self.template_path = template_path
+        self.destination_dir = destination_dir
+        self.basepath = basepath
+        self.manifest_path = manifest_path
+        self.live = live or LiveReload()
+        self.manifest = load_manifest(manifest_path)
+        self.cache = FragmentCache(blocks=get_block_cache())
+        self.load_rules()
+
+    def load_rules(self):
+        self.content_rules = load_ignore_rules(self.content_dir)
+        self.static_rules = load_ignore_rules(self.static_dir, (), STATIC_IGNORE)
+
+    def template_files(self):
+        return load_template(self.template_path, self.basepath).dependencies
+
+    def template_hash(self):
+        return hash_text("".join(hash_file(path) for path in self.template_files()))
+
+    def build_all(self):
+        self.manifest["static"] = sync_tree(
+            self.static_dir,
+            self.destination_dir,
+            self.manifest.get("static", ()),
+            rules=self.static_rules,
+        )
+        try:
+            generate_pages_recursive(
+                self.content_dir,
+                self.template_path,
+                self.destination_dir,
+                self.basepath,
+                self.manifest,
+                cache=self.cache,
+                rules=self.content_rules,
+            )
+        except Exception as e:
+            print(e)
+        save_manifest(self.manifest_path, self.manifest)
+
+    def output_for(self, src_path, root):
+        rel_path = os.path.relpath(src_path, root)
+        if root == self.content_dir and rel_path.endswith(".md"):
+            rel_path = rel_path[:-3] + ".html"
+        return os.path.join(self.destination_dir, rel_path)
+
+    def handle(self, changed):
+        start = time.perf_counter()
+        template_files = set(os.path.normpath(path) for path in self.template_files())
+        pages = []
+        assets = []
+        rebuild_all = False
+        if any(os.path.basename(path) == IGNORE_FILE for path in changed):
+            self.load_rules()
+            self.build_all()
+            self.live.notify()
+            return (time.perf_counter() - start) * 1000
+        for path in sorted(changed):
+            if self._is_ignored(path):
+                continue
+            if path in template_files:
+                rebuild_all = True
+            elif self._is_under(path, self.content_dir) and path.endswith(".md"):
+                pages.append(path)
+            elif self._is_under(path, self.content_dir):
+                assets.append((path, self.content_dir))
+            elif self._is_under(path, self.static_dir):
+                assets.append((path, self.static_dir))
+            if os.path.isdir(path) or not self._is_known(path):
+                rebuild_all = True
+
+        if rebuild_all:
+            discovered = discover_pages(
+                self.content_dir, self.destination_dir, self.content_rules
+            )[0]
+            sources = [src_path for src_path, _ in discovered]
+            for src_path in self.manifest["pages"]:
+                if src_path not in sources:
+                    sources.append(src_path)
+            pages = sources
+        for src_path, root in assets:
+            self.sync_asset(src_path, root)
+
+        open_pages = self.live.open_pages()
+        pages.sort(
+            key=lambda src: output_page_path(
+                self.output_for(src, self.content_dir), self.destination_dir
+            )
+            not in open_pages
+        )
+        template_hash = self.template_hash()
+        for src_path in pages:
+            self.render(src_path, template_hash)
+        save_manifest(self.manifest_path, self.manifest)
+
+        if assets:
+            self.live.notify()
+        elapsed = (time.perf_counter() - start) * 1000
+        what = f"{len(pages)} pages, {len(assets)} assets"
+        print(f"rebuilt {what} in {elapsed:.1f} ms")
+        return elapsed
+
+    def render(self, src_path, template_hash):
+        dest_path = self.output_for(src_path, self.content_dir)
+        page = output_page_path(dest_path, self.destination_dir)
+        if not os.path.isfile(src_path):
+            self.manifest["pages"].pop(src_path, None)
+            if os.path.isfile(dest_path):
+                os.remove(dest_path)
+                prune_empty_dirs(os.path.dirname(dest_path), self.destination_dir)
+                print(f"removed stale output: {dest_path}")
+            self.live.notify(page)
+            return
+
+        key = page_key(hash_file(src_path), template_hash, self.basepath)
+        entry = self.manifest["pages"].get(src_path)
+        if entry is not None and entry["key"] == key and os.path.isfile(dest_path):
+            return
+        try:
+            output_hash = generate_page(
+                src_path, self.template_path, dest_path, self.basepath, cache=self.cache
+            )
+        except Exception as e:
+            print(f"failed to generate page {src_path}: {e}")
+            return
+        self.manifest["pages"][src_path] = {
+            "key": key,
+            "output": dest_path,
+            "output_hash": output_hash,
+        }
+        self.live.notify(page)
+
+    def sync_asset(self, src_path, root):
+        dest_path = self.output_for(src_path, root)
+        rel_path = os.path.relpath(src_path, root)
+        static = self.manifest.setdefault("static", [])
+        if os.path.isfile(src_path):
+            if sync_file(src_path, dest_path):
+                print(f"copied file: {src_path} -> {dest_path}")
+            if root == self.static_dir and rel_path not in static:
+                static.append(rel_path)
+        elif os.path.isfile(dest_path):
+            os.remove(dest_path)
+            prune_empty_dirs(os.path.dirname(dest_path), self.destination_dir)
+            print(f"removed orphaned file: {dest_path}")
+            if rel_path in static:
+                static.remove(rel_path)
+
+    def _is_known(self, path):
+        if os.path.isfile(path) or path in self.manifest["pages"]:
+            return True
+        static = self.manifest.get("static", ())
+        return os.path.relpath(path, self.static_dir) in static
+
+    def _is_ignored(self, path):
+        for root, rules in (
+            (self.content_dir, self.content_rules),
+            (self.static_dir, self.static_rules),
+        ):
+            if self._is_under(path, root):
+                rel_path = os.path.relpath(path, root).replace(os.sep, "/")
+                return rules.excludes(rel_path, os.path.isdir(path))
+        return False
+
+    def _is_under(self, path, root):
+        return path.startswith(root + os.sep)
+
+
+class PageRenderer:
+    def __init__(
+        self,
+        content_dir,
+        static_dir,
+        template_path,
+        basepath="/",
+        live=None,
+        max_pages=MAX_PAGES,
+    ):
+        self.content_dir = os.path.normpath(content_dir)
+        self.static_dir = os.path.normpath(static_dir)
+        self.template_path = template_path
+        self.basepath = basepath
+        self.live = live or LiveReload()
+        self.max_pages = max_pages
+        self.pages = OrderedDict()
+        self.lock = threading.Lock()
+        self.load_rules()
+
+    def load_rules(self):
+        self.content_rules = load_ignore_rules(self.content_dir)
+        self.static_rules = load_ignore_rules(self.static_dir, (), STATIC_IGNORE)
+
+    def template_files(self):
+        return load_template(self.template_path, self.basepath).dependencies
+
+    def resolve(self, url_path):
+        path = unquote(url_path)
+        prefix = self.basepath.rstrip("/")
+        if prefix:
+            if path != prefix and not path.startswith(prefix + "/"):
+                return None, None
+            path = path[len(prefix) :] or "/"
+        rel_path = posixpath.normpath(path).lstrip("/")
+        if path.endswith("/"):
+            source = posixpath.join(rel_path, "index.md")
+        elif rel_path.endswith(".html"):
+            source = rel_path[:-5] + ".md"
+        else:
+            source = None
+            if self._find(self.content_dir, posixpath.join(rel_path, "index.md")):
+                return "redirect", url_path + "/"
+        if source is not None:
+            src_path = self._find(self.content_dir, source.lstrip("/"))
+            if src_path is not None:
+                return "page", src_path
+        for root in (self.static_dir, self.content_dir):
+            src_path = self._find(root, rel_path)
+            if src_path is not None and not src_path.endswith(".md"):
+                return "file", src_path
+        return None, None
+
+    def render(self, src_path):
+        stat = os.stat(src_path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        template = load_template(self.template_path, self.basepath)
+        with self.lock:
+            cached = self.pages.get(src_path)
+            if cached is not None and cached[0] == stamp and cached[1] is template:
+                self.pages.move_to_end(src_path)
+                return cached[2]
+
+        start = time.perf_counter()
+        with open(src_path, "r") as file:
+            body = render_markdown(file.read(), template, self.basepath)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"rendered {src_path} in {elapsed:.1f} ms")
+        with self.lock:
+            self.pages[src_path] = (stamp, template, body)
+            self.pages.move_to_end(src_path)
+            while len(self.pages) > self.max_pages:
+                self.pages.popitem(last=False)
+        return body
+
+    def handle(self, changed):
+        if any(os.path.basename(path) == IGNORE_FILE for path in changed):
+            self.load_rules()
+        changed_pages = []
+        with self.lock:
+            for path in changed:
+                self.pages.pop(path, None)
+                if self._is_under(path, self.content_dir) and path.endswith(".md"):
+                    changed_pages.append(path)
+        if len(changed_pages) < len(changed):
+            self.live.notify()
+            return
+        for src_path in changed_pages:
+            rel_path = os.path.relpath(src_path, self.content_dir)
+            url_path = self.basepath + rel_path.replace(os.sep, "/")[:-3] + ".html"
+            self.live.notify(page_path(url_path))
+
+    def _find(self, root, rel_path):
+        if rel_path in ("", "."):
+            return None
+        path = os.path.join(root, *rel_path.split("/"))
+        if not os.path.isfile(path):
+            return None
+        rules = self.content_rules if root == self.content_dir else self.static_rules
+        if rules.excludes(rel_path):
+            return None
+        return path
+
+    def _is_under(self, path, root):
+        return path.startswith(root + os.sep)
+
+
+class DevRequestHandler(SimpleHTTPRequestHandler):
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == LIVE_RELOAD_PATH:
+            self.send_events(parse_qs(url.query).get("path", ["/"])[0])
+            return
+        if self.server.renderer is not None:
+            self.send_on_demand(url.path)
+            return
+
+        path = self.translate_path(url.path)
+        if os.path.isdir(path) and url.path.endswith("/"):
+            path = os.path.join(path, "index.html")
+        if self.server.live_reload and path.endswith(".html") and os.path.isfile(path):
+            self.send_html(path)
+            return
+        super().do_GET()
+
+    def send_on_demand(self, url_path):
+        kind, path = self.server.renderer.resolve(url_path)
+        if kind == "redirect":
+            self.send_response(301)
+            self.send_header("Location", path)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        elif kind == "page":
+            try:
+                body = self.server.renderer.render(path)
+            except Exception as e:
+                print(f"failed to generate page {path}: {e}")
+                self.send_error(500, f"failed to generate page {path}: {e}")
+                return
+            self.send_body(body, "text/html; charset=utf-8")
+        elif kind == "file":
+            with open(path, "rb") as file:
+                self.send_body(file.read(), self.guess_type(path))
+        else:
+            self.send_error(404, "File not found")
+
+    def send_html(self, path):
+        with open(path, "rb") as file:
+            self.send_body(file.read(), "text/html; charset=utf-8")
+
+    def send_body(self, body, content_type):
+        if self.server.live_reload and content_type.startswith("text/html"):
+            body = inject_live_reload(body)
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_events(self, url_path):
+        client_id, events = self.server.live.connect(url_path)
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            while True:
+                try:
+                    events.get(timeout=15)
+                    self.wfile.write(b"data: reload\n\n")
+                except queue.Empty:
+                    self.wfile.write(b": ping\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            self.server.live.disconnect(client_id)
+
+
+def serve(
+    content_dir,
+    static_dir,
+    template_path,
+    destination_dir,
+    basepath="/",
+    host="localhost",
+    port=8888,
+    watch=False,
+    poll=False,
+    on_demand=False,
+):
+    live = LiveReload()
+    if on_demand:
+        builder = PageRenderer(
+            content_dir, static_dir, template_path, basepath, live=live
+        )
+    else:
+        builder = DevBuilder(
+            content_dir, static_dir, template_path, destination_dir, basepath, live=live
+        )
+        builder.build_all()
+
+    handler = partial(DevRequestHandler, directory=destination_dir)
+    httpd = ThreadingHTTPServer((host, port), handler)
+    httpd.daemon_threads = True
+    httpd.live = live
+    httpd.live_reload = watch
+    httpd.renderer = builder if on_demand else None
+    if on_demand:
+        url = f"http://{host}:{port}{basepath}"
+        print(f"serving {content_dir} and {static_dir} on demand at {url}")
+    else:
+        print(f"serving {destination_dir} at http://{host}:{port}/")
+
+    try:
+        if not watch:
+            httpd.serve_forever()
+            return
+
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        watcher = create_watcher(
+            [content_dir, static_dir], builder.template_files(), poll=poll
+        )
+        watched = f"{content_dir}, {static_dir} and {template_path}"
+        print(f"watching {watched} ({type(watcher).__name__})")
+        while True:
+            changed = watcher.wait()
+            if changed:
+                builder.handle(changed)
+                watcher.set_files(builder.template_files())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
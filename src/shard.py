@@ -0,0 +1,113 @@
+import hashlib
+import os
+
+from manifest import MANIFEST_PATH, hash_file, hash_text, load_manifest, new_manifest
+
+SHARD_STRATEGIES = ("hash", "size")
+
+
+def parse_shard(text):
+    index, separator, count = text.partition("/")
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        index = count = 0
+    if not separator or count < 1 or not 1 <= index <= count:
+        raise ValueError(f"expected a shard like 2/4, got {text!r}")
+    return index, count
+
+
+def shard_manifest_path(index, count, manifest_path=MANIFEST_PATH):
+    root, ext = os.path.splitext(manifest_path)
+    return f"{root}.shard-{index}-of-{count}{ext}"
+
+
+def assign_shards(paths, count, strategy="hash"):
+    if strategy not in SHARD_STRATEGIES:
+        raise ValueError(f"unknown shard strategy: {strategy}")
+    if strategy == "hash":
+        return {path: _path_bucket(path, count) + 1 for path in paths}
+
+    loads = [(0, index) for index in range(1, count + 1)]
+    assigned = {}
+    sized = sorted(((os.path.getsize(path), path) for path in paths), reverse=True)
+    for size, path in sized:
+        load, index = min(loads)
+        assigned[path] = index
+        loads[index - 1] = (load + size, index)
+    return assigned
+
+
+def sources_hash(paths):
+    return hash_text("\0".join(sorted(paths)))
+
+
+def _path_bucket(path, count):
+    digest = hashlib.sha256(path.replace(os.sep, "/").encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count
+
+
+def merge_manifests(paths, verify_outputs=False):
+    partials = [load_manifest(path) for path in paths]
+    problems = []
+    for path, partial in zip(paths, partials):
+        if "shard" not in partial:
+            problems.append(f"{path} is not a shard manifest")
+    if problems:
+        raise ValueError("; ".join(problems))
+
+    first = partials[0]["shard"]
+    count = first["count"]
+    seen = {}
+    for path, partial in zip(paths, partials):
+        shard = partial["shard"]
+        for field in ("count", "strategy", "sources"):
+            if shard[field] != first[field]:
+                problems.append(f"{path} has a different shard {field}")
+        if shard["index"] in seen:
+            problems.append(f"shard {shard['index']} given twice")
+        seen[shard["index"]] = partial
+    missing = sorted(set(range(1, count + 1)) - set(seen))
+    if missing:
+        problems.append(f"missing shards: {', '.join(map(str, missing))}")
+
+    merged = new_manifest()
+    owners = {}
+    for index, partial in sorted(seen.items()):
+        if index == 1:
+            merged["static"] = partial.get("static", [])
+            merged["generated"] = partial.get("generated", [])
+            if "assets" in partial:
+                merged["assets"] = partial["assets"]
+        merged.setdefault("files", {}).update(partial.get("files", {}))
+        for src_path in partial["shard"]["assigned"]:
+            if src_path in owners:
+                problems.append(
+                    f"{src_path} built by shards {owners[src_path]} and {index}"
+                )
+            owners[src_path] = index
+            entry = partial["pages"].get(src_path)
+            if entry is None:
+                problems.append(f"{src_path} was not generated by shard {index}")
+                continue
+            merged["pages"][src_path] = entry
+            if verify_outputs:
+                problems.extend(_verify_outputs(src_path, entry))
+    if not missing and sources_hash(owners) != first["sources"]:
+        problems.append("shards do not cover every page")
+
+    if problems:
+        raise ValueError("; ".join(problems))
+    return merged
+
+
+def _verify_outputs(src_path, entry):
+    problems = []
+    outputs = [(entry["output"], entry["output_hash"])]
+    outputs.extend(entry.get("targets", {}).items())
+    for output, output_hash in outputs:
+        if not os.path.isfile(output):
+            problems.append(f"output {output} of {src_path} is missing")
+        elif hash_file(output) != output_hash:
+            problems.append(f"output {output} of {src_path} does not match")
+    return problems
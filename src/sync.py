@@ -0,0 +1,229 @@
+import hashlib
+import os
+import shutil
+import threading
+
+from manifest import HASH_CHUNK, hash_file
+from walk import STATIC_IGNORE, load_ignore_rules, walk_files
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+FICLONE = 0x40049409
+
+SYNC_METHODS = ("copy", "hardlink", "reflink")
+
+
+def sync_tree(
+    source,
+    destination,
+    previous=(),
+    method="copy",
+    checksum=False,
+    rules=None,
+    changes=None,
+):
+    if method not in SYNC_METHODS:
+        raise ValueError(f"unknown sync method: {method}")
+
+    if rules is None:
+        rules = load_ignore_rules(source, (), STATIC_IGNORE)
+    synced = []
+    copied = 0
+    for src_path, rel_path in walk_files(source, rules):
+        dest_path = os.path.join(destination, rel_path)
+        if sync_file(src_path, dest_path, method, checksum, changes):
+            copied += 1
+            print(f"copied file: {src_path} -> {dest_path}")
+        synced.append(rel_path)
+
+    removed = remove_orphans(destination, set(previous) - set(synced), changes)
+    unchanged = len(synced) - copied
+    print(f"static: {copied} copied, {unchanged} unchanged, {removed} removed")
+    return synced
+
+
+def sync_file(src_path, dest_path, method="copy", checksum=False, changes=None):
+    src_stat = os.stat(src_path)
+    try:
+        dest_stat = os.stat(dest_path)
+    except FileNotFoundError:
+        dest_stat = None
+
+    if dest_stat is not None and dest_stat.st_size == src_stat.st_size:
+        if os.path.samestat(src_stat, dest_stat):
+            return False
+        if dest_stat.st_mtime_ns == src_stat.st_mtime_ns:
+            return False
+        if checksum and hash_file(src_path) == hash_file(dest_path):
+            shutil.copystat(src_path, dest_path)
+            return False
+
+    os.makedirs(os.path.dirname(dest_path) or ".", exist_ok=True)
+    tmp_path = f"{dest_path}.sync-tmp"
+    try:
+        _copy_file(src_path, tmp_path, method)
+        os.replace(tmp_path, dest_path)
+    finally:
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+    if changes is not None:
+        changes.record_write(dest_path, dest_stat is not None)
+    return True
+
+
+def write_if_changed(path, data, changes=None):
+    try:
+        size = os.path.getsize(path)
+    except FileNotFoundError:
+        size = None
+    if size == len(data):
+        with open(path, "rb") as file:
+            if file.read() == data:
+                return False
+
+    _replace_with_chunks(path, [data])
+    if changes is not None:
+        changes.record_write(path, size is not None)
+    return True
+
+
+def _replace_with_chunks(path, chunks):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "wb") as file:
+            file.writelines(chunks)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+
+
+class StreamWriter:
+    def __init__(self, write):
+        self.output = write
+        self.digest = hashlib.sha256()
+        self.chunks = []
+        self.pending = 0
+        self.size = 0
+
+    def write(self, text):
+        self.chunks.append(text)
+        self.pending += len(text)
+        if self.pending >= HASH_CHUNK:
+            self.flush()
+
+    def flush(self):
+        data = "".join(self.chunks).encode("utf-8")
+        self.chunks = []
+        self.pending = 0
+        self.digest.update(data)
+        self.output(data)
+        self.size += len(data)
+
+
+def write_stream_if_changed(path, stream, changes=None):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "wb") as file:
+            writer = StreamWriter(file.write)
+            stream(writer.write)
+            writer.flush()
+        output_hash = writer.digest.hexdigest()
+        existed = os.path.isfile(path)
+        if (
+            existed
+            and os.path.getsize(path) == writer.size
+            and hash_file(path) == output_hash
+        ):
+            return output_hash, writer.size
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+    if changes is not None:
+        changes.record_write(path, existed)
+    return output_hash, writer.size
+
+
+def write_buffered_if_changed(path, stream, changes=None):
+    chunks = []
+    writer = StreamWriter(chunks.append)
+    stream(writer.write)
+    writer.flush()
+    output_hash = writer.digest.hexdigest()
+    try:
+        size = os.path.getsize(path)
+    except FileNotFoundError:
+        size = None
+    if size == writer.size and hash_file(path) == output_hash:
+        return output_hash, writer.size
+    _replace_with_chunks(path, chunks)
+    if changes is not None:
+        changes.record_write(path, size is not None)
+    return output_hash, writer.size
+
+
+def _copy_file(src_path, dest_path, method):
+    if method == "hardlink":
+        try:
+            os.link(src_path, dest_path)
+            return
+        except OSError:
+            pass
+    if method == "reflink":
+        try:
+            _reflink(src_path, dest_path)
+            shutil.copystat(src_path, dest_path)
+            return
+        except OSError:
+            pass
+    shutil.copy2(src_path, dest_path)
+
+
+def _reflink(src_path, dest_path):
+    with open(src_path, "rb") as src, open(dest_path, "wb") as dest:
+        if fcntl is not None:
+            try:
+                fcntl.ioctl(dest.fileno(), FICLONE, src.fileno())
+                return
+            except OSError:
+                pass
+        if not hasattr(os, "copy_file_range"):
+            raise OSError("copy_file_range is not available")
+        remaining = os.fstat(src.fileno()).st_size
+        while remaining > 0:
+            copied = os.copy_file_range(src.fileno(), dest.fileno(), remaining)
+            if copied == 0:
+                break
+            remaining -= copied
+
+
+def remove_orphans(destination, rel_paths, changes=None):
+    removed = 0
+    for rel_path in sorted(rel_paths):
+        dest_path = os.path.join(destination, rel_path)
+        if not os.path.isfile(dest_path):
+            continue
+        os.remove(dest_path)
+        if changes is not None:
+            changes.record_removal(dest_path)
+        print(f"removed orphaned file: {dest_path}")
+        removed += 1
+        prune_empty_dirs(os.path.dirname(dest_path), destination)
+    return removed
+
+
+def prune_empty_dirs(directory, stop):
+    stop = os.path.abspath(stop)
+    directory = os.path.abspath(directory)
+    while directory != stop and directory.startswith(stop + os.sep):
+        try:
+            os.rmdir(directory)
+        except OSError:
+            return
+        directory = os.path.dirname(directory)
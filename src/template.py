@@ -0,0 +1,140 @@
+import os
+import posixpath
+import re
+
+TAG_PATTERN = re.compile(r"\{\{\s*(>)?\s*([\w./-]+)\s*\}\}")
+ROOT_URL_PATTERN = re.compile(r'((?:href|src)="/)([^"?#]*)')
+
+_compiled = {}
+
+
+class Template:
+    def __init__(self, parts, slots, dependencies=()):
+        self.parts = parts
+        self.slots = slots
+        self.dependencies = dependencies
+
+    def render(self, **values):
+        parts = list(self.parts)
+        for index, name in self.slots:
+            if name not in values:
+                raise ValueError(f"missing template variable: {name}")
+            parts[index] = values[name]
+        return "".join(parts)
+
+    def stream(self, write, **values):
+        slots = dict(self.slots)
+        for index, part in enumerate(self.parts):
+            if index not in slots:
+                write(part)
+                continue
+            name = slots[index]
+            if name not in values:
+                raise ValueError(f"missing template variable: {name}")
+            value = values[name]
+            if hasattr(value, "write_html"):
+                value.write_html(write)
+            else:
+                write(value)
+
+    def __repr__(self):
+        return f"Template({self.parts}, {self.slots})"
+
+
+def compile_template(
+    text, basepath="/", base_dir=".", _including=(), fs=None, assets=None
+):
+    parts = []
+    slots = []
+    dependencies = []
+    position = 0
+    for match in TAG_PATTERN.finditer(text):
+        parts.append(
+            rewrite_root_urls(text[position : match.start()], basepath, assets)
+        )
+        position = match.end()
+        is_partial, name = match.groups()
+        if is_partial:
+            partial = _compile_partial(
+                name, basepath, base_dir, _including, fs, assets
+            )
+            offset = len(parts)
+            parts.extend(partial.parts)
+            slots.extend((offset + index, slot) for index, slot in partial.slots)
+            dependencies.extend(partial.dependencies)
+        else:
+            slots.append((len(parts), name))
+            parts.append("")
+    parts.append(rewrite_root_urls(text[position:], basepath, assets))
+    return Template(parts, slots, tuple(dependencies))
+
+
+def _compile_partial(name, basepath, base_dir, including, fs=None, assets=None):
+    paths = os.path if fs is None else posixpath
+    path = paths.normpath(paths.join(base_dir, name))
+    if path in including:
+        raise ValueError(f"recursive template include: {path}")
+    if fs is not None:
+        if not fs.isfile(path):
+            raise ValueError(f"included template {path} is not a file")
+        text = fs.read_text(path)
+    else:
+        if not os.path.isfile(path):
+            raise ValueError(f"included template {path} is not a file")
+        with open(path, "r") as file:
+            text = file.read()
+    partial = compile_template(
+        text, basepath, paths.dirname(path), including + (path,), fs, assets
+    )
+    partial.dependencies = (path,) + partial.dependencies
+    return partial
+
+
+def rewrite_root_urls(html, basepath, assets=None):
+    if assets:
+        html = ROOT_URL_PATTERN.sub(
+            lambda match: match[1] + assets.get(match[2], match[2]), html
+        )
+    if basepath == "/":
+        return html
+    return html.replace('href="/', f'href="{basepath}').replace(
+        'src="/', f'src="{basepath}'
+    )
+
+
+def load_template(path, basepath="/", assets=None):
+    if not os.path.isfile(path):
+        raise ValueError(f"path {path} is not a file")
+    key = (path, basepath, assets.digest if assets else None)
+    cached = _compiled.get(key)
+    if cached is not None and cached[0] == _stat_all(cached[1].dependencies):
+        return cached[1]
+
+    with open(path, "r") as file:
+        template = compile_template(
+            file.read(), basepath, os.path.dirname(path), assets=assets
+        )
+    template.dependencies = (path,) + template.dependencies
+    _compiled[key] = (_stat_all(template.dependencies), template)
+    return template
+
+
+def load_fs_template(fs, path, basepath="/"):
+    if not fs.isfile(path):
+        raise ValueError(f"path {path} is not a file")
+    template = compile_template(
+        fs.read_text(path), basepath, posixpath.dirname(path), fs=fs
+    )
+    template.dependencies = (path,) + template.dependencies
+    return template
+
+
+def _stat_all(paths):
+    stats = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        stats.append((stat.st_mtime_ns, stat.st_size))
+    return stats
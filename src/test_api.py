@@ -0,0 +1,104 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from api import build_site, render_markdown
+from fs import MemoryFS
+from template import compile_template
+from utils import clean_copy, generate_pages_recursive
+
+CONTENT = {
+    "index.md": "# Home\n\n[post](/blog/post) and ![logo](/logo.png)",
+    "blog/post/index.md": "# Post\n\nSome **bold** text",
+    "blog/post/photo.png": b"\x89PNG",
+    "drafts/index.md": "# Draft",
+}
+STATIC = {"logo.png": b"logo", "index.css": "body {}"}
+TEMPLATES = {
+    "template.html": '<title>{{ Title }}</title>{{> parts/nav.html }}{{ Content }}',
+    "parts/nav.html": '<a href="/">home</a>',
+}
+
+
+class TestBuildSite(unittest.TestCase):
+    def test_outputs_in_memory(self):
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            outputs = build_site(
+                MemoryFS(CONTENT),
+                MemoryFS(TEMPLATES),
+                basepath="/site/",
+                static=MemoryFS(STATIC),
+                ignore=["drafts/"],
+            )
+        self.assertEqual(stdout.getvalue(), "")
+        self.assertEqual(
+            sorted(outputs),
+            [
+                "blog/post/index.html",
+                "blog/post/photo.png",
+                "index.css",
+                "index.html",
+                "logo.png",
+            ],
+        )
+        self.assertEqual(
+            outputs["index.html"],
+            b'<title>Home</title><a href="/site/">home</a><div><h1>Home</h1>'
+            b'<p><a href="/site/blog/post">post</a> and '
+            b'<img src="/site/logo.png" alt="logo"></img></p></div>',
+        )
+
+    def test_matches_disk_build(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for name, files in (
+                ("content", CONTENT),
+                ("static", STATIC),
+                ("", TEMPLATES),
+            ):
+                for rel_path, data in files.items():
+                    path = os.path.join(tmp, name, rel_path)
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    with open(path, "wb") as file:
+                        file.write(data if isinstance(data, bytes) else data.encode())
+            dest = os.path.join(tmp, "docs")
+            with contextlib.redirect_stdout(io.StringIO()):
+                clean_copy(os.path.join(tmp, "static"), dest)
+                generate_pages_recursive(
+                    os.path.join(tmp, "content"),
+                    os.path.join(tmp, "template.html"),
+                    dest,
+                    "/site/",
+                )
+            on_disk = {}
+            for dirpath, _, filenames in os.walk(dest):
+                for name in filenames:
+                    path = os.path.join(dirpath, name)
+                    with open(path, "rb") as file:
+                        on_disk[os.path.relpath(path, dest)] = file.read()
+
+        outputs = build_site(
+            MemoryFS(CONTENT),
+            MemoryFS(TEMPLATES),
+            basepath="/site/",
+            static=MemoryFS(STATIC),
+        )
+        self.assertEqual(outputs, on_disk)
+
+    def test_failed_page(self):
+        with self.assertRaises(Exception) as context:
+            build_site(MemoryFS({"bad.md": "no title"}), MemoryFS(TEMPLATES))
+        self.assertIn("bad.md", str(context.exception))
+
+    def test_render_markdown(self):
+        template = compile_template("<h>{{ Title }}</h>{{ Content }}", "/x/")
+        html = render_markdown("# Hi\n\n[a](/b)", template, "/x/")
+        self.assertEqual(
+            html, b'<h>Hi</h><div><h1>Hi</h1><p><a href="/x/b">a</a></p></div>'
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import contextlib
+import io
+import json
+import os
+import unittest
+
+from assets import (
+    AssetMap,
+    fingerprint_assets,
+    fingerprint_name,
+    fingerprint_parts,
+    remove_fingerprinted,
+)
+from changes import ChangeSet
+from manifest import hash_text
+from test_support import TempDirTestCase, write_file
+
+
+class TestFingerprintName(unittest.TestCase):
+    def test_inserts_hash_before_extension(self):
+        file_hash = "0123456789abcdef"
+        self.assertEqual(fingerprint_name("index.css", file_hash), "index.01234567.css")
+        self.assertEqual(
+            fingerprint_name("images/a.b.png", file_hash), "images/a.b.01234567.png"
+        )
+        self.assertEqual(fingerprint_name("LICENSE", file_hash), "LICENSE.01234567")
+        self.assertEqual(fingerprint_name(".nojekyll", file_hash), ".nojekyll.01234567")
+
+
+class TestFingerprintParts(unittest.TestCase):
+    def test_rewrites_known_asset_urls(self):
+        assets = AssetMap({"a.png": "a.123.png"})
+        parts = ['<img src="', 'a.png" alt="a"><a href="', 'a.png#x">', 'b.png">']
+        self.assertEqual(
+            fingerprint_parts(parts, assets),
+            ['<img src="', 'a.123.png" alt="a"><a href="', 'a.123.png#x">', 'b.png">'],
+        )
+        self.assertIs(fingerprint_parts(parts, None), parts)
+
+    def test_digest_depends_on_names(self):
+        self.assertEqual(AssetMap({"a": "b"}).digest, AssetMap({"a": "b"}).digest)
+        self.assertNotEqual(AssetMap({"a": "b"}).digest, AssetMap({"a": "c"}).digest)
+
+
+class TestFingerprintAssets(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.root, "static")
+        self.docs = os.path.join(self.root, "docs")
+        write_file(os.path.join(self.static, "index.css"), "body {}")
+        write_file(os.path.join(self.static, "images", "logo.png"), "png")
+
+    def fingerprint(self, previous=None, directories=None, changes=None):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return fingerprint_assets(
+                self.static,
+                [self.docs] if directories is None else directories,
+                previous,
+                changes=changes,
+            )
+
+    def test_copies_and_writes_manifest(self):
+        changes = ChangeSet()
+        assets, record = self.fingerprint(changes=changes)
+        css = f"index.{hash_text('body {}')[:8]}.css"
+        self.assertEqual(assets["index.css"], css)
+        self.assertTrue(assets["images/logo.png"].startswith("images/logo."))
+        with open(os.path.join(self.docs, css)) as file:
+            self.assertEqual(file.read(), "body {}")
+        with open(os.path.join(self.docs, "asset-manifest.json")) as file:
+            self.assertEqual(json.load(file), assets)
+        self.assertEqual(len(changes.to_dict()["added"]), 3)
+        self.assertEqual(
+            sorted(record["files"]), [os.path.join("images", "logo.png"), "index.css"]
+        )
+
+    def test_changed_asset_replaces_stale_copy(self):
+        assets, record = self.fingerprint()
+        old_css = os.path.join(self.docs, assets["index.css"])
+        write_file(os.path.join(self.static, "index.css"), "body { color: red }")
+        changes = ChangeSet()
+        new_assets, record = self.fingerprint(record, changes=changes)
+        self.assertNotEqual(new_assets.digest, assets.digest)
+        self.assertFalse(os.path.exists(old_css))
+        new_css = os.path.join(self.docs, new_assets["index.css"])
+        self.assertTrue(os.path.isfile(new_css))
+        self.assertEqual(changes.to_dict()["removed"], [os.path.normpath(old_css)])
+
+        remove_fingerprinted(record)
+        self.assertEqual(os.listdir(self.docs), ["images"])
+        self.assertEqual(os.listdir(os.path.join(self.docs, "images")), [])
+
+    def test_map_without_outputs(self):
+        assets, record = self.fingerprint(directories=[])
+        self.assertEqual(len(assets), 2)
+        self.assertEqual(record["outputs"], [])
+        self.assertFalse(os.path.exists(self.docs))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,12 @@
+import io
 import unittest
 
 from blocks import (
     BlockType,
+    MarkdownStream,
     block_to_block_type,
     extract_title,
+    iter_blocks,
     markdown_to_blocks,
     markdown_to_html_node,
 )
@@ -58,6 +61,60 @@ Third block
         self.assertEqual(markdown_to_blocks(md), expected)
 
 
+    def test_code_fence_with_blank_lines(self):
+        md = """
+Intro
+
+```
+def f():
+
+    return 1
+```
+After
+"""
+        self.assertEqual(
+            markdown_to_blocks(md),
+            ["Intro", "```\ndef f():\n\n    return 1\n```", "After"],
+        )
+
+
+class TestIterBlocks(unittest.TestCase):
+    def test_classifies_while_reading(self):
+        md = "# Title\n\n> a\n> b\n\n- x\n- y\n\n1. x\n2. y\n\n1. x\n3. y\n\n```\ncode\n```"
+        self.assertEqual(
+            [block_type for _, block_type in iter_blocks(md)],
+            [
+                BlockType.HEADING,
+                BlockType.QUOTE,
+                BlockType.UNORDERED_LIST,
+                BlockType.ORDERED_LIST,
+                BlockType.PARAGRAPH,
+                BlockType.CODE,
+            ],
+        )
+
+    def test_types_match_block_to_block_type(self):
+        md = "## Head\n\n>q\n\n- a\nb\n\n```inline```\n\ntext"
+        for block, block_type in iter_blocks(md):
+            self.assertEqual(block_type, block_to_block_type(block))
+
+    def test_file_iterator(self):
+        lines = io.StringIO("first\nline\n\n\n- item\n")
+        self.assertEqual(
+            list(iter_blocks(lines)),
+            [
+                ("first\nline", BlockType.PARAGRAPH),
+                ("- item", BlockType.UNORDERED_LIST),
+            ],
+        )
+
+    def test_unclosed_fence_runs_to_end(self):
+        self.assertEqual(
+            list(iter_blocks("```\ncode\n\nmore")),
+            [("```\ncode\n\nmore\n```", BlockType.CODE)],
+        )
+
+
 class TestBlockToBlockType(unittest.TestCase):
     def test_empty_block(self):
         self.assertIsNone(block_to_block_type(""))
@@ -240,6 +297,64 @@ the **same** even with inline stuff
             "<div><pre><code>This is text that _should_ remain\nthe **same** even with inline stuff\n</code></pre></div>",
         )
 
+    def test_code_with_blank_lines(self):
+        md = "```\nfirst\n\nsecond\n```"
+        html = markdown_to_html_node(md).to_html()
+        self.assertEqual(html, "<div><pre><code>first\n\nsecond\n</code></pre></div>")
+
+
+class TestNestedInline(unittest.TestCase):
+    def test_nested_emphasis(self):
+        html = markdown_to_html_node("**bold _and italic_** and _it **bold**_").to_html()
+        self.assertEqual(
+            html,
+            "<div><p><b>bold <i>and italic</i></b> and <i>it <b>bold</b></i></p></div>",
+        )
+
+    def test_link_inside_bold(self):
+        html = markdown_to_html_node("**see [docs](/a_b)**").to_html()
+        self.assertEqual(html, '<div><p><b>see <a href="/a_b">docs</a></b></p></div>')
+
+    def test_lone_underscore_inside_bold(self):
+        html = markdown_to_html_node("**snake_case**").to_html()
+        self.assertEqual(html, "<div><p><b>snake_case</b></p></div>")
+
+
+class TestBasepath(unittest.TestCase):
+    def test_root_urls_are_prefixed(self):
+        md = "[home](/) ![logo](/logo.png) [out](https://example.com)"
+        html = markdown_to_html_node(md, "/site/").to_html()
+        self.assertEqual(
+            html,
+            '<div><p><a href="/site/">home</a> <img src="/site/logo.png" alt="logo">'
+            '</img> <a href="https://example.com">out</a></p></div>',
+        )
+
+    def test_nested_and_list_links(self):
+        md = "- **see [docs](/docs)**"
+        html = markdown_to_html_node(md, "/site/").to_html()
+        self.assertIn('<a href="/site/docs">docs</a>', html)
+
+    def test_code_is_not_rewritten(self):
+        md = '```\n<a href="/x">x</a>\n```\n\n`src="/y"`'
+        html = markdown_to_html_node(md, "/site/").to_html()
+        self.assertIn('href="/x"', html)
+        self.assertIn('src="/y"', html)
+
+
+class TestMarkdownStream(unittest.TestCase):
+    def test_matches_tree(self):
+        md = "# Title\n\n- [a](/a)\n- b\n\n```\ncode\n\nmore\n```\n\n> quote"
+        chunks = []
+        MarkdownStream(io.StringIO(md), "/site/").write_html(chunks.append)
+        self.assertEqual(
+            "".join(chunks), markdown_to_html_node(md, "/site/").to_html()
+        )
+
+    def test_empty(self):
+        with self.assertRaises(ValueError):
+            MarkdownStream(io.StringIO("\n\n")).write_html(lambda text: None)
+
 
 class TestExtractTitle(unittest.TestCase):
     def test_valid_heading(self):
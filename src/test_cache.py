@@ -0,0 +1,117 @@
+import os
+import pickle
+import tempfile
+import unittest
+import unittest.mock
+
+import cache
+from blocks import markdown_to_html_node
+from cache import BlockCache, FragmentCache, get_block_cache
+
+PAGE = "# Title\n\nFirst **bold** paragraph\n\n- one\n- two\n\n```\ncode\n```"
+
+
+class TestFragmentCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = FragmentCache(os.path.join(self.tmp.name, "fragments"), 100)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_miss_then_hit(self):
+        key = self.cache.key("# Title")
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, "<div><h1>Title</h1></div>")
+        self.assertEqual(self.cache.get(key), "<div><h1>Title</h1></div>")
+
+    def test_key_is_content_addressed(self):
+        self.assertEqual(self.cache.key("a"), self.cache.key("a"))
+        self.assertNotEqual(self.cache.key("a"), self.cache.key("b"))
+
+    def test_evicts_least_recently_used(self):
+        keys = [self.cache.key(str(i)) for i in range(4)]
+        for age, key in enumerate(keys):
+            self.cache.put(key, "x" * 30)
+            os.utime(self.cache.path(key), ns=(age * 10**9, age * 10**9))
+        self.cache.get(keys[0])
+
+        self.assertEqual(self.cache.evict(), 1)
+        remaining = [key for key in keys if self.cache.get(key) is not None]
+        self.assertEqual(remaining, [keys[0], keys[2], keys[3]])
+
+    def test_no_eviction_under_limit(self):
+        self.cache.put(self.cache.key("a"), "small")
+        self.assertEqual(self.cache.evict(), 0)
+
+    def test_missing_directory(self):
+        self.assertEqual(self.cache.entries(), [])
+
+
+class TestBlockCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "blocks.sqlite")
+        self.blocks = BlockCache(self.path)
+
+    def tearDown(self):
+        self.blocks.close()
+        self.tmp.cleanup()
+
+    def render_counting(self, blocks, markdown):
+        rendered = []
+        original = cache.block_to_html_node
+
+        def counting(block, block_type, basepath):
+            rendered.append(block)
+            return original(block, block_type, basepath)
+
+        with unittest.mock.patch("cache.block_to_html_node", counting):
+            html = blocks.render_markdown(markdown)
+        return html, rendered
+
+    def test_matches_full_render(self):
+        self.assertEqual(
+            self.blocks.render_markdown(PAGE), markdown_to_html_node(PAGE).to_html()
+        )
+
+    def test_changed_block_only_is_rendered(self):
+        self.blocks.render_markdown(PAGE)
+        edited = PAGE.replace("First", "Edited")
+        html, rendered = self.render_counting(self.blocks, edited)
+        self.assertEqual(rendered, ["Edited **bold** paragraph"])
+        self.assertEqual(html, markdown_to_html_node(edited).to_html())
+
+    def test_persists_across_builds(self):
+        self.blocks.render_markdown(PAGE)
+        self.blocks.close()
+        reopened = BlockCache(self.path)
+        html, rendered = self.render_counting(reopened, PAGE)
+        reopened.close()
+        self.assertEqual(rendered, [])
+        self.assertEqual(html, markdown_to_html_node(PAGE).to_html())
+
+    def test_evicts_least_recently_used(self):
+        self.blocks.render_markdown("# Old")
+        self.blocks.render_markdown("# New")
+        self.blocks.max_entries = 1
+        self.assertEqual(self.blocks.evict(), 1)
+        self.blocks.memory.clear()
+        _, rendered = self.render_counting(self.blocks, "# New")
+        self.assertEqual(rendered, [])
+
+    def test_empty_document(self):
+        with self.assertRaises(ValueError):
+            self.blocks.render_markdown("")
+
+    def test_unpickles_to_process_instance(self):
+        shared = get_block_cache(self.path)
+        try:
+            self.assertIs(pickle.loads(pickle.dumps(shared)), shared)
+        finally:
+            shared.close()
+            cache._block_caches.pop(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import json
+import os
+import tempfile
+import unittest
+
+from changes import ChangeSet
+
+
+class TestChangeSet(unittest.TestCase):
+    def test_added_changed_removed(self):
+        changes = ChangeSet()
+        changes.record_write("docs/new.html", False)
+        changes.record_write("docs/old.html", True)
+        changes.record_removal("docs/gone.html")
+        self.assertEqual(
+            changes.to_dict(),
+            {
+                "added": ["docs/new.html"],
+                "changed": ["docs/old.html"],
+                "removed": ["docs/gone.html"],
+            },
+        )
+        self.assertEqual(len(changes), 3)
+
+    def test_removed_then_written_is_changed(self):
+        changes = ChangeSet()
+        changes.record_removal("docs/index.html")
+        changes.record_write("docs/index.html", False)
+        self.assertEqual(changes.to_dict()["changed"], ["docs/index.html"])
+        self.assertEqual(changes.to_dict()["removed"], [])
+
+    def test_added_then_removed_is_dropped(self):
+        changes = ChangeSet()
+        changes.record_write("docs/tmp.html", False)
+        changes.record_write("docs/tmp.html", True)
+        changes.record_removal("docs/tmp.html")
+        self.assertEqual(len(changes), 0)
+
+    def test_update_and_save(self):
+        page = ChangeSet()
+        page.record_write("docs//a.html", False)
+        changes = ChangeSet()
+        changes.update(page)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache", "changes.json")
+            changes.save(path)
+            with open(path) as file:
+                self.assertEqual(json.load(file)["added"], ["docs/a.html"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import contextlib
+import gzip
+import io
+import os
+import unittest
+import unittest.mock
+import zlib
+
+import compress
+from changes import ChangeSet
+from compress import compress_outputs, remove_compressed
+from sync import sync_tree
+from test_support import TempDirTestCase, write_file
+
+
+class FakeBrotli:
+    @staticmethod
+    def compress(data, quality=11):
+        return zlib.compress(data)
+
+
+class TestCompressOutputs(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.docs = os.path.join(self.root, "docs")
+        self.page = os.path.join(self.docs, "blog", "index.html")
+        write_file(self.page, b"<p>hello</p>" * 200)
+        write_file(os.path.join(self.docs, "index.css"), b"body {}")
+        write_file(os.path.join(self.docs, "image.png"), b"\x89PNG" * 1000)
+        write_file(os.path.join(self.docs, "random.js"), os.urandom(4096))
+
+    def compress(self, previous=None, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            record = compress_outputs(self.docs, previous, **kwargs)
+        return record, output.getvalue()
+
+    def test_compresses_large_text_outputs_that_shrink(self):
+        changes = ChangeSet()
+        record, _ = self.compress(changes=changes)
+        script = os.path.join(self.docs, "random.js")
+        self.assertEqual(sorted(record), [self.page, script])
+        self.assertEqual(record[self.page]["sidecars"], [".gz"])
+        self.assertEqual(record[script]["sidecars"], [])
+        with gzip.open(self.page + ".gz") as file:
+            self.assertEqual(file.read(), b"<p>hello</p>" * 200)
+        self.assertEqual(changes.to_dict()["added"], [self.page + ".gz"])
+
+    def test_reuses_sidecars_of_unchanged_outputs(self):
+        record, _ = self.compress()
+        os.utime(self.page + ".gz", ns=(0, 0))
+        _, output = self.compress(record)
+        self.assertIn("0 compressed, 2 reused", output)
+
+        os.utime(self.page, ns=(1, 1))
+        record, output = self.compress(record)
+        self.assertIn("0 compressed, 2 reused", output)
+        self.assertEqual(os.stat(self.page + ".gz").st_mtime_ns, 0)
+
+        write_file(self.page, b"<p>changed</p>" * 200)
+        _, output = self.compress(record)
+        self.assertIn("1 compressed, 1 reused", output)
+        with gzip.open(self.page + ".gz") as file:
+            self.assertEqual(file.read(), b"<p>changed</p>" * 200)
+
+    def test_removes_stale_sidecars(self):
+        record, _ = self.compress()
+        os.remove(self.page)
+        changes = ChangeSet()
+        _, output = self.compress(record, changes=changes)
+        self.assertIn("1 stale sidecars removed", output)
+        self.assertFalse(os.path.exists(self.page + ".gz"))
+        self.assertEqual(changes.to_dict()["removed"], [self.page + ".gz"])
+
+        write_file(self.page, b"<p>hello</p>" * 200)
+        self.compress()
+        self.compress(min_size=10_000)
+        self.assertFalse(os.path.exists(self.page + ".gz"))
+
+    def test_remove_compressed_deletes_recorded_sidecars(self):
+        record, _ = self.compress()
+        static_gz = os.path.join(self.docs, "data.bin.gz")
+        write_file(static_gz, b"archive")
+        changes = ChangeSet()
+        with contextlib.redirect_stdout(io.StringIO()):
+            removed = remove_compressed(record, changes)
+        self.assertEqual(removed, 1)
+        self.assertFalse(os.path.exists(self.page + ".gz"))
+        self.assertTrue(os.path.exists(static_gz))
+        self.assertEqual(changes.to_dict()["removed"], [self.page + ".gz"])
+
+    def test_keeps_compressed_static_files(self):
+        static = os.path.join(self.root, "static")
+        download = os.path.join(self.docs, "downloads", "data.bin.gz")
+        write_file(os.path.join(static, "downloads", "data.bin.gz"), b"archive")
+        write_file(os.path.join(static, "downloads", "notes.txt.gz"), b"notes")
+        record = None
+        for _ in range(2):
+            changes = ChangeSet()
+            with contextlib.redirect_stdout(io.StringIO()):
+                sync_tree(static, self.docs, changes=changes)
+            record, output = self.compress(record, changes=changes)
+            self.assertIn("0 stale sidecars removed", output)
+            self.assertTrue(os.path.isfile(download))
+        self.assertEqual(changes.to_dict()["removed"], [])
+
+    def test_brotli_when_available(self):
+        record, _ = self.compress()
+        with unittest.mock.patch.object(compress, "brotli", FakeBrotli):
+            record, output = self.compress(record)
+        self.assertIn("(.gz, .br): 2 compressed", output)
+        self.assertEqual(record[self.page]["sidecars"], [".gz", ".br"])
+        with open(self.page + ".br", "rb") as file:
+            self.assertEqual(zlib.decompress(file.read()), b"<p>hello</p>" * 200)
+
+        self.compress(record)
+        self.assertFalse(os.path.exists(self.page + ".br"))
+
+
+if __name__ == "__main__":
+    unittest.main()
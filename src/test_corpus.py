@@ -0,0 +1,59 @@
+import os
+import random
+import tempfile
+import unittest
+
+from blocks import extract_title, markdown_to_html_node
+from corpus import DEFAULT_MIX, generate_corpus, generate_markdown, parse_mix
+
+
+class TestGenerateMarkdown(unittest.TestCase):
+    def test_deterministic(self):
+        first = generate_markdown(random.Random(3), size=2000)
+        second = generate_markdown(random.Random(3), size=2000)
+        self.assertEqual(first, second)
+        self.assertGreaterEqual(len(first), 2000)
+
+    def test_renders(self):
+        for seed in range(20):
+            md = generate_markdown(random.Random(seed), size=3000, density=0.5, images=3)
+            self.assertTrue(extract_title(md))
+            html = markdown_to_html_node(md).to_html()
+            self.assertIn("<img", html)
+
+    def test_mix_only_code(self):
+        md = generate_markdown(random.Random(0), size=1000, mix={"code": 1}, images=0)
+        self.assertEqual(md.count("```") % 2, 0)
+        self.assertIn("<pre><code>", markdown_to_html_node(md).to_html())
+
+
+class TestParseMix(unittest.TestCase):
+    def test_parse(self):
+        self.assertEqual(parse_mix("paragraph=3,code"), {"paragraph": 3, "code": 1})
+
+    def test_unknown_kind(self):
+        with self.assertRaises(ValueError):
+            parse_mix("table=1")
+
+    def test_default_kinds(self):
+        self.assertEqual(parse_mix(",".join(DEFAULT_MIX)).keys(), DEFAULT_MIX.keys())
+
+
+class TestGenerateCorpus(unittest.TestCase):
+    def test_layout(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content_dir, static_dir, template_path = generate_corpus(
+                tmp, pages=3, page_size=500, static_files=2, static_size=16
+            )
+            pages = [
+                os.path.join(dirpath, name)
+                for dirpath, _, names in os.walk(content_dir)
+                for name in names
+            ]
+            self.assertEqual(len(pages), 3)
+            self.assertEqual(len(os.listdir(os.path.join(static_dir, "images"))), 2)
+            self.assertTrue(os.path.isfile(template_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
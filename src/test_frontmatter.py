@@ -0,0 +1,63 @@
+import io
+import unittest
+
+from frontmatter import parse_value, read_front_matter, split_front_matter
+
+
+class TestSplitFrontMatter(unittest.TestCase):
+    def test_no_front_matter(self):
+        markdown = "# Title\n\n---\n\ntext"
+        self.assertEqual(split_front_matter(markdown), ({}, markdown))
+
+    def test_parses_fields(self):
+        meta, body = split_front_matter(
+            "---\nTitle: Hello: world\ndate: 2024-03-01T10:00\n"
+            "tags: [a, 'b c']\ndraft: yes\n---\n\n# Body"
+        )
+        self.assertEqual(
+            meta,
+            {
+                "title": "Hello: world",
+                "date": "2024-03-01",
+                "tags": ["a", "b c"],
+                "draft": True,
+            },
+        )
+        self.assertEqual(body, "# Body")
+
+    def test_comma_separated_tags(self):
+        meta, _ = split_front_matter("---\ntags: one, two,\n---")
+        self.assertEqual(meta["tags"], ["one", "two"])
+
+    def test_errors(self):
+        for markdown in (
+            "---\ntitle: x\n# Body",
+            "---\nnot a field\n---\n",
+            "---\ndate: yesterday\n---\n",
+        ):
+            with self.assertRaises(ValueError):
+                split_front_matter(markdown)
+
+    def test_read_matches_split(self):
+        for markdown in (
+            "# Title\n",
+            "---\ntitle: x\ntags: a\n---\n\n# Body\ntext\n",
+            "---\n---\n# Body",
+            "---",
+            "",
+        ):
+            meta, lines = read_front_matter(io.StringIO(markdown))
+            expected_meta, body = split_front_matter(markdown)
+            self.assertEqual(meta, expected_meta)
+            self.assertEqual("".join(lines).lstrip("\n"), body)
+        with self.assertRaises(ValueError):
+            read_front_matter(io.StringIO("---\ntitle: x\n# Body"))
+
+    def test_parse_value(self):
+        self.assertEqual(parse_value('"no"'), "no")
+        self.assertEqual(parse_value("false"), False)
+        self.assertEqual(parse_value("[]"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
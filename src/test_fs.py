@@ -0,0 +1,55 @@
+import io
+import os
+import tempfile
+import unittest
+import zipfile
+
+from fs import DirectoryFS, MemoryFS, ZipFS
+
+FILES = {
+    "index.md": "# Home",
+    "blog/post.md": "# Post",
+    "blog/drafts/wip.md": "# WIP",
+    "a.css": "body {}",
+    ".hidden": "secret",
+    ".ssgignore": "drafts/\n",
+}
+EXPECTED = ["a.css", "index.md", "blog/post.md"]
+
+
+class TestFileSystems(unittest.TestCase):
+    def check(self, fs):
+        self.assertEqual(list(fs.walk()), EXPECTED)
+        self.assertTrue(fs.isfile("blog/post.md"))
+        self.assertFalse(fs.isfile("blog"))
+        self.assertEqual(fs.read_text("blog/post.md"), "# Post")
+        self.assertEqual(fs.read_bytes("./a.css"), b"body {}")
+        with self.assertRaises(FileNotFoundError):
+            fs.read_bytes("missing.md")
+
+    def test_memory(self):
+        self.check(MemoryFS(FILES))
+
+    def test_directory(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for rel_path, text in FILES.items():
+                path = os.path.join(tmp, rel_path)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "w") as file:
+                    file.write(text)
+            self.check(DirectoryFS(tmp))
+
+    def test_zip_with_root(self):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as archive:
+            archive.writestr("site/", "")
+            for rel_path, text in FILES.items():
+                archive.writestr(f"site/{rel_path}", text)
+            archive.writestr("other.md", "# Outside")
+        fs = ZipFS(buffer, root="site")
+        self.check(fs)
+        fs.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
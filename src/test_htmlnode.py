@@ -20,6 +20,10 @@ class TestHtmlNode(unittest.TestCase):
         self.assertIsNone(node.children)
         self.assertIsNone(node.props)
 
+    def test_compact_nodes(self):
+        for node in (HTMLNode(), LeafNode("b", "x"), ParentNode("p", [])):
+            self.assertFalse(hasattr(node, "__dict__"))
+
     def test_not_impl(self):
         node = HTMLNode("<a>", "test", "", "")
 
@@ -81,5 +85,36 @@ class TestParentNode(unittest.TestCase):
         self.assertEqual(node.to_html(), expected)
 
 
+class TestWriteHtml(unittest.TestCase):
+    def test_writes_chunks(self):
+        node = ParentNode("div", [
+            LeafNode(None, "Raw text"),
+            ParentNode("p", [LeafNode("b", "bold")]),
+        ])
+        chunks = []
+        node.write_html(chunks.append)
+        self.assertEqual(
+            chunks, ["<div>", "Raw text", "<p>", "<b>bold</b>", "</p>", "</div>"]
+        )
+        self.assertEqual("".join(chunks), node.to_html())
+
+    def test_large_tree(self):
+        paragraphs = [
+            ParentNode("p", [LeafNode(None, f"line {i}")]) for i in range(20000)
+        ]
+        html = ParentNode("div", paragraphs).to_html()
+        self.assertTrue(html.startswith("<div><p>line 0</p>"))
+        self.assertTrue(html.endswith("<p>line 19999</p></div>"))
+
+    def test_errors_raised_while_writing(self):
+        node = ParentNode("div", [ParentNode("p", [])])
+        with self.assertRaises(ValueError) as context:
+            node.write_html(lambda chunk: None)
+        self.assertEqual(str(context.exception), "empty children list")
+
+    def test_base_not_impl(self):
+        self.assertRaises(NotImplementedError, HTMLNode().write_html, print)
+
+
 if __name__ == "__main__":
     unittest.main()
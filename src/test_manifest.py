@@ -0,0 +1,58 @@
+import os
+import tempfile
+import unittest
+
+from manifest import (
+    GENERATOR_VERSION,
+    load_manifest,
+    new_manifest,
+    page_key,
+    save_manifest,
+)
+
+
+class TestPageKey(unittest.TestCase):
+    def test_same_inputs_same_key(self):
+        self.assertEqual(page_key("md", "tmpl", "/"), page_key("md", "tmpl", "/"))
+
+    def test_any_input_changes_key(self):
+        key = page_key("md", "tmpl", "/")
+        self.assertNotEqual(key, page_key("md2", "tmpl", "/"))
+        self.assertNotEqual(key, page_key("md", "tmpl2", "/"))
+        self.assertNotEqual(key, page_key("md", "tmpl", "/blog/"))
+
+
+class TestManifestFile(unittest.TestCase):
+    def test_missing_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            manifest = load_manifest(os.path.join(tmp, "manifest.json"))
+        self.assertEqual(manifest, new_manifest())
+
+    def test_roundtrip(self):
+        manifest = new_manifest()
+        manifest["pages"]["content/index.md"] = {
+            "key": "abc",
+            "output": "docs/index.html",
+            "output_hash": "def",
+        }
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, ".cache", "manifest.json")
+            save_manifest(path, manifest)
+            self.assertEqual(load_manifest(path), manifest)
+
+    def test_version_mismatch_discards(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "manifest.json")
+            save_manifest(path, {"version": GENERATOR_VERSION + "x", "pages": {"a": {}}})
+            self.assertEqual(load_manifest(path), new_manifest())
+
+    def test_corrupt_file_discards(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "manifest.json")
+            with open(path, "w") as file:
+                file.write("{not json")
+            self.assertEqual(load_manifest(path), new_manifest())
+
+
+if __name__ == "__main__":
+    unittest.main()
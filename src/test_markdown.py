@@ -4,6 +4,7 @@ from textnode import TextNode, TextType, text_node_to_html_node
 from markdown import (
     extract_markdown_images,
     extract_markdown_links,
+    scan_inline,
     split_nodes_delimiter,
     split_nodes_image,
     split_nodes_link,
@@ -269,6 +270,58 @@ class TestTextToTextNode(unittest.TestCase):
             ],
         )
 
+    def test_emphasis_spans_links_and_other_delimiters(self):
+        nodes = text_to_textnodes("_see **this** [link](/a_b) now_ done")
+        self.assertEqual(
+            nodes,
+            [
+                TextNode("see **this** [link](/a_b) now", TextType.ITALIC),
+                TextNode(" done", TextType.TEXT),
+            ],
+        )
+
+    def test_code_is_literal(self):
+        self.assertEqual(
+            text_to_textnodes("`a**b**_c` and **d**"),
+            [
+                TextNode("a**b**_c", TextType.CODE),
+                TextNode(" and ", TextType.TEXT),
+                TextNode("d", TextType.BOLD),
+            ],
+        )
+
+    def test_underscore_inside_bold(self):
+        self.assertEqual(
+            text_to_textnodes("**snake_case**"),
+            [TextNode("snake_case", TextType.BOLD)],
+        )
+
+    def test_unmatched_delimiter(self):
+        with self.assertRaises(Exception) as context:
+            text_to_textnodes("Hello **world")
+        self.assertEqual(str(context.exception), "unmatching delimiter")
+
+
+class TestScanInline(unittest.TestCase):
+    def test_non_strict_keeps_unmatched_delimiter(self):
+        self.assertEqual(
+            scan_inline("snake_case", strict=False),
+            [
+                TextNode("snake", TextType.TEXT),
+                TextNode("_", TextType.TEXT),
+                TextNode("case", TextType.TEXT),
+            ],
+        )
+
+    def test_restricted_kinds(self):
+        self.assertEqual(
+            scan_inline("**a** [l](u)", kinds=("link",)),
+            [
+                TextNode("**a** ", TextType.TEXT),
+                TextNode("l", TextType.LINK, "u"),
+            ],
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,153 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from metadata import (
+    MetadataIndex,
+    build_listings,
+    page_url,
+    read_metadata,
+    tag_slug,
+    tag_slugs,
+)
+
+
+def write_post(path, front_matter, body="# Heading\n\ntext"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as file:
+        file.write(f"---\n{front_matter}\n---\n{body}" if front_matter else body)
+
+
+def render(title, content):
+    return f"<title>{title}</title>{content.to_html()}".encode("utf-8")
+
+
+class TestMetadataIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.index = MetadataIndex(os.path.join(self.tmp.name, "index.sqlite"))
+        self.pages = []
+        for i in range(5):
+            src_path = os.path.join(self.content, f"post{i}", "index.md")
+            write_post(
+                src_path,
+                f"title: Post {i}\ndate: 2024-01-0{i + 1}\ntags: [all, n{i % 2}]",
+            )
+            dest_path = os.path.join("docs", f"post{i}", "index.html")
+            self.pages.append((src_path, dest_path))
+        about = os.path.join(self.content, "about.md")
+        write_post(about, "", "# About us")
+        self.pages.append((about, os.path.join("docs", "about.html")))
+
+    def tearDown(self):
+        self.index.close()
+        self.tmp.cleanup()
+
+    def test_updates_only_changed_pages(self):
+        self.assertEqual(self.index.update(self.pages, "docs"), (6, 0))
+        self.assertEqual(self.index.update(self.pages, "docs"), (0, 0))
+
+        write_post(self.pages[0][0], "title: Renamed post\ndate: 2024-01-01")
+        os.utime(self.pages[0][0], ns=(0, 0))
+        self.assertEqual(self.index.update(self.pages[:-1], "docs"), (1, 1))
+        self.assertEqual(self.index.posts()[-1][1], "Renamed post")
+        self.assertEqual([tag for tag, _ in self.index.tags()], ["all", "n0", "n1"])
+        self.assertEqual(self.index.tags()[0], ("all", 4))
+
+    def test_posts_exclude_undated_and_drafts(self):
+        write_post(self.pages[4][0], "date: 2024-02-01\ndraft: true")
+        self.index.update(self.pages, "docs")
+        posts = self.index.posts()
+        self.assertEqual(
+            [post[0] for post in posts], [f"/post{i}/" for i in (3, 2, 1, 0)]
+        )
+        self.assertEqual(len(self.index.posts("n1")), 2)
+        self.assertIn(("/about.html", "About us", None), self.index.pages())
+
+    def test_listings(self):
+        self.index.update(self.pages, "docs")
+        outputs = build_listings(
+            self.index, render, "/base/", "https://example.com", per_page=2
+        )
+        self.assertEqual(
+            sorted(outputs),
+            [
+                "feed.xml",
+                "posts/index.html",
+                "posts/page/2/index.html",
+                "posts/page/3/index.html",
+                "sitemap.xml",
+                "tags/all/index.html",
+                "tags/all/page/2/index.html",
+                "tags/all/page/3/index.html",
+                "tags/index.html",
+                "tags/n0/index.html",
+                "tags/n0/page/2/index.html",
+                "tags/n1/index.html",
+            ],
+        )
+        first = outputs["posts/index.html"].decode()
+        self.assertIn('<a href="/base/post4/">Post 4</a> (2024-01-05)', first)
+        self.assertIn('<a href="/base/posts/page/2/">Older posts</a>', first)
+        self.assertNotIn("Post 2", first)
+        middle = outputs["posts/page/2/index.html"].decode()
+        self.assertIn('href="/base/posts/">Newer posts</a> | <a', middle)
+        feed = outputs["feed.xml"].decode()
+        self.assertIn("<link>https://example.com/base/post4/</link>", feed)
+        self.assertIn("<pubDate>Fri, 05 Jan 2024 00:00:00 +0000</pubDate>", feed)
+        sitemap = outputs["sitemap.xml"].decode()
+        self.assertIn("<loc>https://example.com/base/about.html</loc>", sitemap)
+        self.assertIn("<lastmod>2024-01-01</lastmod>", sitemap)
+
+    def test_sitemap_lists_content_page_at_listing_url_once(self):
+        tags_page = os.path.join(self.content, "tags", "index.md")
+        write_post(tags_page, "title: All tags\ndate: 2024-03-01")
+        self.pages.append((tags_page, os.path.join("docs", "tags", "index.html")))
+        self.index.update(self.pages, "docs")
+        outputs = build_listings(self.index, render, "/", "https://example.com")
+        sitemap = outputs["sitemap.xml"].decode()
+        self.assertEqual(sitemap.count("<loc>https://example.com/tags/</loc>"), 1)
+        self.assertIn(
+            "<loc>https://example.com/tags/</loc>\n<lastmod>2024-03-01</lastmod>",
+            sitemap,
+        )
+
+    def test_empty_listings(self):
+        outputs = build_listings(self.index, render)
+        self.assertEqual(sorted(outputs), ["posts/index.html", "tags/index.html"])
+        self.assertIn(b"No posts yet.", outputs["posts/index.html"])
+
+
+class TestHelpers(unittest.TestCase):
+    def test_page_url(self):
+        self.assertEqual(page_url("docs/index.html", "docs"), "/")
+        self.assertEqual(page_url("docs/blog/a/index.html", "docs"), "/blog/a/")
+        self.assertEqual(page_url("docs/about.html", "docs"), "/about.html")
+
+    def test_read_metadata_titles(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "page.md")
+            write_post(path, "date: 2024-01-01", "text\n\n# Heading\n\n" * 1000)
+            self.assertEqual(read_metadata(path, "/page/")["title"], "Heading")
+            write_post(path, "", "no heading")
+            self.assertEqual(read_metadata(path, "/page/")["title"], "/page/")
+
+    def test_tag_slug(self):
+        self.assertEqual(tag_slug("Middle Earth!"), "middle-earth")
+        self.assertEqual(tag_slug("???"), "tag")
+
+    def test_tag_slugs_disambiguate_collisions(self):
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            slugs = tag_slugs(["b c", "b-c", "b-c-2", "B C", "d"])
+        self.assertEqual(
+            slugs,
+            {"b c": "b-c", "b-c": "b-c-3", "b-c-2": "b-c-2", "B C": "b-c-4", "d": "d"},
+        )
+        self.assertIn("tag 'b-c' shares the slug 'b-c'", output.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import threading
+import time
+import unittest
+
+from pipeline import Stage, run_pipeline
+
+
+def double(x):
+    return x * 2
+
+
+class TestPipeline(unittest.TestCase):
+    def test_all_items_pass_through_every_stage(self):
+        stages = [Stage("double", double, 3), Stage("add", lambda x: x + 1, 2)]
+        results = dict(
+            (index, value) for index, value, _ in run_pipeline(range(50), stages)
+        )
+        self.assertEqual(results, {i: i * 2 + 1 for i in range(50)})
+
+    def test_errors_skip_later_stages(self):
+        def check(x):
+            if x == 3:
+                raise ValueError("bad item")
+            return x
+
+        seen = []
+
+        def record(x):
+            seen.append(x)
+            return x
+
+        stages = [Stage("check", check), Stage("record", record)]
+        entries = sorted(run_pipeline(range(5), stages), key=lambda e: e[0])
+        self.assertEqual(str(entries[3][2]), "bad item")
+        self.assertTrue(all(error is None for i, _, error in entries if i != 3))
+        self.assertEqual(sorted(seen), [0, 1, 2, 4])
+
+    def test_backpressure_bounds_items_in_flight(self):
+        fed = []
+        release = threading.Event()
+
+        def items():
+            for i in range(100):
+                fed.append(i)
+                yield i
+
+        def slow(x):
+            release.wait()
+            return x
+
+        entries = run_pipeline(items(), [Stage("slow", slow)], queue_size=2)
+        consumer = threading.Thread(target=lambda: list(entries))
+        consumer.start()
+        time.sleep(0.1)
+        self.assertLess(len(fed), 10)
+        release.set()
+        consumer.join()
+        self.assertEqual(len(fed), 100)
+
+    def test_closing_early_stops_work(self):
+        calls = []
+
+        def count(x):
+            calls.append(x)
+            return x
+
+        entries = run_pipeline(range(1000), [Stage("count", count)], queue_size=2)
+        next(entries)
+        entries.close()
+        self.assertLess(len(calls), 1000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from profiler import NULL_TIMER, Profiler, StageTimer, page_timer
+
+
+class TestStageTimer(unittest.TestCase):
+    def test_accumulates_stages(self):
+        record = {}
+        timer = StageTimer(record)
+        with timer.stage("parse"):
+            sum(range(1000))
+        with timer.stage("parse"):
+            pass
+        self.assertEqual(list(record["stages"]), ["parse"])
+        self.assertGreater(record["stages"]["parse"]["wall"], 0)
+
+
+class TestNullTimer(unittest.TestCase):
+    def test_disabled_is_noop(self):
+        self.assertIs(page_timer(None), NULL_TIMER)
+        with NULL_TIMER.stage("anything"):
+            pass
+
+
+class TestProfiler(unittest.TestCase):
+    def test_report_and_summary(self):
+        profiler = Profiler()
+        with profiler.stage("discover"):
+            pass
+        for name, wall in (("a.md", 0.5), ("b.md", 2.0)):
+            profiler.add_page(
+                {
+                    "page": name,
+                    "stages": {"parse": {"wall": wall, "cpu": wall}},
+                    "bytes_in": 10,
+                    "bytes_out": 20,
+                }
+            )
+        report = profiler.report()
+        self.assertEqual(report["pages_rendered"], 2)
+        self.assertEqual(report["bytes_out"], 40)
+        self.assertEqual(report["page_stages"]["parse"]["wall"], 2.5)
+        self.assertIn("discover", report["build_stages"])
+
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            profiler.print_summary(top=1)
+        self.assertIn("slowest 1 pages", out.getvalue())
+        self.assertIn("b.md", out.getvalue())
+        self.assertNotIn("a.md", out.getvalue())
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "report", "build.json")
+            profiler.write_report(path)
+            with open(path) as file:
+                self.assertEqual(json.load(file)["pages_rendered"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+import contextlib
+import io
+import os
+import unittest
+
+from server import (
+    LiveReload,
+    PageRenderer,
+    inject_live_reload,
+    output_page_path,
+    page_path,
+)
+from test_support import TempDirTestCase, write_file
+
+
+class TestPagePath(unittest.TestCase):
+    def test_normalizes_urls(self):
+        self.assertEqual(page_path("/"), "/")
+        self.assertEqual(page_path("/index.html"), "/")
+        self.assertEqual(page_path("/blog/tom/"), "/blog/tom")
+        self.assertEqual(page_path("/blog/tom/index.html"), "/blog/tom")
+        self.assertEqual(page_path("/blog/t%C3%B6m"), "/blog/töm")
+
+    def test_output_page_path(self):
+        self.assertEqual(
+            output_page_path("docs/blog/tom/index.html", "docs/"), "/blog/tom"
+        )
+        self.assertEqual(output_page_path("docs/index.html", "docs"), "/")
+
+
+class TestInjectLiveReload(unittest.TestCase):
+    def test_before_closing_body(self):
+        html = inject_live_reload(b"<body><p>x</p></body></html>")
+        self.assertTrue(html.startswith(b"<body><p>x</p><script>"))
+        self.assertTrue(html.endswith(b"</script>\n</body></html>"))
+
+    def test_without_body(self):
+        self.assertTrue(inject_live_reload(b"<p>x</p>").endswith(b"</script>\n"))
+
+
+class TestLiveReload(unittest.TestCase):
+    def test_notify_matching_page(self):
+        live = LiveReload()
+        _, tom = live.connect("/blog/tom/")
+        _, home = live.connect("/")
+        self.assertEqual(live.open_pages(), {"/blog/tom", "/"})
+
+        live.notify("/blog/tom")
+        self.assertEqual(tom.get_nowait(), "reload")
+        self.assertTrue(home.empty())
+
+        live.notify()
+        self.assertEqual(tom.get_nowait(), "reload")
+        self.assertEqual(home.get_nowait(), "reload")
+
+    def test_disconnect(self):
+        live = LiveReload()
+        client_id, _ = live.connect("/")
+        live.disconnect(client_id)
+        self.assertEqual(live.open_pages(), set())
+
+
+class TestPageRenderer(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+        self.template = os.path.join(self.root, "template.html")
+        write_file(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        write_file(os.path.join(self.content, "index.md"), "# Home\n\n[a](/a)")
+        write_file(os.path.join(self.content, "blog", "tom", "index.md"), "# Tom")
+        write_file(os.path.join(self.content, "about.md"), "# About")
+        write_file(os.path.join(self.content, "blog", "tom", "tom.png"), "png")
+        write_file(os.path.join(self.static, "index.css"), "body {}")
+        write_file(os.path.join(self.static, ".well-known", "security.txt"), "x")
+        write_file(os.path.join(self.static, ".ssgignore"), "*.tmp")
+        write_file(os.path.join(self.content, ".secret.md"), "# Secret")
+        self.live = LiveReload()
+        self.renderer = PageRenderer(
+            self.content, self.static, self.template, "/base/", live=self.live
+        )
+
+    def path(self, root, *parts):
+        return os.path.join(os.path.normpath(root), *parts)
+
+    def test_resolve(self):
+        resolve = self.renderer.resolve
+        home = self.path(self.content, "index.md")
+        tom = self.path(self.content, "blog", "tom", "index.md")
+        self.assertEqual(resolve("/base/"), ("page", home))
+        self.assertEqual(resolve("/base"), ("page", home))
+        self.assertEqual(resolve("/base/index.html"), ("page", home))
+        self.assertEqual(resolve("/base/blog/tom/"), ("page", tom))
+        self.assertEqual(resolve("/base/blog/tom"), ("redirect", "/base/blog/tom/"))
+        self.assertEqual(
+            resolve("/base/about.html"), ("page", self.path(self.content, "about.md"))
+        )
+        self.assertEqual(
+            resolve("/base/index.css"), ("file", self.path(self.static, "index.css"))
+        )
+        self.assertEqual(
+            resolve("/base/blog/tom/tom.png"),
+            ("file", self.path(self.content, "blog", "tom", "tom.png")),
+        )
+        self.assertEqual(
+            resolve("/base/.well-known/security.txt"),
+            ("file", self.path(self.static, ".well-known", "security.txt")),
+        )
+        for url_path in (
+            "/index.css",
+            "/base/.secret.html",
+            "/base/.ssgignore",
+            "/base/about.md",
+            "/base/../template.html",
+            "/base/missing/",
+        ):
+            self.assertEqual(resolve(url_path), (None, None))
+
+    def test_render_caches_until_source_changes(self):
+        src_path = self.path(self.content, "index.md")
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            first = self.renderer.render(src_path)
+            self.assertIs(self.renderer.render(src_path), first)
+        self.assertEqual(output.getvalue().count("rendered"), 1)
+        self.assertEqual(
+            first, b'<title>Home</title><div><h1>Home</h1><p><a href="/base/a">a'
+            b"</a></p></div>",
+        )
+
+        write_file(src_path, "# Changed home")
+        os.utime(src_path, ns=(0, 0))
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertIn(b"<h1>Changed home</h1>", self.renderer.render(src_path))
+
+    def test_render_evicts_least_recently_used(self):
+        self.renderer.max_pages = 1
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.renderer.render(self.path(self.content, "index.md"))
+            self.renderer.render(self.path(self.content, "about.md"))
+        self.assertEqual(
+            list(self.renderer.pages), [self.path(self.content, "about.md")]
+        )
+
+    def test_handle_notifies_changed_page(self):
+        _, tom = self.live.connect("/base/blog/tom/")
+        _, home = self.live.connect("/base/")
+        src_path = self.path(self.content, "blog", "tom", "index.md")
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.renderer.render(src_path)
+        self.renderer.handle({src_path})
+        self.assertEqual(self.renderer.pages, {})
+        self.assertEqual(tom.get_nowait(), "reload")
+        self.assertTrue(home.empty())
+
+        self.renderer.handle({self.path(self.static, "index.css")})
+        self.assertEqual(home.get_nowait(), "reload")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import os
+import tempfile
+import unittest
+
+from manifest import hash_text, new_manifest, save_manifest
+from shard import (
+    assign_shards,
+    merge_manifests,
+    parse_shard,
+    shard_manifest_path,
+    sources_hash,
+)
+
+
+class TestParseShard(unittest.TestCase):
+    def test_valid(self):
+        self.assertEqual(parse_shard("2/4"), (2, 4))
+
+    def test_invalid(self):
+        for text in ("0/4", "5/4", "2", "a/b", "1/0"):
+            with self.assertRaises(ValueError):
+                parse_shard(text)
+
+    def test_manifest_path(self):
+        self.assertEqual(
+            shard_manifest_path(2, 4, ".cache/manifest.json"),
+            ".cache/manifest.shard-2-of-4.json",
+        )
+
+
+class TestAssignShards(unittest.TestCase):
+    def test_hash_is_stable_and_complete(self):
+        paths = [f"content/post{i}/index.md" for i in range(100)]
+        assigned = assign_shards(paths, 4)
+        self.assertEqual(assigned, assign_shards(list(reversed(paths)), 4))
+        self.assertEqual(set(assigned.values()), {1, 2, 3, 4})
+
+    def test_size_balances_bytes(self):
+        sizes = [90, 50, 40, 30, 20, 10]
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = []
+            for i, size in enumerate(sizes):
+                path = os.path.join(tmp, f"{i}.md")
+                with open(path, "w") as file:
+                    file.write("x" * size)
+                paths.append(path)
+            assigned = assign_shards(paths, 2, "size")
+        loads = {1: 0, 2: 0}
+        for path, size in zip(paths, sizes):
+            loads[assigned[path]] += size
+        self.assertEqual(loads, {1: 120, 2: 120})
+
+    def test_unknown_strategy(self):
+        with self.assertRaises(ValueError):
+            assign_shards([], 2, "random")
+
+
+class TestMergeManifests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.sources = ["content/a.md", "content/b.md", "content/c.md"]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_shard(self, index, count, assigned, built=None):
+        manifest = new_manifest()
+        manifest["static"] = ["index.css"]
+        manifest["files"] = {f"content/{index}.png": [f"docs/{index}.png"]}
+        for src_path in assigned if built is None else built:
+            output = os.path.join(self.tmp.name, os.path.basename(src_path) + ".html")
+            with open(output, "w") as file:
+                file.write(src_path)
+            manifest["pages"][src_path] = {
+                "key": "k",
+                "output": output,
+                "output_hash": hash_text(src_path),
+            }
+        manifest["shard"] = {
+            "index": index,
+            "count": count,
+            "strategy": "hash",
+            "sources": sources_hash(self.sources),
+            "assigned": assigned,
+        }
+        base = os.path.join(self.tmp.name, "manifest.json")
+        path = shard_manifest_path(index, count, base)
+        save_manifest(path, manifest)
+        return path
+
+    def test_merges_complete_shards(self):
+        paths = [
+            self.write_shard(1, 2, self.sources[:2]),
+            self.write_shard(2, 2, self.sources[2:]),
+        ]
+        merged = merge_manifests(paths, verify_outputs=True)
+        self.assertEqual(sorted(merged["pages"]), self.sources)
+        self.assertEqual(merged["static"], ["index.css"])
+        self.assertEqual(sorted(merged["files"]), ["content/1.png", "content/2.png"])
+        self.assertNotIn("shard", merged)
+
+    def test_missing_shard(self):
+        paths = [self.write_shard(1, 2, self.sources[:2])]
+        with self.assertRaisesRegex(ValueError, "missing shards: 2"):
+            merge_manifests(paths)
+
+    def test_failed_page(self):
+        paths = [
+            self.write_shard(1, 2, self.sources[:2], built=self.sources[:1]),
+            self.write_shard(2, 2, self.sources[2:]),
+        ]
+        with self.assertRaisesRegex(ValueError, "content/b.md was not generated"):
+            merge_manifests(paths)
+
+    def test_uncovered_pages(self):
+        paths = [
+            self.write_shard(1, 2, self.sources[:1]),
+            self.write_shard(2, 2, self.sources[2:]),
+        ]
+        with self.assertRaisesRegex(ValueError, "do not cover every page"):
+            merge_manifests(paths)
+
+    def test_verify_outputs(self):
+        paths = [
+            self.write_shard(1, 2, self.sources[:2]),
+            self.write_shard(2, 2, self.sources[2:]),
+        ]
+        os.remove(os.path.join(self.tmp.name, "c.md.html"))
+        with self.assertRaisesRegex(ValueError, "c.md.html of content/c.md is missing"):
+            merge_manifests(paths, verify_outputs=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
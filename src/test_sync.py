@@ -0,0 +1,180 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+import unittest.mock
+
+from changes import ChangeSet
+from manifest import hash_bytes
+from sync import (
+    sync_file,
+    sync_tree,
+    write_buffered_if_changed,
+    write_if_changed,
+    write_stream_if_changed,
+)
+from test_support import TempDirTestCase, write_file
+
+
+class TestSyncTree(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.src = os.path.join(self.root, "static")
+        self.dest = os.path.join(self.root, "docs")
+        write_file(os.path.join(self.src, "index.css"), "body {}")
+        write_file(os.path.join(self.src, "images", "a.png"), "png")
+
+    def sync(self, previous=(), **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            synced = sync_tree(self.src, self.dest, previous, **kwargs)
+        return synced, out.getvalue()
+
+    def test_copies_then_skips_unchanged(self):
+        synced, out = self.sync()
+        self.assertEqual(synced, ["index.css", os.path.join("images", "a.png")])
+        self.assertIn("static: 2 copied, 0 unchanged, 0 removed", out)
+
+        _, out = self.sync(synced)
+        self.assertIn("static: 0 copied, 2 unchanged, 0 removed", out)
+
+    def test_changed_file_is_copied(self):
+        synced, _ = self.sync()
+        write_file(os.path.join(self.src, "index.css"), "body { color: red }")
+        _, out = self.sync(synced)
+        self.assertIn("static: 1 copied, 1 unchanged", out)
+        with open(os.path.join(self.dest, "index.css")) as file:
+            self.assertEqual(file.read(), "body { color: red }")
+
+    def test_removes_only_orphans(self):
+        synced, _ = self.sync()
+        write_file(os.path.join(self.dest, "index.html"), "<html></html>")
+        os.remove(os.path.join(self.src, "images", "a.png"))
+        _, out = self.sync(synced)
+        self.assertIn("1 removed", out)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "images")))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "index.html")))
+
+    def test_keeps_static_dotfiles(self):
+        write_file(os.path.join(self.src, ".nojekyll"), "")
+        write_file(os.path.join(self.src, ".well-known", "security.txt"), "x")
+        write_file(os.path.join(self.src, ".ssgignore"), "*.tmp\n")
+        write_file(os.path.join(self.src, "upload.tmp"), "tmp")
+        synced, _ = self.sync()
+        self.assertIn(".nojekyll", synced)
+        self.assertIn(os.path.join(".well-known", "security.txt"), synced)
+        self.assertNotIn(".ssgignore", synced)
+        self.assertNotIn("upload.tmp", synced)
+        _, out = self.sync(synced)
+        self.assertIn("0 removed", out)
+
+    def test_hardlink(self):
+        self.sync(method="hardlink")
+        src_stat = os.stat(os.path.join(self.src, "index.css"))
+        dest_stat = os.stat(os.path.join(self.dest, "index.css"))
+        self.assertTrue(os.path.samestat(src_stat, dest_stat))
+
+    def test_reflink_falls_back_to_copy(self):
+        self.sync(method="reflink")
+        with open(os.path.join(self.dest, "images", "a.png")) as file:
+            self.assertEqual(file.read(), "png")
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            self.sync(method="teleport")
+
+
+class TestSyncFile(unittest.TestCase):
+    def test_checksum_skips_touched_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = os.path.join(tmp, "a.txt")
+            dest = os.path.join(tmp, "out", "a.txt")
+            write_file(src, "same")
+            self.assertTrue(sync_file(src, dest))
+            stat = os.stat(src)
+            os.utime(src, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+            self.assertFalse(sync_file(src, dest, checksum=True))
+            self.assertFalse(sync_file(src, dest))
+            self.assertEqual(os.stat(dest).st_mtime_ns, os.stat(src).st_mtime_ns)
+
+
+class TestWriteIfChanged(unittest.TestCase):
+    def test_skips_identical_bytes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "out", "index.html")
+            changes = ChangeSet()
+            self.assertTrue(write_if_changed(path, b"<p>one</p>", changes))
+            os.utime(path, ns=(0, 0))
+            self.assertFalse(write_if_changed(path, b"<p>one</p>", changes))
+            self.assertEqual(os.stat(path).st_mtime_ns, 0)
+            self.assertEqual(changes.to_dict()["added"], [path])
+
+            self.assertTrue(write_if_changed(path, b"<p>two</p>"))
+            with open(path, "rb") as file:
+                self.assertEqual(file.read(), b"<p>two</p>")
+            self.assertEqual(os.listdir(os.path.dirname(path)), ["index.html"])
+
+
+class TestWriteStreamIfChanged(unittest.TestCase):
+    def test_streams_and_skips_identical_output(self):
+        def stream(write):
+            for i in range(3):
+                write(f"<p>{i} é</p>")
+
+        expected = "".join(f"<p>{i} é</p>" for i in range(3)).encode("utf-8")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "out", "index.html")
+            changes = ChangeSet()
+            result = write_stream_if_changed(path, stream, changes)
+            self.assertEqual(result, (hash_bytes(expected), len(expected)))
+            with open(path, "rb") as file:
+                self.assertEqual(file.read(), expected)
+
+            os.utime(path, ns=(0, 0))
+            self.assertEqual(write_stream_if_changed(path, stream, changes), result)
+            self.assertEqual(os.stat(path).st_mtime_ns, 0)
+            self.assertEqual(changes.to_dict()["added"], [path])
+            self.assertEqual(changes.to_dict()["changed"], [])
+
+    def test_failed_stream_keeps_old_output(self):
+        def stream(write):
+            write("<p>partial")
+            raise ValueError("broken")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "index.html")
+            write_if_changed(path, b"<p>old</p>")
+            with self.assertRaises(ValueError):
+                write_stream_if_changed(path, stream)
+            with open(path, "rb") as file:
+                self.assertEqual(file.read(), b"<p>old</p>")
+            self.assertEqual(os.listdir(tmp), ["index.html"])
+
+
+
+class TestWriteBufferedIfChanged(TempDirTestCase):
+    def test_compares_before_writing(self):
+        def stream(write):
+            write("<p>one ")
+            write("é</p>")
+
+        path = os.path.join(self.root, "out", "index.html")
+        expected = "<p>one é</p>".encode("utf-8")
+        changes = ChangeSet()
+        result = write_buffered_if_changed(path, stream, changes)
+        self.assertEqual(result, (hash_bytes(expected), len(expected)))
+        with unittest.mock.patch("sync._replace_with_chunks") as replace:
+            self.assertEqual(write_buffered_if_changed(path, stream, changes), result)
+        replace.assert_not_called()
+        self.assertEqual(changes.to_dict()["added"], [path])
+
+        write_if_changed(path, b"<p>old</p>")
+        changes = ChangeSet()
+        write_buffered_if_changed(path, stream, changes)
+        with open(path, "rb") as file:
+            self.assertEqual(file.read(), expected)
+        self.assertEqual(changes.to_dict()["changed"], [path])
+        self.assertEqual(os.listdir(os.path.dirname(path)), ["index.html"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import os
+import tempfile
+import unittest
+
+from assets import AssetMap
+from htmlnode import LeafNode, ParentNode
+from template import compile_template, load_template
+
+
+class TestCompileTemplate(unittest.TestCase):
+    def test_render_slots(self):
+        template = compile_template("<title>{{ Title }}</title><p>{{ Content }}</p>")
+        self.assertEqual(
+            template.render(Title="Hi", Content="<b>x</b>"),
+            "<title>Hi</title><p><b>x</b></p>",
+        )
+
+    def test_repeated_and_spaced_slots(self):
+        template = compile_template("{{Title}}|{{  Title  }}")
+        self.assertEqual(template.render(Title="a"), "a|a")
+
+    def test_no_slots(self):
+        self.assertEqual(compile_template("plain").render(), "plain")
+
+    def test_stream_nodes_and_strings(self):
+        template = compile_template("<title>{{ Title }}</title>{{ Content }}")
+        chunks = []
+        template.stream(
+            chunks.append,
+            Title="Hi",
+            Content=ParentNode("p", [LeafNode("b", "x")]),
+        )
+        self.assertEqual("".join(chunks), "<title>Hi</title><p><b>x</b></p>")
+
+    def test_missing_variable(self):
+        template = compile_template("{{ Title }}")
+        with self.assertRaises(ValueError) as context:
+            template.render()
+        self.assertEqual(str(context.exception), "missing template variable: Title")
+
+    def test_basepath_applied_to_static_chunks_only(self):
+        template = compile_template(
+            '<link href="/index.css" /><img src="/a.png" />{{ Content }}',
+            basepath="/site/",
+        )
+        self.assertEqual(
+            template.render(Content='<a href="/raw">'),
+            '<link href="/site/index.css" /><img src="/site/a.png" /><a href="/raw">',
+        )
+
+    def test_partials(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, "head.html"), "w") as file:
+                file.write('<title>{{ Title }}</title><link href="/x.css" />')
+            template = compile_template(
+                "{{> head.html }}<body>{{ Content }}</body>", "/b/", tmp
+            )
+            self.assertEqual(
+                template.render(Title="T", Content="C"),
+                '<title>T</title><link href="/b/x.css" /><body>C</body>',
+            )
+            self.assertEqual(
+                template.dependencies, (os.path.join(tmp, "head.html"),)
+            )
+
+    def test_recursive_partial(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, "loop.html"), "w") as file:
+                file.write("{{> loop.html }}")
+            with self.assertRaises(ValueError):
+                compile_template("{{> loop.html }}", "/", tmp)
+
+
+class TestLoadTemplate(unittest.TestCase):
+    def test_cached_until_changed(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            with open(path, "w") as file:
+                file.write("one {{ Content }}")
+            first = load_template(path)
+            self.assertIs(first, load_template(path))
+
+            with open(path, "w") as file:
+                file.write("two and more {{ Content }}")
+            stat = os.stat(path)
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+            self.assertEqual(load_template(path).render(Content="!"), "two and more !")
+
+    def test_missing_file(self):
+        with self.assertRaises(ValueError):
+            load_template("does/not/exist.html")
+
+    def test_fingerprinted_assets(self):
+        assets = AssetMap({"index.css": "index.0123abcd.css"})
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            with open(path, "w") as file:
+                file.write(
+                    '<link href="/index.css?v=1"><img src="/logo.png">{{ Content }}'
+                )
+            template = load_template(path, "/site/", assets)
+            self.assertIsNot(template, load_template(path, "/site/"))
+            self.assertIs(template, load_template(path, "/site/", AssetMap(assets)))
+        self.assertEqual(
+            template.render(Content=""),
+            '<link href="/site/index.0123abcd.css?v=1"><img src="/site/logo.png">',
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
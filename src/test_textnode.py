@@ -1,6 +1,6 @@
 import unittest
 
-from textnode import TextNode, TextType
+from textnode import TextNode, TextType, resolve_url
 
 
 class TestTextNode(unittest.TestCase):
@@ -22,6 +22,9 @@ class TestTextNode(unittest.TestCase):
 
         self.assertEqual(node, node2)
 
+    def test_compact_node(self):
+        self.assertFalse(hasattr(TextNode("text", TextType.TEXT), "__dict__"))
+
     def test_not_eq_with_url(self):
         node = TextNode("This is a text node", TextType.BOLD, "test_url")
         node2 = TextNode("This is a text node", TextType.BOLD, "")
@@ -29,5 +32,17 @@ class TestTextNode(unittest.TestCase):
         self.assertNotEqual(node, node2)
 
 
+class TestResolveUrl(unittest.TestCase):
+    def test_root_relative(self):
+        self.assertEqual(resolve_url("/a/b", "/site/"), "/site/a/b")
+
+    def test_default_basepath(self):
+        self.assertEqual(resolve_url("/a/b"), "/a/b")
+
+    def test_other_urls_untouched(self):
+        self.assertEqual(resolve_url("https://x.org/a", "/site/"), "https://x.org/a")
+        self.assertEqual(resolve_url("a/b", "/site/"), "a/b")
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,319 @@
+import contextlib
+import io
+import os
+import unittest
+import unittest.mock
+
+from cache import BlockCache, FragmentCache
+from changes import ChangeSet
+from manifest import new_manifest, save_manifest
+from assets import AssetMap
+from metadata import MetadataIndex
+from profiler import Profiler
+from shard import merge_manifests, shard_manifest_path
+from test_support import TempDirTestCase, write_file
+from utils import generate_pages_recursive
+from walk import load_ignore_rules
+
+TEMPLATE = "<title>{{ Title }}</title><main>{{ Content }}</main>"
+
+
+def read_tree(root):
+    tree = {}
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            with open(path) as file:
+                tree[os.path.relpath(path, root)] = file.read()
+    return tree
+
+
+class TestGeneratePages(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.template = os.path.join(self.root, "template.html")
+        write_file(self.template, TEMPLATE)
+        for i in range(6):
+            write_file(
+                os.path.join(self.content, f"post{i}", "index.md"),
+                f"# Post {i}\n\nSome **bold** [link](/post{i}) text",
+            )
+
+    def build(self, dest, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(
+                self.content, self.template, dest, "/base/", **kwargs
+            )
+        return read_tree(dest)
+
+    def test_parallel_matches_serial(self):
+        serial = self.build(os.path.join(self.root, "serial"))
+        parallel = self.build(os.path.join(self.root, "parallel"), jobs=3)
+        self.assertEqual(len(serial), 6)
+        self.assertEqual(serial, parallel)
+        self.assertIn('<a href="/base/post0">link</a>', serial["post0/index.html"])
+
+    def test_pipeline_matches_serial(self):
+        serial = self.build(os.path.join(self.root, "serial"))
+        threaded = self.build(os.path.join(self.root, "threaded"), pipeline=True)
+        pooled = self.build(
+            os.path.join(self.root, "pooled"), pipeline=True, jobs=2, io_threads=2
+        )
+        self.assertEqual(serial, threaded)
+        self.assertEqual(serial, pooled)
+
+        blocks = BlockCache(os.path.join(self.root, "blocks.sqlite"))
+        cache = FragmentCache(os.path.join(self.root, "fragments"), blocks=blocks)
+        dest = os.path.join(self.root, "cached")
+        cached = self.build(dest, pipeline=True, cache=cache)
+        blocks.close()
+        self.assertEqual(serial, cached)
+
+    def test_pipeline_failures(self):
+        write_file(os.path.join(self.content, "post2", "index.md"), "no title")
+        with self.assertRaises(Exception) as context:
+            self.build(os.path.join(self.root, "out"), pipeline=True)
+        self.assertEqual(str(context.exception), "1 of 6 pages failed to generate")
+        with self.assertRaises(Exception) as context:
+            self.build(os.path.join(self.root, "out"), pipeline=True, fail_fast=True)
+        self.assertIn("post2", str(context.exception))
+
+    def test_profiler_records_pages(self):
+        profiler = Profiler()
+        self.build(os.path.join(self.root, "out"), jobs=2, profiler=profiler)
+        report = profiler.report()
+        self.assertEqual(report["pages_rendered"], 6)
+        self.assertEqual(
+            set(report["page_stages"]),
+            {"read", "template", "parse", "write"},
+        )
+        self.assertGreater(report["bytes_out"], report["bytes_in"])
+
+    def test_fragment_cache_reused(self):
+        cache = FragmentCache(os.path.join(self.root, "fragments"))
+        first = self.build(os.path.join(self.root, "first"), cache=cache)
+        self.assertEqual(len(cache.entries()), 6)
+
+        def fail(*args):
+            raise AssertionError("page was parsed again")
+
+        with unittest.mock.patch("utils.markdown_to_html_node", fail):
+            second = self.build(os.path.join(self.root, "second"), cache=cache)
+        self.assertEqual(first, second)
+
+    def test_block_cache_used_on_page_miss(self):
+        blocks = BlockCache(os.path.join(self.root, "blocks.sqlite"))
+        cache = FragmentCache(os.path.join(self.root, "fragments"), blocks=blocks)
+        first = self.build(os.path.join(self.root, "first"), cache=cache)
+        blocks.close()
+        uncached = self.build(os.path.join(self.root, "uncached"))
+        self.assertEqual(first, uncached)
+
+    def test_basepath_change_reuses_parsed_content(self):
+        cache = FragmentCache(os.path.join(self.root, "fragments"))
+        self.build(os.path.join(self.root, "first"), cache=cache)
+        fragments = len(cache.entries())
+        with unittest.mock.patch(
+            "cache.markdown_to_html_node", side_effect=AssertionError("re-parsed")
+        ), contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(
+                self.content, self.template, os.path.join(self.root, "root"), "/",
+                cache=cache,
+            )
+        self.assertEqual(len(cache.entries()), fragments)
+        tree = read_tree(os.path.join(self.root, "root"))
+        self.assertIn('<a href="/post0">link</a>', tree["post0/index.html"])
+
+    def test_targets_match_separate_builds(self):
+        staging = os.path.join(self.root, "staging")
+        production = os.path.join(self.root, "production")
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(
+                self.content, self.template, production, "/", jobs=2
+            )
+        expected = read_tree(production)
+        write_file(os.path.join(self.content, "post0", "notes.txt"), "asset")
+
+        manifest = new_manifest()
+        tree = self.build(staging, manifest=manifest, targets=[(production, "/")])
+        self.assertEqual(tree, self.build(os.path.join(self.root, "separate")))
+        expected["post0/notes.txt"] = "asset"
+        self.assertEqual(read_tree(production), expected)
+
+        os.remove(os.path.join(self.content, "post3", "index.md"))
+        self.build(staging, manifest=manifest, targets=[(production, "/")])
+        self.assertNotIn("post3/index.html", read_tree(production))
+        self.assertNotIn("post3/index.html", read_tree(staging))
+
+    def test_ignored_content_is_skipped(self):
+        write_file(os.path.join(self.content, "drafts", "index.md"), "# Draft")
+        write_file(os.path.join(self.content, ".notes.md"), "# Notes")
+        rules = load_ignore_rules(self.content, ["drafts/"])
+        tree = self.build(os.path.join(self.root, "out"), rules=rules)
+        self.assertEqual(len(tree), 6)
+        self.assertNotIn("drafts/index.html", tree)
+
+    def test_unchanged_outputs_are_not_rewritten(self):
+        dest = os.path.join(self.root, "out")
+        changes = ChangeSet()
+        self.build(dest, changes=changes)
+        self.assertEqual(len(changes.added), 6)
+
+        index = os.path.join(dest, "post0", "index.html")
+        os.utime(index, ns=(0, 0))
+        write_file(os.path.join(self.content, "post1", "index.md"), "# Changed")
+        os.remove(os.path.join(self.content, "post2", "index.md"))
+        manifest = new_manifest()
+        changes = ChangeSet()
+        self.build(dest, manifest=manifest, changes=changes, pipeline=True)
+        self.assertEqual(os.stat(index).st_mtime_ns, 0)
+        self.assertEqual(
+            changes.to_dict(),
+            {
+                "added": [],
+                "changed": [os.path.join(dest, "post1", "index.html")],
+                "removed": [],
+            },
+        )
+
+        changes = ChangeSet()
+        self.build(dest, manifest=manifest, changes=changes, jobs=2)
+        self.assertEqual(len(changes), 0)
+
+    def test_shards_stitch_into_full_build(self):
+        full = self.build(os.path.join(self.root, "full"))
+        for strategy in ("hash", "size"):
+            stitched = {}
+            paths = []
+            for index in (1, 2, 3):
+                manifest = new_manifest()
+                dest = os.path.join(self.root, f"{strategy}{index}")
+                tree = self.build(
+                    dest,
+                    manifest=manifest,
+                    shard=(index, 3),
+                    shard_strategy=strategy,
+                )
+                self.assertFalse(set(tree) & set(stitched))
+                stitched.update(tree)
+                path = shard_manifest_path(index, 3, os.path.join(dest, "m.json"))
+                save_manifest(path, manifest)
+                paths.append(path)
+            self.assertEqual(stitched, full)
+            merged = merge_manifests(paths, verify_outputs=True)
+            self.assertEqual(len(merged["pages"]), 6)
+
+    def test_failed_page_does_not_abort(self):
+        write_file(os.path.join(self.content, "post2", "index.md"), "no title")
+        dest = os.path.join(self.root, "out")
+        with self.assertRaises(Exception) as context:
+            self.build(dest, jobs=2)
+        self.assertEqual(str(context.exception), "1 of 6 pages failed to generate")
+        self.assertEqual(len(read_tree(dest)), 5)
+
+    def test_fail_fast(self):
+        write_file(os.path.join(self.content, "post0", "index.md"), "no title")
+        with self.assertRaises(Exception) as context:
+            self.build(os.path.join(self.root, "out"), fail_fast=True)
+        self.assertIn("post0", str(context.exception))
+
+    def test_incremental_skips_and_removes_stale(self):
+        dest = os.path.join(self.root, "out")
+        manifest = new_manifest()
+        self.build(dest, manifest=manifest)
+        self.assertEqual(len(manifest["pages"]), 6)
+
+        os.remove(os.path.join(self.content, "post5", "index.md"))
+        write_file(os.path.join(self.content, "post1", "index.md"), "# Changed")
+        old_mtime = os.stat(os.path.join(dest, "post0", "index.html")).st_mtime_ns
+        tree = self.build(dest, manifest=manifest)
+
+        self.assertEqual(len(manifest["pages"]), 5)
+        self.assertNotIn("post5/index.html", tree)
+        self.assertIn("<h1>Changed</h1>", tree["post1/index.html"])
+        new_mtime = os.stat(os.path.join(dest, "post0", "index.html")).st_mtime_ns
+        self.assertEqual(old_mtime, new_mtime)
+
+    def test_removed_content_files_are_removed(self):
+        dest = os.path.join(self.root, "out")
+        production = os.path.join(self.root, "production")
+        write_file(os.path.join(self.content, "images", "logo.png"), "png")
+        write_file(os.path.join(self.content, "post0", "notes.txt"), "notes")
+        manifest = new_manifest()
+        self.build(dest, manifest=manifest, targets=[(production, "/")])
+        self.assertIn("images/logo.png", read_tree(production))
+
+        os.remove(os.path.join(self.content, "images", "logo.png"))
+        os.remove(os.path.join(self.content, "post0", "notes.txt"))
+        self.build(dest, manifest=manifest, targets=[(production, "/")])
+        for root in (dest, production):
+            tree = read_tree(root)
+            self.assertNotIn("images/logo.png", tree)
+            self.assertNotIn("post0/notes.txt", tree)
+            self.assertIn("post0/index.html", tree)
+            self.assertFalse(os.path.exists(os.path.join(root, "images")))
+        self.assertEqual(manifest["files"], {})
+
+    def test_huge_pages_are_streamed(self):
+        write_file(
+            os.path.join(self.content, "post0", "index.md"),
+            "---\ntitle: Front\n---\n# Post 0\n\n```\ncode\n```\n\n[a](/a)",
+        )
+        normal = self.build(os.path.join(self.root, "normal"))
+        targets = [(os.path.join(self.root, "target"), "/other/")]
+        with unittest.mock.patch("utils.STREAM_THRESHOLD", 0):
+            streamed = self.build(os.path.join(self.root, "streamed"))
+            piped = self.build(os.path.join(self.root, "piped"), pipeline=True)
+            self.build(os.path.join(self.root, "multi"), targets=targets)
+        self.assertEqual(normal, streamed)
+        self.assertEqual(normal, piped)
+        self.assertIn("<title>Front</title>", streamed["post0/index.html"])
+        other = read_tree(os.path.join(self.root, "target"))
+        self.assertIn('<a href="/other/a">a</a>', other["post0/index.html"])
+
+    def test_fingerprinted_asset_references(self):
+        write_file(
+            os.path.join(self.content, "post0", "index.md"),
+            "# Post 0\n\n![logo](/logo.png) [css](/index.css?x) `/logo.png`",
+        )
+        write_file(self.template, '<link href="/index.css">{{ Content }}')
+        assets = AssetMap({"logo.png": "logo.1234.png", "index.css": "index.99.css"})
+        dest = os.path.join(self.root, "out")
+        manifest = new_manifest()
+        html = self.build(dest, manifest=manifest, assets=assets)["post0/index.html"]
+        self.assertIn('<link href="/base/index.99.css">', html)
+        self.assertIn('<img src="/base/logo.1234.png" alt="logo">', html)
+        self.assertIn('<a href="/base/index.99.css?x">css</a>', html)
+        self.assertIn("<code>/logo.png</code>", html)
+        with unittest.mock.patch("utils.STREAM_THRESHOLD", 0):
+            streamed = self.build(os.path.join(self.root, "streamed"), assets=assets)
+        self.assertEqual(streamed["post0/index.html"], html)
+
+        assets = AssetMap({"logo.png": "logo.5678.png"})
+        html = self.build(dest, manifest=manifest, assets=assets)["post0/index.html"]
+        self.assertIn('<img src="/base/logo.5678.png" alt="logo">', html)
+
+    def test_listings_from_front_matter(self):
+        dest = os.path.join(self.root, "out")
+        write_file(
+            os.path.join(self.content, "post0", "index.md"),
+            "---\ntitle: First\ndate: 2024-01-01\ntags: [news]\n---\n# Heading",
+        )
+        index = MetadataIndex(os.path.join(self.root, "index.sqlite"))
+        manifest = new_manifest()
+        tree = self.build(dest, manifest=manifest, index=index)
+        self.assertIn("<title>First</title>", tree["post0/index.html"])
+        self.assertNotIn("---", tree["post0/index.html"])
+        self.assertIn('<a href="/base/post0/">First</a>', tree["posts/index.html"])
+        self.assertIn("tags/news/index.html", tree)
+
+        write_file(os.path.join(self.content, "post0", "index.md"), "# Undated")
+        tree = self.build(dest, manifest=manifest, index=index)
+        index.close()
+        self.assertNotIn("tags/news/index.html", tree)
+        self.assertIn("No posts yet.", tree["posts/index.html"])
+
+
+if __name__ == "__main__":
+    unittest.main()
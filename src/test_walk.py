@@ -0,0 +1,94 @@
+import os
+import sys
+import unittest
+
+from test_support import TempDirTestCase
+from walk import IGNORE_FILE, IgnoreRules, load_ignore_rules, walk_files
+
+
+def touch(root, rel_path, text=""):
+    path = os.path.join(root, rel_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as file:
+        file.write(text)
+
+
+class TestIgnoreRules(unittest.TestCase):
+    def test_unanchored_matches_any_depth(self):
+        rules = IgnoreRules(["*.draft.md"])
+        self.assertTrue(rules.ignored("post.draft.md"))
+        self.assertTrue(rules.ignored("blog/post.draft.md"))
+        self.assertFalse(rules.ignored("blog/post.md"))
+
+    def test_anchored_matches_from_root(self):
+        rules = IgnoreRules(["/drafts", "blog/tmp"])
+        self.assertTrue(rules.ignored("drafts", True))
+        self.assertFalse(rules.ignored("blog/drafts", True))
+        self.assertTrue(rules.ignored("blog/tmp", True))
+        self.assertFalse(rules.ignored("old/blog/tmp", True))
+
+    def test_directory_only(self):
+        rules = IgnoreRules(["build/"])
+        self.assertTrue(rules.ignored("build", True))
+        self.assertFalse(rules.ignored("build", False))
+
+    def test_negation_last_match_wins(self):
+        rules = IgnoreRules([".*", "!.well-known"])
+        self.assertTrue(rules.ignored(".git", True))
+        self.assertFalse(rules.ignored(".well-known", True))
+
+    def test_double_star_and_classes(self):
+        rules = IgnoreRules(["notes/**/*.txt", "v[0-9].md", "# comment", ""])
+        self.assertTrue(rules.ignored("notes/a.txt"))
+        self.assertTrue(rules.ignored("notes/a/b/c.txt"))
+        self.assertTrue(rules.ignored("v1.md"))
+        self.assertFalse(rules.ignored("vx.md"))
+        self.assertEqual(len(rules.rules), 2)
+
+    def test_excludes_checks_parents(self):
+        rules = IgnoreRules(["drafts/"])
+        self.assertTrue(rules.excludes("drafts/post/index.md"))
+        self.assertFalse(rules.excludes("blog/index.md"))
+
+
+class TestWalkFiles(TempDirTestCase):
+    def rel_paths(self, rules=None):
+        return [rel_path for _, rel_path in walk_files(self.root, rules)]
+
+    def test_files_before_subdirectories_sorted(self):
+        for rel_path in ["b.md", "a/z.md", "a/b/c.md", "c/d.md", "a.md"]:
+            touch(self.root, rel_path)
+        self.assertEqual(
+            self.rel_paths(), ["a.md", "b.md", "a/z.md", "a/b/c.md", "c/d.md"]
+        )
+
+    def test_ignore_file_and_dotfiles(self):
+        for rel_path in ["index.md", ".hidden", ".git/config", "drafts/x.md"]:
+            touch(self.root, rel_path)
+        touch(self.root, IGNORE_FILE, "# local rules\ndrafts/\n")
+        self.assertEqual(self.rel_paths(), ["index.md"])
+
+    def test_extra_patterns(self):
+        touch(self.root, "keep.md")
+        touch(self.root, "post.draft.md")
+        touch(self.root, ".well-known/security.txt")
+        rules = load_ignore_rules(self.root, ["*.draft.md", "!.well-known/"])
+        self.assertEqual(
+            self.rel_paths(rules), ["keep.md", ".well-known/security.txt"]
+        )
+
+    def test_deep_tree_is_not_recursive(self):
+        path = os.path.join(self.root, *(["d"] * 300))
+        os.makedirs(path)
+        touch(path, "leaf.md")
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(200)
+        try:
+            rel_paths = self.rel_paths()
+        finally:
+            sys.setrecursionlimit(limit)
+        self.assertEqual(len(rel_paths), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
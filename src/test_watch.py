@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+
+from test_support import TempDirTestCase, write_file
+from watch import InotifyWatcher, PollingWatcher, create_watcher
+
+
+class WatcherTests:
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.template = os.path.join(self.root, "template.html")
+        write_file(os.path.join(self.content, "index.md"), "# Home")
+        write_file(self.template, "{{ Content }}")
+        write_file(os.path.join(self.root, "other.txt"), "ignored")
+        self.watcher = self.create([self.content], [self.template])
+
+    def tearDown(self):
+        self.watcher.close()
+
+    def test_reports_modified_file(self):
+        path = os.path.join(self.content, "index.md")
+        write_file(path, "# Changed title")
+        self.assertIn(os.path.normpath(path), self.watcher.wait(timeout=2))
+
+    def test_reports_new_nested_file(self):
+        path = os.path.join(self.content, "blog", "post", "index.md")
+        write_file(path, "# Post")
+        changed = self.watcher.wait(timeout=2)
+        changed |= self.watcher.wait(timeout=0.5)
+        self.assertIn(os.path.normpath(path), changed)
+
+    def test_watched_file_outside_trees(self):
+        write_file(os.path.join(self.root, "other.txt"), "still ignored")
+        write_file(self.template, "<main>{{ Content }}</main>")
+        changed = self.watcher.wait(timeout=2)
+        self.assertEqual(changed, {os.path.normpath(self.template)})
+
+    def test_timeout_without_changes(self):
+        self.assertEqual(self.watcher.wait(timeout=0.1), set())
+
+
+class TestPollingWatcher(WatcherTests, TempDirTestCase):
+    def create(self, directories, files):
+        return PollingWatcher(directories, files, interval=0.01)
+
+
+class TestInotifyWatcher(WatcherTests, TempDirTestCase):
+    def create(self, directories, files):
+        try:
+            return InotifyWatcher(directories, files)
+        except OSError:
+            self.skipTest("inotify is not available")
+
+
+class TestCreateWatcher(unittest.TestCase):
+    def test_poll_forces_polling(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.assertIsInstance(create_watcher([tmp], poll=True), PollingWatcher)
+
+
+if __name__ == "__main__":
+    unittest.main()
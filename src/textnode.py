@@ -2,6 +2,9 @@ from htmlnode import LeafNode
 from enum import Enum
 
 
+URL_MARK = "\0"
+
+
 class TextType(Enum):
     TEXT = "text"
     BOLD = "bold"
@@ -12,6 +15,8 @@ class TextType(Enum):
 
 
 class TextNode:
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text, text_type, url=None):
         self.text = text
         self.text_type = text_type
@@ -30,7 +35,13 @@ class TextNode:
         return f"{type(self).__name__}({self.text}, {self.text_type.value}, {self.url})"
 
 
-def text_node_to_html_node(text_node: TextNode):
+def resolve_url(url, basepath="/"):
+    if basepath != "/" and url.startswith("/"):
+        return basepath + url[1:]
+    return url
+
+
+def text_node_to_html_node(text_node: TextNode, basepath="/"):
     match text_node.text_type:
         case TextType.TEXT:
             return LeafNode(None, text_node.text)
@@ -41,8 +52,9 @@ def text_node_to_html_node(text_node: TextNode):
         case TextType.CODE:
             return LeafNode("code", text_node.text)
         case TextType.LINK:
-            return LeafNode("a", text_node.text, {"href": text_node.url})
+            return LeafNode("a", text_node.text, {"href": resolve_url(text_node.url, basepath)})
         case TextType.IMAGE:
-            return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
+            src = resolve_url(text_node.url, basepath)
+            return LeafNode("img", "", {"src": src, "alt": text_node.text})
         case _:
             raise Exception("Incorrect Type")
@@ -1,28 +1,44 @@
+import contextlib
 import os
 import shutil
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 
-from blocks import extract_title, markdown_to_html_node
+from assets import fingerprint_parts
+from blocks import MarkdownStream, extract_title, first_heading, markdown_to_html_node
+from changes import ChangeSet
+from frontmatter import read_front_matter, split_front_matter
+from manifest import hash_file, hash_text, page_key
+from metadata import DEFAULT_PER_PAGE, build_listings
+from pipeline import Stage, run_pipeline
+from profiler import NULL_TIMER, page_timer
+from shard import assign_shards, sources_hash
+from sync import (
+    prune_empty_dirs,
+    sync_file,
+    sync_tree,
+    write_buffered_if_changed,
+    write_if_changed,
+    write_stream_if_changed,
+)
+from template import load_template
+from textnode import URL_MARK
+from walk import walk_files
 
+STREAM_THRESHOLD = 16 * 1024 * 1024
 
-def clean_copy(source, destination):
+
+def clean_copy(source, destination, method="copy", rules=None, changes=None):
     if os.path.exists(destination):
+        if changes is not None:
+            for dirpath, _, filenames in os.walk(destination):
+                for name in filenames:
+                    changes.record_removal(os.path.join(dirpath, name))
         shutil.rmtree(destination)
     os.mkdir(destination)
-
-    def recursive_copy(source, destination):
-        for item in os.listdir(source):
-            src_path = os.path.join(source, item)
-            dest_path = os.path.join(destination, item)
-
-            if os.path.isfile(src_path):
-                shutil.copy(src_path, dest_path)
-                print(f"copied file: {src_path} -> {dest_path}")
-            else:
-                os.mkdir(dest_path)
-                print(f"created directory: {dest_path}/")
-                recursive_copy(src_path, dest_path)
-
-    recursive_copy(source, destination)
+    return sync_tree(
+        source, destination, method=method, rules=rules, changes=changes
+    )
 
 
 def read_if_valid(path):
@@ -35,48 +51,543 @@ def read_if_valid(path):
         return file.read()
 
 
-def generate_page(src_path, template_path, dest_path, basepath):
-    print(f"Generating page from {src_path} to {dest_path} using {template_path}")
-    md_file = read_if_valid(src_path)
-    tmpl_file = read_if_valid(template_path)
-    content = markdown_to_html_node(md_file).to_html()
-    title = extract_title(md_file)
-
-    final_html = tmpl_file.replace(
-        "{{ Title }}", title
-    ).replace(
-        "{{ Content }}", content
-    ).replace(
-        "href=\"/",
-        f"href=\"{basepath}"
-    ).replace(
-        "src=\"/",
-        f"src=\"{basepath}"
-    )
+def generate_page(
+    src_path,
+    template_path,
+    dest_path,
+    basepath,
+    record=None,
+    cache=None,
+    changes=None,
+):
+    return generate_page_targets(
+        src_path, template_path, [(dest_path, basepath)], record, cache, changes
+    )[0]
+
+
+def serialize(template, **values):
+    chunks = []
+    template.stream(chunks.append, **values)
+    return "".join(chunks).encode("utf-8")
+
 
-    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+def write_output(template, dest_path, timer=NULL_TIMER, changes=None, **values):
+    with timer.stage("write"):
+        output_hash, size = write_buffered_if_changed(
+            dest_path, partial(template.stream, **values), changes
+        )
+    timer.add_bytes(size)
+    return output_hash
 
-    with open(dest_path, "w") as file:
-        file.write(final_html)
 
+def generate_page_targets(
+    src_path,
+    template_path,
+    targets,
+    record=None,
+    cache=None,
+    changes=None,
+    assets=None,
+):
+    dest_paths = ", ".join(dest_path for dest_path, _ in targets)
+    print(f"Generating page from {src_path} to {dest_paths} using {template_path}")
+    timer = page_timer(record)
+    if is_huge(src_path):
+        output_hashes = stream_page(
+            src_path, template_path, targets, timer, changes, assets
+        )
+    else:
+        md_file = read_page(src_path, timer)
+        title, parts = render_content(md_file, cache, timer)
+        output_hashes = write_targets(
+            template_path, targets, title, parts, timer, changes, assets
+        )
+    if record is not None:
+        record["bytes_in"] = os.path.getsize(src_path)
+    return output_hashes
 
-def generate_pages_recursive(content_dir, template_path, destination_dir, basepath):
-    for curr in os.listdir(content_dir):
-        full_path = os.path.join(content_dir, curr)
-        dest_path = os.path.join(destination_dir, curr)
-        if os.path.isfile(full_path):
-            if dest_path.endswith(".md"):
-                dest_path = dest_path[:-3] + '.html'
-                generate_page(full_path, template_path, dest_path, basepath)
-            else:
-                os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-                shutil.copy(full_path, dest_path)
+
+def read_page(src_path, timer=NULL_TIMER):
+    with timer.stage("read"):
+        return read_if_valid(src_path).replace(URL_MARK, "\ufffd")
+
+
+def render_content(md_file, cache=None, timer=NULL_TIMER):
+    with timer.stage("parse"):
+        title, body = split_page(md_file)
+        if cache is None:
+            content = markdown_to_html_node(body, URL_MARK).to_html()
         else:
-            generate_pages_recursive(full_path, template_path, dest_path, basepath)
+            content = cache.render(body)
+        return title, content.split(URL_MARK)
+
+
+def split_page(md_file):
+    meta, body = split_front_matter(md_file)
+    if "title" in meta:
+        return str(meta["title"]), body
+    return extract_title(body), body
+
+
+def write_targets(
+    template_path, targets, title, parts, timer=NULL_TIMER, changes=None, assets=None
+):
+    parts = fingerprint_parts(parts, assets)
+    output_hashes = []
+    for dest_path, basepath in targets:
+        with timer.stage("template"):
+            template = load_template(template_path, basepath, assets)
+        output_hashes.append(
+            write_output(
+                template,
+                dest_path,
+                timer,
+                changes,
+                Title=title,
+                Content=JoinedParts(parts, basepath),
+            )
+        )
+    return output_hashes
+
+
+def is_huge(src_path):
+    try:
+        return os.path.getsize(src_path) >= STREAM_THRESHOLD
+    except OSError:
+        return False
+
+
+def stream_page(
+    src_path, template_path, targets, timer=NULL_TIMER, changes=None, assets=None
+):
+    with timer.stage("read"):
+        with open(src_path, "r") as file:
+            meta, lines = read_front_matter(file)
+            title = str(meta["title"]) if "title" in meta else first_heading(lines)
+    output_hashes = []
+    for dest_path, basepath in targets:
+        with timer.stage("template"):
+            template = load_template(template_path, basepath, assets)
+        with timer.stage("stream"):
+            with open(src_path, "r") as file:
+                _, lines = read_front_matter(file)
+                if assets:
+                    lines = (line.replace(URL_MARK, "\ufffd") for line in lines)
+                    content = AssetStream(
+                        MarkdownStream(lines, URL_MARK), basepath, assets
+                    )
+                else:
+                    content = MarkdownStream(lines, basepath)
+                output_hash, size = write_stream_if_changed(
+                    dest_path,
+                    partial(template.stream, Title=title, Content=content),
+                    changes,
+                )
+        timer.add_bytes(size)
+        output_hashes.append(output_hash)
+    return output_hashes
+
+
+class JoinedParts:
+    def __init__(self, parts, separator):
+        self.parts = parts
+        self.separator = separator
+
+    def write_html(self, write):
+        write(self.parts[0])
+        for part in self.parts[1:]:
+            write(self.separator)
+            write(part)
+
+
+class AssetStream:
+    def __init__(self, stream, basepath, assets):
+        self.stream = stream
+        self.basepath = basepath
+        self.assets = assets
+
+    def write_html(self, write):
+        def rewrite(html):
+            parts = fingerprint_parts(html.split(URL_MARK), self.assets)
+            write(self.basepath.join(parts))
+
+        self.stream.write_html(rewrite)
+
+
+def target_path(path, destination_dir, target_dir):
+    return os.path.join(target_dir, os.path.relpath(path, destination_dir))
+
+
+def discover_pages(content_dir, destination_dir, rules=None):
+    pages = []
+    files = []
+    for src_path, rel_path in walk_files(content_dir, rules):
+        dest_path = os.path.join(destination_dir, rel_path)
+        if dest_path.endswith(".md"):
+            pages.append((src_path, dest_path[:-3] + ".html"))
+        else:
+            files.append((src_path, dest_path))
+    return pages, files
+
+
+def generate_pages_recursive(
+    content_dir,
+    template_path,
+    destination_dir,
+    basepath,
+    manifest=None,
+    jobs=1,
+    fail_fast=False,
+    profiler=None,
+    cache=None,
+    targets=(),
+    pipeline=False,
+    io_threads=4,
+    rules=None,
+    changes=None,
+    shard=None,
+    shard_strategy="hash",
+    index=None,
+    site_url=None,
+    per_page=DEFAULT_PER_PAGE,
+    assets=None,
+):
+    timer = profiler or NULL_TIMER
+    with timer.stage("discover"):
+        pages, files = discover_pages(content_dir, destination_dir, rules)
+        all_pages = pages
+        all_sources = {src_path for src_path, _ in pages}
+        all_files = {src_path for src_path, _ in files}
+        if shard is not None:
+            pages = shard_items(pages, *shard, shard_strategy)
+            files = shard_items(files, *shard, shard_strategy)
+    new_files = {}
+    with timer.stage("copy"):
+        for src_path, dest_path in files:
+            sync_file(src_path, dest_path, changes=changes)
+            outputs = [dest_path]
+            for target_dir, _ in targets:
+                target_dest = target_path(dest_path, destination_dir, target_dir)
+                sync_file(src_path, target_dest, changes=changes)
+                outputs.append(target_dest)
+            new_files[src_path] = outputs
+
+    old_pages = manifest["pages"] if manifest is not None else {}
+    old_files = manifest.get("files", {}) if manifest is not None else {}
+    if shard is not None:
+        old_pages = shard_entries(old_pages, pages, all_sources)
+        old_files = shard_entries(old_files, files, all_files)
+    new_pages = {}
+    pending = []
+    with timer.stage("check"):
+        template_hash = None
+        if manifest is not None:
+            template = load_template(template_path, basepath)
+            template_hash = hash_text(
+                "".join(hash_file(path) for path in template.dependencies)
+                + (assets.digest if assets else "")
+            )
+        basepaths = "\0".join([basepath] + [target[1] for target in targets])
+        for src_path, dest_path in pages:
+            key = None
+            extra = [
+                (target_path(dest_path, destination_dir, target_dir), target_basepath)
+                for target_dir, target_basepath in targets
+            ]
+            if manifest is not None:
+                key = page_key(hash_file(src_path), template_hash, basepaths)
+                entry = old_pages.get(src_path)
+                if (
+                    entry is not None
+                    and entry["key"] == key
+                    and entry["output"] == dest_path
+                    and os.path.isfile(dest_path)
+                    and all(os.path.isfile(path) for path, _ in extra)
+                ):
+                    new_pages[src_path] = entry
+                    continue
+            pending.append((src_path, dest_path, key, extra))
+
+    if manifest is not None:
+        print(f"{len(new_pages)} of {len(pages)} pages up to date")
+
+    failures = []
+    profile = profiler is not None
+    jobs_list = [
+        (src, template_path, dest, basepath, profile, cache, extra, assets)
+        for src, dest, _, extra in pending
+    ]
+    with timer.stage("render"):
+        if pipeline:
+            results = render_pages_pipelined(jobs_list, jobs, fail_fast, io_threads)
+        else:
+            results = render_pages(jobs_list, jobs, fail_fast)
+    for (src_path, dest_path, key, extra), result in zip(pending, results):
+        output_hashes, error, record, page_changes = result
+        if record is not None:
+            profiler.add_page(record)
+        if changes is not None:
+            changes.update(page_changes)
+        if error is not None:
+            print(f"failed to generate page {src_path}: {error}")
+            failures.append(src_path)
+            if src_path in old_pages:
+                new_pages[src_path] = old_pages[src_path]
+            continue
+        entry = {"key": key, "output": dest_path, "output_hash": output_hashes[0]}
+        if extra:
+            entry["targets"] = {
+                path: target_hash
+                for (path, _), target_hash in zip(extra, output_hashes[1:])
+            }
+        new_pages[src_path] = entry
+
+    generated = []
+    if index is not None and (shard is None or shard[0] == 1):
+        with timer.stage("listings"):
+            generated = generate_listings(
+                index,
+                all_pages,
+                template_path,
+                destination_dir,
+                basepath,
+                targets,
+                site_url,
+                per_page,
+                changes,
+                assets,
+            )
+
+    if manifest is not None:
+        remove_stale_outputs(old_pages, new_pages, changes)
+        directories = [destination_dir] + [target[0] for target in targets]
+        remove_stale_files(old_files, new_files, directories, changes)
+        manifest["files"] = new_files
+        remove_stale_generated(manifest.get("generated", ()), generated, changes)
+        manifest["generated"] = generated
+        manifest["pages"] = new_pages
+        if shard is not None:
+            manifest["shard"] = {
+                "index": shard[0],
+                "count": shard[1],
+                "strategy": shard_strategy,
+                "sources": sources_hash(all_sources),
+                "assigned": sorted(src_path for src_path, _ in pages),
+            }
+    if cache is not None:
+        with timer.stage("evict"):
+            cache.evict()
+
+    if failures:
+        raise Exception(f"{len(failures)} of {len(pages)} pages failed to generate")
+
+
+def generate_listings(
+    index,
+    pages,
+    template_path,
+    destination_dir,
+    basepath,
+    targets=(),
+    site_url=None,
+    per_page=DEFAULT_PER_PAGE,
+    changes=None,
+    assets=None,
+):
+    updated, removed = index.update(pages, destination_dir)
+    print(f"metadata index: {updated} pages updated, {removed} removed")
+    page_outputs = {
+        os.path.relpath(dest_path, destination_dir) for _, dest_path in pages
+    }
+    generated = []
+    for target_dir, target_basepath in [(destination_dir, basepath), *targets]:
+        template = load_template(template_path, target_basepath, assets)
+
+        def render(title, content):
+            return serialize(template, Title=title, Content=content)
+
+        outputs = build_listings(index, render, target_basepath, site_url, per_page)
+        for rel_path, data in outputs.items():
+            if os.path.normpath(rel_path) in page_outputs:
+                print(f"skipping generated {rel_path}: a content page has that path")
+                continue
+            path = os.path.join(target_dir, rel_path)
+            write_if_changed(path, data, changes)
+            generated.append(path)
+    return generated
+
+
+def remove_stale_generated(old_generated, generated, changes=None):
+    live = set(generated)
+    for path in old_generated:
+        if path in live or not os.path.isfile(path):
+            continue
+        os.remove(path)
+        if changes is not None:
+            changes.record_removal(path)
+        print(f"removed stale generated page: {path}")
+
+
+def shard_items(items, index, count, strategy="hash"):
+    assigned = assign_shards([src_path for src_path, _ in items], count, strategy)
+    return [item for item in items if assigned[item[0]] == index]
+
+
+def shard_entries(entries, items, all_sources):
+    shard_sources = {src_path for src_path, _ in items}
+    return {
+        src_path: entry
+        for src_path, entry in entries.items()
+        if src_path in shard_sources or src_path not in all_sources
+    }
+
+
+def render_pages(jobs_list, jobs=1, fail_fast=False):
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+    if jobs <= 1 or len(jobs_list) <= 1:
+        results = map(_render_job, jobs_list)
+        return _check_results(jobs_list, results, fail_fast, None)
+
+    chunksize = max(1, len(jobs_list) // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        results = executor.map(_render_job, jobs_list, chunksize=chunksize)
+        return _check_results(jobs_list, results, fail_fast, executor)
+
+
+def render_pages_pipelined(jobs_list, jobs=1, fail_fast=False, io_threads=4):
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+    executor = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+
+    def read(page):
+        src_path, template_path, dest_path, _, _, _, extra, _ = page["job"]
+        dest_paths = ", ".join([dest_path] + [path for path, _ in extra])
+        print(f"Generating page from {src_path} to {dest_paths} using {template_path}")
+        if is_huge(src_path):
+            page["stream"] = True
+        else:
+            page["markdown"] = read_page(src_path, page["timer"])
+        return page
+
+    def render(page):
+        if page.get("stream"):
+            return page
+        cache = page["job"][5]
+        markdown = page.pop("markdown")
+        if executor is None:
+            page["content"] = render_content(markdown, cache, page["timer"])
+        else:
+            with page["timer"].stage("parse"):
+                future = executor.submit(render_content, markdown, cache)
+                page["content"] = future.result()
+        return page
+
+    def write(page):
+        src_path, template_path, dest_path, basepath, _, _, extra, assets = page["job"]
+        targets = [(dest_path, basepath)] + extra
+        timer = page["timer"]
+        if page.get("stream"):
+            page["hashes"] = stream_page(
+                src_path, template_path, targets, timer, page["changes"], assets
+            )
+        else:
+            title, parts = page.pop("content")
+            page["hashes"] = write_targets(
+                template_path, targets, title, parts, timer, page["changes"], assets
+            )
+        if page["record"] is not None:
+            page["record"]["bytes_in"] = os.path.getsize(src_path)
+        return page
+
+    def pages():
+        for job in jobs_list:
+            record = {"page": job[0], "output": job[2]} if job[4] else None
+            yield {
+                "job": job,
+                "record": record,
+                "timer": page_timer(record),
+                "changes": ChangeSet(),
+            }
+
+    stages = [
+        Stage("read", read, io_threads),
+        Stage("render", render, max(1, jobs)),
+        Stage("write", write, io_threads),
+    ]
+    results = [None] * len(jobs_list)
+    try:
+        with contextlib.closing(run_pipeline(pages(), stages)) as entries:
+            for index, page, error in entries:
+                if error is None:
+                    results[index] = (
+                        page["hashes"],
+                        None,
+                        page["record"],
+                        page["changes"],
+                    )
+                    continue
+                error = f"{type(error).__name__}: {error}"
+                if fail_fast:
+                    raise Exception(
+                        f"failed to generate page {jobs_list[index][0]}: {error}"
+                    )
+                results[index] = (None, error, page["record"], page["changes"])
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    return results
+
 
+def _render_job(job):
+    src_path, template_path, dest_path, basepath, profile, cache, extra, assets = job
+    record = {"page": src_path, "output": dest_path} if profile else None
+    changes = ChangeSet()
+    try:
+        targets = [(dest_path, basepath)] + extra
+        output_hashes = generate_page_targets(
+            src_path, template_path, targets, record, cache, changes, assets
+        )
+        return output_hashes, None, record, changes
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}", record, changes
 
 
+def _check_results(jobs_list, results, fail_fast, executor):
+    checked = []
+    for job, result in zip(jobs_list, results):
+        if fail_fast and result[1] is not None:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+            raise Exception(f"failed to generate page {job[0]}: {result[1]}")
+        checked.append(result)
+    return checked
 
 
+def remove_stale_outputs(old_pages, new_pages, changes=None):
+    live_outputs = set()
+    for entry in new_pages.values():
+        live_outputs.add(entry["output"])
+        live_outputs.update(entry.get("targets", ()))
+    for src_path, entry in old_pages.items():
+        for output in [entry["output"], *entry.get("targets", ())]:
+            if output in live_outputs or not os.path.isfile(output):
+                continue
+            os.remove(output)
+            if changes is not None:
+                changes.record_removal(output)
+            print(f"removed stale output: {output} (source {src_path} is gone)")
 
 
+def remove_stale_files(old_files, new_files, directories, changes=None):
+    live = {path for outputs in new_files.values() for path in outputs}
+    for src_path, outputs in old_files.items():
+        for path in outputs:
+            if path in live or not os.path.isfile(path):
+                continue
+            os.remove(path)
+            if changes is not None:
+                changes.record_removal(path)
+            print(f"removed orphaned file: {path} (source {src_path} is gone)")
+            for directory in directories:
+                prune_empty_dirs(os.path.dirname(path), directory)
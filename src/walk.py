@@ -0,0 +1,114 @@
+import os
+import re
+
+IGNORE_FILE = ".ssgignore"
+DEFAULT_IGNORE = (".*",)
+STATIC_IGNORE = ("/" + IGNORE_FILE,)
+
+
+class IgnoreRules:
+    def __init__(self, patterns=()):
+        self.rules = []
+        for pattern in patterns:
+            self.add(pattern)
+
+    def add(self, pattern):
+        pattern = pattern.strip()
+        if not pattern or pattern.startswith("#"):
+            return
+        negate = pattern.startswith("!")
+        if negate:
+            pattern = pattern[1:]
+        dir_only = pattern.endswith("/")
+        pattern = pattern.rstrip("/")
+        anchored = "/" in pattern
+        regex = translate(pattern.lstrip("/"))
+        if not anchored:
+            regex = "(?:.*/)?" + regex
+        self.rules.append((re.compile(regex + r"\Z"), negate, dir_only))
+
+    def ignored(self, rel_path, is_dir=False):
+        ignored = False
+        for regex, negate, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel_path):
+                ignored = not negate
+        return ignored
+
+    def excludes(self, rel_path, is_dir=False):
+        parts = rel_path.split("/")
+        for i in range(1, len(parts)):
+            if self.ignored("/".join(parts[:i]), True):
+                return True
+        return self.ignored(rel_path, is_dir)
+
+
+def translate(pattern):
+    regex = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith("**/", i):
+            regex.append("(?:.*/)?")
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            regex.append(".*")
+            i += 2
+            continue
+        if char == "*":
+            regex.append("[^/]*")
+        elif char == "?":
+            regex.append("[^/]")
+        elif char == "[" and "]" in pattern[i + 2 :]:
+            end = pattern.index("]", i + 2)
+            body = pattern[i + 1 : end]
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            regex.append(f"[{body}]")
+            i = end
+        elif char == "\\" and i + 1 < len(pattern):
+            i += 1
+            regex.append(re.escape(pattern[i]))
+        else:
+            regex.append(re.escape(char))
+        i += 1
+    return "".join(regex)
+
+
+def load_ignore_rules(root, extra=(), defaults=DEFAULT_IGNORE):
+    rules = IgnoreRules(defaults)
+    path = os.path.join(root, IGNORE_FILE)
+    if os.path.isfile(path):
+        with open(path, "r") as file:
+            for line in file:
+                rules.add(line)
+    for pattern in extra:
+        rules.add(pattern)
+    return rules
+
+
+def walk_files(root, rules=None):
+    if rules is None:
+        rules = load_ignore_rules(root)
+    stack = [(_scan(root), "")]
+    while stack:
+        entries, prefix = stack[-1]
+        entry = next(entries, None)
+        if entry is None:
+            stack.pop()
+            continue
+        rel_path = prefix + entry.name
+        is_dir = entry.is_dir()
+        if rules.ignored(rel_path, is_dir):
+            continue
+        if is_dir:
+            stack.append((_scan(entry.path), rel_path + "/"))
+        else:
+            yield entry.path, rel_path
+
+
+def _scan(directory):
+    with os.scandir(directory) as entries:
+        return iter(sorted(entries, key=lambda entry: (entry.is_dir(), entry.name)))
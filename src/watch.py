@@ -0,0 +1,178 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+)
+
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def create_watcher(directories, files=(), poll=False, interval=0.3, debounce=0.05):
+    if not poll:
+        try:
+            return InotifyWatcher(directories, files, debounce)
+        except OSError:
+            pass
+    return PollingWatcher(directories, files, interval)
+
+
+class InotifyWatcher:
+    def __init__(self, directories, files=(), debounce=0.05):
+        libc_name = ctypes.util.find_library("c")
+        if libc_name is None:
+            raise OSError("libc not found")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+
+        self.libc = libc
+        self.debounce = debounce
+        self.fd = libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches = {}
+        self.tree_dirs = set()
+        self.files = set()
+        for directory in directories:
+            self.add_tree(directory)
+        self.set_files(files)
+
+    def add_watch(self, directory):
+        directory = os.path.normpath(directory)
+        if directory in self.watches.values():
+            return
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"cannot watch {directory}")
+        self.watches[wd] = directory
+
+    def add_tree(self, root):
+        changed = set()
+        for dirpath, dirnames, filenames in os.walk(root):
+            self.add_watch(dirpath)
+            self.tree_dirs.add(os.path.normpath(dirpath))
+            changed.update(os.path.join(dirpath, name) for name in filenames)
+        return changed
+
+    def set_files(self, files):
+        self.files = {os.path.normpath(path) for path in files}
+        for directory in {os.path.dirname(path) or "." for path in self.files}:
+            self.add_watch(directory)
+
+    def wait(self, timeout=None):
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed = set()
+        while ready:
+            changed |= self._read_events()
+            ready, _, _ = select.select([self.fd], [], [], self.debounce)
+        return {os.path.normpath(path) for path in changed}
+
+    def _read_events(self):
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                for directory in list(self.watches.values()):
+                    changed |= self.add_tree(directory)
+                continue
+            directory = self.watches.get(wd)
+            if mask & IN_IGNORED:
+                self.tree_dirs.discard(self.watches.pop(wd, None))
+                continue
+            if directory is None or not name:
+                continue
+
+            path = os.path.join(directory, os.fsdecode(name))
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    changed |= self.add_tree(path)
+                elif mask & (IN_DELETE | IN_MOVED_FROM):
+                    changed.add(path)
+                continue
+            if directory in self.tree_dirs or os.path.normpath(path) in self.files:
+                changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    def __init__(self, directories, files=(), interval=0.3):
+        self.directories = list(directories)
+        self.files = set(files)
+        self.interval = interval
+        self.snapshot = self.scan()
+
+    def set_files(self, files):
+        self.files = set(files)
+        self.snapshot = self.scan()
+
+    def scan(self):
+        snapshot = {}
+        paths = list(self.files)
+        for directory in self.directories:
+            for dirpath, _, filenames in os.walk(directory):
+                paths.extend(os.path.join(dirpath, name) for name in filenames)
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            snapshot[os.path.normpath(path)] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            snapshot = self.scan()
+            changed = {
+                path
+                for path in snapshot.keys() | self.snapshot.keys()
+                if snapshot.get(path) != self.snapshot.get(path)
+            }
+            self.snapshot = snapshot
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            time.sleep(self.interval)
+
+    def close(self):
+        pass